@@ -1,3 +1,12 @@
 from django.contrib import admin
+from .models import InsightSnapshot
 
-# Analytics app doesn't have models, so no admin registration needed
+
+@admin.register(InsightSnapshot)
+class InsightSnapshotAdmin(admin.ModelAdmin):
+    """Admin configuration for InsightSnapshot model"""
+    list_display = ['user', 'kind', 'for_date', 'computed_at', 'version']
+    list_filter = ['kind', 'for_date']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['data', 'version', 'for_date', 'computed_at']
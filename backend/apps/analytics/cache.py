@@ -0,0 +1,86 @@
+"""
+Versioned cache for analytics reports
+
+Reports are stored under a per-user data version. Writes to the data a
+report reads bump the version (see signals.py), so stale entries are never
+read again and simply expire. The version is a DataVersion row ('reports'
+domain), shared by every process, so invalidation works with any configured
+Django cache backend, including the per-process LocMemCache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from apps.core.versions import DataVersions
+
+
+class ReportCache:
+    """Cache ProgressAnalyzer reports per (user, report type, window)"""
+
+    VERSION_DOMAIN = 'reports'
+    REPORT_KEY = 'analytics:report:{user_id}:{version}:{report_type}:{window}'
+    STATS_KEY = 'analytics:stats:{name}'
+
+    @staticmethod
+    def _timeout():
+        return getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60)
+
+    @classmethod
+    def get_version(cls, user_id):
+        """Return the user's current data version"""
+        return DataVersions.get_many(user_id, [cls.VERSION_DOMAIN])[cls.VERSION_DOMAIN][0]
+
+    @classmethod
+    def bump_version(cls, user_id):
+        """Invalidate every cached report of the user"""
+        DataVersions.bump(cls.VERSION_DOMAIN, user_id)
+
+    @classmethod
+    def get_or_compute(cls, user, report_type, window, compute):
+        """Return the cached report or compute and store it"""
+        window = ':'.join(str(part) for part in window)
+        key = cls.REPORT_KEY.format(
+            user_id=user.pk,
+            version=cls.get_version(user.pk),
+            report_type=report_type,
+            window=window
+        )
+
+        result = cache.get(key)
+        if result is not None:
+            cls._count('hits')
+            return result
+
+        cls._count('misses')
+        result = compute()
+        if result is not None:
+            cache.set(key, result, cls._timeout())
+        return result
+
+    @classmethod
+    def _count(cls, name):
+        key = cls.STATS_KEY.format(name=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+
+    @classmethod
+    def stats(cls):
+        """Return hit/miss counters"""
+        hits = cache.get(cls.STATS_KEY.format(name='hits'), 0)
+        misses = cache.get(cls.STATS_KEY.format(name='misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 1) if total else 0,
+            'backend': settings.CACHES['default']['BACKEND'],
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        """Reset hit/miss counters"""
+        cache.delete_many([
+            cls.STATS_KEY.format(name='hits'),
+            cls.STATS_KEY.format(name='misses'),
+        ])
@@ -0,0 +1,122 @@
+"""
+Request-scoped analytics data loader
+
+Loads one user's measurements, nutrition totals and workouts once for the
+widest window a request needs; calculators slice it in memory.
+"""
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.functional import cached_property
+from apps.measurements.models import BodyMeasurement
+from apps.nutrition.models import DailyNutritionTotals
+from apps.workouts.models import Workout, WorkoutExercise, WorkoutSchedule
+
+
+def _in_range(day, start_date, end_date):
+    return day >= start_date and (end_date is None or day <= end_date)
+
+
+class AnalyticsContext:
+    """Lazily loaded analytics data for one user and date window"""
+
+    def __init__(self, user, start_date, end_date=None):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @classmethod
+    def for_days(cls, user, days):
+        """Window used by the `days` based reports (open ended, like the reports)"""
+        return cls(user, timezone.now().date() - timedelta(days=days))
+
+    @classmethod
+    def ensure(cls, context, user, start_date, end_date=None):
+        """Return the given context if it covers the range, otherwise a new one"""
+        if context is not None and context.user == user and context.covers(start_date, end_date):
+            return context
+        return cls(user, start_date, end_date)
+
+    def covers(self, start_date, end_date=None):
+        """Check whether the loaded window contains the range"""
+        if start_date < self.start_date:
+            return False
+        if self.end_date is None:
+            return True
+        return end_date is not None and end_date <= self.end_date
+
+    # Measurements (all of them: goal progress needs the very first one)
+
+    @cached_property
+    def measurements(self):
+        return list(
+            BodyMeasurement.objects.filter(user=self.user).order_by('date').values(
+                'date', 'weight', 'height', 'body_fat_percentage'
+            )
+        )
+
+    def measurements_between(self, start_date, end_date=None):
+        return [m for m in self.measurements if _in_range(m['date'], start_date, end_date)]
+
+    # Nutrition
+
+    @cached_property
+    def nutrition_totals(self):
+        queryset = DailyNutritionTotals.objects.filter(user=self.user, date__gte=self.start_date)
+        if self.end_date:
+            queryset = queryset.filter(date__lte=self.end_date)
+        return list(queryset.order_by('date').values(
+            'date', 'calories', 'protein', 'carbs', 'fats', 'meals_count'
+        ))
+
+    def nutrition_totals_between(self, start_date, end_date=None):
+        return [n for n in self.nutrition_totals if _in_range(n['date'], start_date, end_date)]
+
+    # Workouts
+
+    @cached_property
+    def workouts(self):
+        queryset = Workout.objects.filter(user=self.user, date__gte=self.start_date)
+        if self.end_date:
+            queryset = queryset.filter(date__lte=self.end_date)
+        return list(queryset.order_by('date').values(
+            'date', 'completed', 'duration_minutes', 'total_calories_burned'
+        ))
+
+    def workouts_between(self, start_date, end_date=None):
+        return [w for w in self.workouts if _in_range(w['date'], start_date, end_date)]
+
+    def count_workouts(self, start_date, end_date):
+        """Count workouts in a range, querying only when it is outside the window"""
+        if self.covers(start_date, end_date):
+            return len(self.workouts_between(start_date, end_date))
+        return Workout.objects.filter(
+            user=self.user,
+            date__gte=start_date,
+            date__lte=end_date
+        ).count()
+
+    @cached_property
+    def workout_exercise_types(self):
+        queryset = WorkoutExercise.objects.filter(
+            workout__user=self.user,
+            workout__date__gte=self.start_date
+        )
+        if self.end_date:
+            queryset = queryset.filter(workout__date__lte=self.end_date)
+        return list(queryset.order_by('workout', 'order').values_list(
+            'workout__date', 'exercise__exercise_type'
+        ))
+
+    def exercise_types_between(self, start_date, end_date=None):
+        return [
+            exercise_type for day, exercise_type in self.workout_exercise_types
+            if _in_range(day, start_date, end_date)
+        ]
+
+    @cached_property
+    def active_schedule(self):
+        return WorkoutSchedule.objects.filter(
+            user=self.user,
+            is_active=True,
+            completed=False
+        ).select_related('workout_plan').first()
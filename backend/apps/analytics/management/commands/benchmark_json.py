@@ -0,0 +1,64 @@
+"""
+Django管理コマンド: JSONレンダラーのベンチマーク
+
+総合レポート (ProgressAnalyzer.get_comprehensive_report) のレスポンスを
+DRF標準の JSONRenderer と FastJSONRenderer でレンダリングし、所要時間を比較する。
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from apps.analytics.services import ProgressAnalyzer
+from apps.core import renderers
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = '総合レポートのJSONレンダリング時間を標準レンダラーと比較'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='対象ユーザーID (省略時は最初のアクティブユーザー)')
+        parser.add_argument('--days', type=int, default=365, help='レポート期間 (日数)')
+        parser.add_argument('--iterations', type=int, default=1000, help='レンダリング回数')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations は1以上を指定してください')
+        if options['days'] < 1:
+            raise CommandError('--days は1以上を指定してください')
+
+        users = User.objects.filter(is_active=True).order_by('pk')
+        if options['user_id']:
+            users = users.filter(pk=options['user_id'])
+        user = users.first()
+        if user is None:
+            raise CommandError('対象ユーザーがいません')
+
+        payload = ProgressAnalyzer.get_comprehensive_report(user, options['days'])
+        baseline = JSONRenderer()
+        fast = renderers.FastJSONRenderer()
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson が見つかりません: FastJSONRenderer は標準の json で動作します'))
+
+        self.stdout.write(
+            f"ユーザー {user.pk} / {options['days']}日 / {len(fast.render(payload)):,}バイト / "
+            f"{options['iterations']}回"
+        )
+
+        results = []
+        for name, renderer in (('JSONRenderer', baseline), ('FastJSONRenderer', fast)):
+            elapsed = self._time(renderer, payload, options['iterations'])
+            per_render = elapsed / options['iterations'] * 1_000_000
+            results.append(elapsed)
+            self.stdout.write(f"{name}: 合計 {elapsed * 1000:,.1f}ms / 1回 {per_render:,.1f}µs")
+
+        speedup = results[0] / results[1] if results[1] else 0
+        self.stdout.write(self.style.SUCCESS(f"✅ FastJSONRenderer は {speedup:.1f}倍"))
+
+    @staticmethod
+    def _time(renderer, payload, iterations):
+        """Total seconds for the given number of renders (after one warm-up)"""
+        renderer.render(payload)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            renderer.render(payload)
+        return time.perf_counter() - started
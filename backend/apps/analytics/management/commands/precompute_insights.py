@@ -0,0 +1,87 @@
+"""
+Django管理コマンド: ダッシュボード / パーソナルプランの事前計算
+
+ユーザーをチャンクに分けてプロセスプールで並列に計算し、
+データバージョン付きの InsightSnapshot として保存する。
+"""
+import time
+from multiprocessing import Pool
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from apps.analytics.tasks import BUILDERS, compute_snapshots
+from apps.users.models import User
+
+
+def _init_worker():
+    """Set up Django in spawned workers (no-op when forked)"""
+    django.setup()
+
+
+def _process_chunk(task):
+    """Compute one chunk of users; returns (users, stored, skipped, errors)"""
+    kinds, user_ids = task
+    return compute_snapshots(user_ids, kinds)
+
+
+class Command(BaseCommand):
+    help = 'ダッシュボードとパーソナルプランをユーザーごとに事前計算して保存'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='ワーカープロセス数 (1でプロセス内実行)')
+        parser.add_argument('--chunk-size', type=int, default=100, help='1タスクあたりのユーザー数')
+        parser.add_argument(
+            '--kinds', nargs='+', choices=sorted(BUILDERS), default=sorted(BUILDERS),
+            help='計算する種類'
+        )
+        parser.add_argument('--user-ids', nargs='+', type=int, help='対象ユーザーID (省略時は全アクティブユーザー)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers は1以上を指定してください')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size は1以上を指定してください')
+
+        users = User.objects.filter(is_active=True).order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+        user_ids = list(users.values_list('pk', flat=True))
+        if not user_ids:
+            self.stdout.write('対象ユーザーがいません')
+            return
+
+        size = options['chunk_size']
+        tasks = [(options['kinds'], user_ids[i:i + size]) for i in range(0, len(user_ids), size)]
+        self.stdout.write(
+            f"{len(user_ids)}ユーザーを{len(tasks)}チャンクで計算 "
+            f"(ワーカー {options['workers']} / 種類 {', '.join(options['kinds'])})"
+        )
+
+        started = time.monotonic()
+        if options['workers'] == 1:
+            self._report(map(_process_chunk, tasks), len(user_ids), started)
+        else:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with Pool(options['workers'], initializer=_init_worker) as pool:
+                self._report(pool.imap_unordered(_process_chunk, tasks), len(user_ids), started)
+
+    def _report(self, results, total_users, started):
+        """Print progress per finished chunk and the final throughput"""
+        done = stored = skipped = errors = 0
+        for users, chunk_stored, chunk_skipped, chunk_errors in results:
+            done += users
+            stored += chunk_stored
+            skipped += chunk_skipped
+            errors += chunk_errors
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed else 0
+            self.stdout.write(f"{done}/{total_users}ユーザー処理 (保存 {stored}) {rate:,.1f}ユーザー/秒")
+
+        elapsed = time.monotonic() - started
+        rate = total_users / elapsed if elapsed else 0
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(style(
+            f"✅ 事前計算完了: {total_users}ユーザー (保存 {stored} / 結果なし {skipped} / "
+            f"エラー {errors}) {elapsed:.1f}秒 {rate:,.1f}ユーザー/秒"
+        ))
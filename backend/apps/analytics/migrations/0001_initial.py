@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InsightSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("dashboard", "ダッシュボード"),
+                            ("personalized_plan", "パーソナルプラン"),
+                        ],
+                        max_length=30,
+                        verbose_name="種類",
+                    ),
+                ),
+                ("data", models.JSONField(verbose_name="データ")),
+                ("version", models.CharField(max_length=64, verbose_name="バージョン")),
+                ("for_date", models.DateField(verbose_name="対象日")),
+                ("computed_at", models.DateTimeField(verbose_name="計算日時")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="insight_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "インサイトスナップショット",
+                "verbose_name_plural": "インサイトスナップショット",
+                "unique_together": {("user", "kind")},
+            },
+        ),
+    ]
@@ -1,4 +1,32 @@
 from django.db import models
+from apps.users.models import User
 
-# Analytics app doesn't need models as it will use data from other apps
-# All calculations will be done in views/services
+# Analytics calculations use data from other apps (see services.py);
+# the only model stores precomputed results
+
+
+class InsightSnapshot(models.Model):
+    """
+    Precomputed dashboard / recommendation bundle for a user
+    Written by the precompute_insights command and on request-path misses
+    """
+    KIND_CHOICES = [
+        ('dashboard', 'ダッシュボード'),
+        ('personalized_plan', 'パーソナルプラン'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='insight_snapshots')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name='種類')
+    data = models.JSONField(verbose_name='データ')
+    # Data version the snapshot was computed from (see InsightSnapshotStore.version)
+    version = models.CharField(max_length=64, verbose_name='バージョン')
+    for_date = models.DateField(verbose_name='対象日')
+    computed_at = models.DateTimeField(verbose_name='計算日時')
+
+    class Meta:
+        verbose_name = 'インサイトスナップショット'
+        verbose_name_plural = 'インサイトスナップショット'
+        unique_together = ['user', 'kind']
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.kind} ({self.computed_at:%Y-%m-%d %H:%M})"
@@ -2,12 +2,36 @@
 Analytics service for calculating BMR, TDEE, and other metrics
 """
 from datetime import datetime, timedelta
-from django.db import models
-from django.db.models import Avg, Sum, Count
 from django.utils import timezone
-from apps.measurements.models import BodyMeasurement
-from apps.nutrition.models import Meal
-from apps.workouts.models import Workout
+from apps.measurements.models import MeasurementSnapshot
+
+from .cache import ReportCache
+from .context import AnalyticsContext
+from .timeseries import build_series, to_records
+
+
+def sum_nutrition_totals(rows):
+    """Sum DailyNutritionTotals rows loaded by an AnalyticsContext"""
+    return {
+        'total_meals': sum(row['meals_count'] for row in rows),
+        'total_calories': sum(row['calories'] for row in rows),
+        'total_protein': sum(row['protein'] for row in rows),
+        'total_carbs': sum(row['carbs'] for row in rows),
+        'total_fats': sum(row['fats'] for row in rows),
+    }
+
+
+def summarize_workouts(rows):
+    """Aggregate Workout rows loaded by an AnalyticsContext"""
+    durations = [row['duration_minutes'] for row in rows if row['duration_minutes'] is not None]
+    return {
+        'total_workouts': len(rows),
+        'completed_workouts': sum(1 for row in rows if row['completed']),
+        'total_duration': sum(durations) if durations else None,
+        'total_calories': sum(row['total_calories_burned'] for row in rows) if rows else None,
+        'avg_duration': sum(durations) / len(durations) if durations else None,
+        'unique_days': len({row['date'] for row in rows}),
+    }
 
 
 class MetabolismCalculator:
@@ -72,11 +96,9 @@ class MetabolismCalculator:
         """
         try:
             profile = user.profile
-            latest_measurement = BodyMeasurement.objects.filter(
-                user=user
-            ).order_by('-date').first()
+            snapshot = MeasurementSnapshot.for_user(user)
             
-            if not latest_measurement:
+            if not snapshot:
                 return None
             
             # Calculate BMR
@@ -84,8 +106,8 @@ class MetabolismCalculator:
             age = user.age if user.age else 30  # Default to 30 if age not available
             
             bmr = cls.calculate_bmr(
-                weight_kg=float(latest_measurement.weight),
-                height_cm=float(latest_measurement.height),
+                weight_kg=float(snapshot.weight),
+                height_cm=float(snapshot.height),
                 age=age,
                 gender=profile.gender
             )
@@ -94,8 +116,8 @@ class MetabolismCalculator:
             tdee = cls.calculate_tdee(bmr, profile.activity_level)
             
             # Calculate BMI
-            height_m = float(latest_measurement.height) / 100
-            bmi = float(latest_measurement.weight) / (height_m ** 2)
+            height_m = float(snapshot.height) / 100
+            bmi = float(snapshot.weight) / (height_m ** 2)
             
             # Determine BMI category
             if bmi < 18.5:
@@ -112,8 +134,8 @@ class MetabolismCalculator:
                 'tdee': tdee,
                 'bmi': round(bmi, 2),
                 'bmi_category': bmi_category,
-                'weight': float(latest_measurement.weight),
-                'height': float(latest_measurement.height),
+                'weight': float(snapshot.weight),
+                'height': float(snapshot.height),
                 'age': age,
                 'gender': profile.gender,
                 'activity_level': profile.activity_level
@@ -185,34 +207,33 @@ class ProgressAnalyzer:
     """Analyze user progress over time"""
     
     @staticmethod
-    def get_weight_progress_by_date(user, start_date, end_date):
+    def _measurement_history(measurements, fields, start_date, end_date, resolution='day',
+                             interpolate=False, moving_average=None):
+        """Build a dense history of measurement fields between two dates"""
+        dates = [m['date'] for m in measurements]
+        columns = {field: [m[field] for m in measurements] for field in fields}
+        return to_records(*build_series(
+            dates, columns, start_date, end_date,
+            resolution=resolution, interpolate=interpolate, window=moving_average
+        ))
+    
+    @classmethod
+    def get_weight_progress_by_date(cls, user, start_date, end_date, context=None, **series_options):
         """Get weight progress for specific date range"""
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date').values('date', 'weight')
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        data_list = context.measurements_between(start_date, end_date)
         
-        if not measurements:
+        if not data_list:
             return None
         
-        data_list = list(measurements)
         first_weight = float(data_list[0]['weight'])
         last_weight = float(data_list[-1]['weight'])
         weight_change = last_weight - first_weight
         
-        # Create dict of existing measurements
-        data_dict = {m['date']: float(m['weight']) for m in data_list}
-        
         # Fill all dates in range
-        filled_data = []
-        current = start_date
-        while current <= end_date:
-            filled_data.append({
-                'date': current,
-                'weight': data_dict.get(current)
-            })
-            current += timedelta(days=1)
+        filled_data = cls._measurement_history(
+            data_list, ('weight',), start_date, end_date, **series_options
+        )
         
         return {
             'data': filled_data,
@@ -222,37 +243,24 @@ class ProgressAnalyzer:
             'percentage_change': round((weight_change / first_weight) * 100, 2) if first_weight > 0 else 0,
         }
     
-    @staticmethod
-    def get_weight_progress(user, days=30):
+    @classmethod
+    def get_weight_progress(cls, user, days=30, context=None, **series_options):
         """Get weight progress over specified days"""
         start_date = timezone.now().date() - timedelta(days=days)
+        context = AnalyticsContext.ensure(context, user, start_date)
+        data_list = context.measurements_between(start_date)
         
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).order_by('date').values('date', 'weight')
-        
-        if not measurements:
+        if not data_list:
             return None
         
-        data_list = list(measurements)
         first_weight = float(data_list[0]['weight'])
         last_weight = float(data_list[-1]['weight'])
         weight_change = last_weight - first_weight
         
-        # Create dict of existing measurements
-        data_dict = {m['date']: float(m['weight']) for m in data_list}
-        
         # Fill all dates between first and last
-        filled_data = []
-        current = data_list[0]['date']
-        end = data_list[-1]['date']
-        while current <= end:
-            filled_data.append({
-                'date': current,
-                'weight': data_dict.get(current)
-            })
-            current += timedelta(days=1)
+        filled_data = cls._measurement_history(
+            data_list, ('weight',), data_list[0]['date'], data_list[-1]['date'], **series_options
+        )
         
         return {
             'data': filled_data,
@@ -263,20 +271,17 @@ class ProgressAnalyzer:
             'days': days
         }
     
-    @staticmethod
-    def get_body_composition_progress_by_date(user, start_date, end_date):
+    @classmethod
+    def get_body_composition_progress_by_date(cls, user, start_date, end_date, context=None, **series_options):
         """Get body composition progress for specific date range"""
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).order_by('date')
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        measurements = context.measurements_between(start_date, end_date)
         
         if not measurements:
             return None
         
-        first = measurements.first()
-        last = measurements.last()
+        first = measurements[0]
+        last = measurements[-1]
         
         result = {
             'body_fat_change': None,
@@ -284,61 +289,38 @@ class ProgressAnalyzer:
             'measurements': []
         }
         
-        if first.body_fat_percentage and last.body_fat_percentage:
+        if first['body_fat_percentage'] and last['body_fat_percentage']:
             result['body_fat_change'] = round(
-                float(last.body_fat_percentage) - float(first.body_fat_percentage), 2
+                float(last['body_fat_percentage']) - float(first['body_fat_percentage']), 2
             )
-            result['start_body_fat'] = float(first.body_fat_percentage)
-            result['current_body_fat'] = float(last.body_fat_percentage)
+            result['start_body_fat'] = float(first['body_fat_percentage'])
+            result['current_body_fat'] = float(last['body_fat_percentage'])
         
         # Calculate estimated muscle mass (weight * (1 - body_fat_percentage))
-        if first.body_fat_percentage and last.body_fat_percentage:
-            first_muscle = float(first.weight) * (1 - float(first.body_fat_percentage) / 100)
-            last_muscle = float(last.weight) * (1 - float(last.body_fat_percentage) / 100)
+        if first['body_fat_percentage'] and last['body_fat_percentage']:
+            first_muscle = float(first['weight']) * (1 - float(first['body_fat_percentage']) / 100)
+            last_muscle = float(last['weight']) * (1 - float(last['body_fat_percentage']) / 100)
             result['muscle_mass_change'] = round(last_muscle - first_muscle, 2)
         
-        # Create dict of existing measurements
-        meas_dict = {}
-        for m in measurements:
-            meas_dict[m.date] = {
-                'weight': float(m.weight),
-                'body_fat_percentage': float(m.body_fat_percentage) if m.body_fat_percentage else None
-            }
-        
         # Fill all dates in range
-        current = start_date
-        while current <= end_date:
-            if current in meas_dict:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': meas_dict[current]['weight'],
-                    'body_fat_percentage': meas_dict[current]['body_fat_percentage']
-                })
-            else:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': None,
-                    'body_fat_percentage': None
-                })
-            current += timedelta(days=1)
+        result['measurements'] = cls._measurement_history(
+            measurements, ('weight', 'body_fat_percentage'), start_date, end_date, **series_options
+        )
         
         return result
     
-    @staticmethod
-    def get_body_composition_progress(user, days=30):
+    @classmethod
+    def get_body_composition_progress(cls, user, days=30, context=None, **series_options):
         """Get body composition progress"""
         start_date = timezone.now().date() - timedelta(days=days)
-        
-        measurements = BodyMeasurement.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).order_by('date')
+        context = AnalyticsContext.ensure(context, user, start_date)
+        measurements = context.measurements_between(start_date)
         
         if not measurements:
             return None
         
-        first = measurements.first()
-        last = measurements.last()
+        first = measurements[0]
+        last = measurements[-1]
         
         result = {
             'body_fat_change': None,
@@ -346,70 +328,40 @@ class ProgressAnalyzer:
             'measurements': []
         }
         
-        if first.body_fat_percentage and last.body_fat_percentage:
+        if first['body_fat_percentage'] and last['body_fat_percentage']:
             result['body_fat_change'] = round(
-                float(last.body_fat_percentage) - float(first.body_fat_percentage), 2
+                float(last['body_fat_percentage']) - float(first['body_fat_percentage']), 2
             )
-            result['start_body_fat'] = float(first.body_fat_percentage)
-            result['current_body_fat'] = float(last.body_fat_percentage)
+            result['start_body_fat'] = float(first['body_fat_percentage'])
+            result['current_body_fat'] = float(last['body_fat_percentage'])
         
         # Calculate estimated muscle mass (weight * (1 - body_fat_percentage))
-        if first.body_fat_percentage and last.body_fat_percentage:
-            first_muscle = float(first.weight) * (1 - float(first.body_fat_percentage) / 100)
-            last_muscle = float(last.weight) * (1 - float(last.body_fat_percentage) / 100)
+        if first['body_fat_percentage'] and last['body_fat_percentage']:
+            first_muscle = float(first['weight']) * (1 - float(first['body_fat_percentage']) / 100)
+            last_muscle = float(last['weight']) * (1 - float(last['body_fat_percentage']) / 100)
             result['muscle_mass_change'] = round(last_muscle - first_muscle, 2)
         
-        # Create dict of existing measurements
-        meas_dict = {}
-        for m in measurements:
-            meas_dict[m.date] = {
-                'weight': float(m.weight),
-                'body_fat_percentage': float(m.body_fat_percentage) if m.body_fat_percentage else None
-            }
-        
         # Fill all dates between first and last
-        current = first.date
-        end = last.date
-        while current <= end:
-            if current in meas_dict:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': meas_dict[current]['weight'],
-                    'body_fat_percentage': meas_dict[current]['body_fat_percentage']
-                })
-            else:
-                result['measurements'].append({
-                    'date': current,
-                    'weight': None,
-                    'body_fat_percentage': None
-                })
-            current += timedelta(days=1)
+        result['measurements'] = cls._measurement_history(
+            measurements, ('weight', 'body_fat_percentage'), first['date'], last['date'], **series_options
+        )
         
         return result
     
     @staticmethod
-    def get_nutrition_trends_by_date(user, start_date, end_date):
+    def get_nutrition_trends_by_date(user, start_date, end_date, context=None):
         """Get nutrition trends for specific date range"""
-        # Get all meals in the date range
-        meals = Meal.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        )
+        # Sum the materialized daily totals in the date range
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        totals = sum_nutrition_totals(context.nutrition_totals_between(start_date, end_date))
         
-        total_meals = meals.count()
+        total_meals = totals['total_meals']
         
-        # Calculate totals from meal properties
         if total_meals > 0:
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            avg_calories = total_calories / total_meals
-            avg_protein = total_protein / total_meals
-            avg_carbs = total_carbs / total_meals
-            avg_fats = total_fats / total_meals
+            avg_calories = float(totals['total_calories']) / total_meals
+            avg_protein = float(totals['total_protein']) / total_meals
+            avg_carbs = float(totals['total_carbs']) / total_meals
+            avg_fats = float(totals['total_fats']) / total_meals
         else:
             avg_calories = avg_protein = avg_carbs = avg_fats = 0
         
@@ -422,29 +374,21 @@ class ProgressAnalyzer:
         }
     
     @staticmethod
-    def get_nutrition_trends(user, days=30):
+    def get_nutrition_trends(user, days=30, context=None):
         """Get nutrition trends"""
         start_date = timezone.now().date() - timedelta(days=days)
         
-        # Get all meals in the date range
-        meals = Meal.objects.filter(
-            user=user,
-            date__gte=start_date
-        )
+        # Sum the materialized daily totals in the date range
+        context = AnalyticsContext.ensure(context, user, start_date)
+        totals = sum_nutrition_totals(context.nutrition_totals_between(start_date))
         
-        total_meals = meals.count()
+        total_meals = totals['total_meals']
         
-        # Calculate totals from meal properties
         if total_meals > 0:
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            avg_calories = total_calories / total_meals
-            avg_protein = total_protein / total_meals
-            avg_carbs = total_carbs / total_meals
-            avg_fats = total_fats / total_meals
+            avg_calories = float(totals['total_calories']) / total_meals
+            avg_protein = float(totals['total_protein']) / total_meals
+            avg_carbs = float(totals['total_carbs']) / total_meals
+            avg_fats = float(totals['total_fats']) / total_meals
         else:
             avg_calories = avg_protein = avg_carbs = avg_fats = 0
         
@@ -458,26 +402,13 @@ class ProgressAnalyzer:
         }
     
     @staticmethod
-    def get_workout_trends_by_date(user, start_date, end_date):
+    def get_workout_trends_by_date(user, start_date, end_date, context=None):
         """Get workout trends for specific date range"""
-        workouts = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).aggregate(
-            total_workouts=Count('id'),
-            completed_workouts=Count('id', filter=models.Q(completed=True)),
-            total_duration=Sum('duration_minutes'),
-            total_calories=Sum('total_calories_burned'),
-            avg_duration=Avg('duration_minutes')
-        )
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        workouts = summarize_workouts(context.workouts_between(start_date, end_date))
         
         # Calculate consistency based on unique workout days vs total days
-        unique_workout_days = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).values('date').distinct().count()
+        unique_workout_days = workouts['unique_days']
         
         days = (end_date - start_date).days + 1
         consistency_rate = round((unique_workout_days / days * 100), 1) if days > 0 else 0
@@ -492,26 +423,14 @@ class ProgressAnalyzer:
         }
     
     @staticmethod
-    def get_workout_trends(user, days=30):
+    def get_workout_trends(user, days=30, context=None):
         """Get workout trends"""
         start_date = timezone.now().date() - timedelta(days=days)
-        
-        workouts = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).aggregate(
-            total_workouts=Count('id'),
-            completed_workouts=Count('id', filter=models.Q(completed=True)),
-            total_duration=Sum('duration_minutes'),
-            total_calories=Sum('total_calories_burned'),
-            avg_duration=Avg('duration_minutes')
-        )
+        context = AnalyticsContext.ensure(context, user, start_date)
+        workouts = summarize_workouts(context.workouts_between(start_date))
         
         # Calculate consistency based on unique workout days vs total days
-        unique_workout_days = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).values('date').distinct().count()
+        unique_workout_days = workouts['unique_days']
         
         consistency_rate = round((unique_workout_days / days * 100), 1) if days > 0 else 0
         
@@ -526,16 +445,11 @@ class ProgressAnalyzer:
         }
     
     @staticmethod
-    def get_exercise_type_distribution_by_date(user, start_date, end_date):
+    def get_exercise_type_distribution_by_date(user, start_date, end_date, context=None):
         """Get distribution of exercise types for specific date range"""
-        from apps.workouts.models import WorkoutExercise
-        
-        # Get all workout exercises in the period
-        workout_exercises = WorkoutExercise.objects.filter(
-            workout__user=user,
-            workout__date__gte=start_date,
-            workout__date__lte=end_date
-        ).select_related('exercise')
+        # Get all workout exercise types in the period
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        exercise_types = context.exercise_types_between(start_date, end_date)
         
         # Count by exercise type
         type_counts = {}
@@ -547,8 +461,7 @@ class ProgressAnalyzer:
             'sports': 'スポーツ',
         }
         
-        for we in workout_exercises:
-            exercise_type = we.exercise.exercise_type
+        for exercise_type in exercise_types:
             if exercise_type in type_counts:
                 type_counts[exercise_type] += 1
             else:
@@ -566,16 +479,13 @@ class ProgressAnalyzer:
         return result
     
     @staticmethod
-    def get_exercise_type_distribution(user, days=30):
+    def get_exercise_type_distribution(user, days=30, context=None):
         """Get distribution of exercise types"""
-        from apps.workouts.models import WorkoutExercise
         start_date = timezone.now().date() - timedelta(days=days)
         
-        # Get all workout exercises in the period (include both completed and in-progress)
-        workout_exercises = WorkoutExercise.objects.filter(
-            workout__user=user,
-            workout__date__gte=start_date
-        ).select_related('exercise')
+        # Get all workout exercise types in the period (include both completed and in-progress)
+        context = AnalyticsContext.ensure(context, user, start_date)
+        exercise_types = context.exercise_types_between(start_date)
         
         # Count by exercise type
         type_counts = {}
@@ -587,8 +497,7 @@ class ProgressAnalyzer:
             'sports': 'スポーツ',
         }
         
-        for we in workout_exercises:
-            exercise_type = we.exercise.exercise_type
+        for exercise_type in exercise_types:
             if exercise_type in type_counts:
                 type_counts[exercise_type] += 1
             else:
@@ -605,14 +514,35 @@ class ProgressAnalyzer:
         
         return result
     
+    @staticmethod
+    def _calories_burned_by_date(workouts):
+        """Sum calories burned per day (days without burned calories are skipped)"""
+        burned_by_date = {}
+        for item in workouts:
+            date_str = str(item['date'])
+            burned_by_date[date_str] = burned_by_date.get(date_str, 0) + (item['total_calories_burned'] or 0)
+        return {date_str: burned for date_str, burned in burned_by_date.items() if burned}
+    
     @classmethod
-    def get_comprehensive_report_by_date(cls, user, start_date, end_date):
-        """Get comprehensive progress report for specific date range"""
+    def get_comprehensive_report_by_date(cls, user, start_date, end_date, context=None):
+        """Get comprehensive progress report for specific date range (cached)"""
+        # The week of "workouts this week" depends on today as well
+        window = (start_date, end_date, timezone.now().date())
+        return ReportCache.get_or_compute(
+            user, 'comprehensive', window,
+            lambda: cls._build_comprehensive_report_by_date(user, start_date, end_date, context)
+        )
+    
+    @classmethod
+    def _build_comprehensive_report_by_date(cls, user, start_date, end_date, context=None):
+        """Build comprehensive progress report for specific date range"""
+        context = AnalyticsContext.ensure(context, user, start_date, end_date)
+        
         # Get individual reports
-        weight_progress = cls.get_weight_progress_by_date(user, start_date, end_date)
-        body_composition = cls.get_body_composition_progress_by_date(user, start_date, end_date)
-        nutrition_trends = cls.get_nutrition_trends_by_date(user, start_date, end_date)
-        workout_trends = cls.get_workout_trends_by_date(user, start_date, end_date)
+        weight_progress = cls.get_weight_progress_by_date(user, start_date, end_date, context)
+        body_composition = cls.get_body_composition_progress_by_date(user, start_date, end_date, context)
+        nutrition_trends = cls.get_nutrition_trends_by_date(user, start_date, end_date, context)
+        workout_trends = cls.get_workout_trends_by_date(user, start_date, end_date, context)
         
         # Format data for frontend compatibility
         result = {
@@ -656,40 +586,23 @@ class ProgressAnalyzer:
             result['current_body_fat'] = body_composition.get('current_body_fat')
         
         # Process nutrition data and workout calories
-        from ..nutrition.models import Meal
-        from ..workouts.models import Workout
-        from django.db.models import Sum, F
-        
         # Get daily calorie intake (摂取カロリー)
         daily_intake = {}
         if nutrition_trends:
             result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
             
-            meals_by_date = Meal.objects.filter(
-                user=user,
-                date__gte=start_date,
-                date__lte=end_date
-            ).values('date').annotate(
-                total_calories=Sum(F('items__calories'))
-            ).order_by('date')
+            meals_by_date = context.nutrition_totals_between(start_date, end_date)
             
             for item in meals_by_date:
-                if item['total_calories']:
-                    daily_intake[str(item['date'])] = round(item['total_calories'], 0)
+                if item['calories']:
+                    daily_intake[str(item['date'])] = round(item['calories'], 0)
         
         # Get daily calories burned (消費カロリー)
         daily_burned = {}
-        workouts_by_date = Workout.objects.filter(
-            user=user,
-            date__gte=start_date,
-            date__lte=end_date
-        ).values('date').annotate(
-            total_burned=Sum('total_calories_burned')
-        ).order_by('date')
-        
-        for item in workouts_by_date:
-            if item['total_burned']:
-                daily_burned[str(item['date'])] = round(item['total_burned'], 0)
+        for date_str, burned in cls._calories_burned_by_date(
+            context.workouts_between(start_date, end_date)
+        ).items():
+            daily_burned[date_str] = round(burned, 0)
         
         # Fill all dates in range with calorie data
         current = start_date
@@ -708,7 +621,7 @@ class ProgressAnalyzer:
             result['workout_consistency'] = workout_trends.get('completion_rate', 0)
         
         # Get exercise type distribution
-        result['exercise_types'] = cls.get_exercise_type_distribution_by_date(user, start_date, end_date)
+        result['exercise_types'] = cls.get_exercise_type_distribution_by_date(user, start_date, end_date, context)
         
         # Get user goals from profile
         try:
@@ -722,18 +635,12 @@ class ProgressAnalyzer:
         
         # Get workout goal from active workout schedule
         try:
-            from ..workouts.models import WorkoutSchedule
-            active_schedule = WorkoutSchedule.objects.filter(
-                user=user,
-                is_active=True,
-                completed=False
-            ).select_related('workout_plan').first()
+            active_schedule = context.active_schedule
             
             if active_schedule and active_schedule.workout_plan:
                 result['workout_goal'] = active_schedule.workout_plan.days_per_week
                 
                 # Calculate workouts this week for active schedule
-                from datetime import datetime
                 today = timezone.now().date()
                 # Get start of week (Monday)
                 start_of_week = today - timedelta(days=today.weekday())
@@ -743,11 +650,10 @@ class ProgressAnalyzer:
                 schedule_start = active_schedule.start_date
                 schedule_end = active_schedule.end_date
                 
-                workouts_this_week = Workout.objects.filter(
-                    user=user,
-                    date__gte=max(start_of_week, schedule_start),
-                    date__lte=min(end_of_week, schedule_end) if schedule_end else end_of_week
-                ).count()
+                workouts_this_week = context.count_workouts(
+                    max(start_of_week, schedule_start),
+                    min(end_of_week, schedule_end) if schedule_end else end_of_week
+                )
                 
                 result['workouts_this_week'] = workouts_this_week
             else:
@@ -780,13 +686,25 @@ class ProgressAnalyzer:
         return result
     
     @classmethod
-    def get_comprehensive_report(cls, user, days=30):
-        """Get comprehensive progress report"""
+    def get_comprehensive_report(cls, user, days=30, context=None):
+        """Get comprehensive progress report (cached)"""
+        window = (f'{days}d', timezone.now().date())
+        return ReportCache.get_or_compute(
+            user, 'comprehensive', window,
+            lambda: cls._build_comprehensive_report(user, days, context)
+        )
+    
+    @classmethod
+    def _build_comprehensive_report(cls, user, days=30, context=None):
+        """Build comprehensive progress report"""
+        start_date = timezone.now().date() - timedelta(days=days)
+        context = AnalyticsContext.ensure(context, user, start_date)
+        
         # Get individual reports
-        weight_progress = cls.get_weight_progress(user, days)
-        body_composition = cls.get_body_composition_progress(user, days)
-        nutrition_trends = cls.get_nutrition_trends(user, days)
-        workout_trends = cls.get_workout_trends(user, days)
+        weight_progress = cls.get_weight_progress(user, days, context)
+        body_composition = cls.get_body_composition_progress(user, days, context)
+        nutrition_trends = cls.get_nutrition_trends(user, days, context)
+        workout_trends = cls.get_workout_trends(user, days, context)
         
         # Format data for frontend compatibility
         result = {
@@ -831,39 +749,23 @@ class ProgressAnalyzer:
             result['current_body_fat'] = body_composition.get('current_body_fat')
         
         # Process nutrition data and workout calories
-        start_date = timezone.now().date() - timedelta(days=days)
-        from ..nutrition.models import Meal
-        from ..workouts.models import Workout
-        from django.db.models import Sum, F
-        
         # Get daily calorie intake (摂取カロリー)
         daily_intake = {}
         if nutrition_trends and nutrition_trends.get('total_meals_logged', 0) > 0:
             result['avg_calories'] = nutrition_trends.get('average_daily_calories', 0)
             
-            meals_by_date = Meal.objects.filter(
-                user=user,
-                date__gte=start_date
-            ).values('date').annotate(
-                total_calories=Sum(F('items__calories'))
-            ).order_by('date')
+            meals_by_date = context.nutrition_totals_between(start_date)
             
             for item in meals_by_date:
-                if item['total_calories']:
-                    daily_intake[str(item['date'])] = round(item['total_calories'], 0)
+                if item['calories']:
+                    daily_intake[str(item['date'])] = round(item['calories'], 0)
         
         # Get daily calories burned (消費カロリー)
         daily_burned = {}
-        workouts_by_date = Workout.objects.filter(
-            user=user,
-            date__gte=start_date
-        ).values('date').annotate(
-            total_burned=Sum('total_calories_burned')
-        ).order_by('date')
-        
-        for item in workouts_by_date:
-            if item['total_burned']:
-                daily_burned[str(item['date'])] = round(item['total_burned'], 0)
+        for date_str, burned in cls._calories_burned_by_date(
+            context.workouts_between(start_date)
+        ).items():
+            daily_burned[date_str] = round(burned, 0)
         
         # Combine both intake and burned calories
         all_dates = set(daily_intake.keys()) | set(daily_burned.keys())
@@ -888,7 +790,7 @@ class ProgressAnalyzer:
                 })
         
         # Get exercise type distribution
-        result['exercise_types'] = cls.get_exercise_type_distribution(user, days)
+        result['exercise_types'] = cls.get_exercise_type_distribution(user, days, context)
         
         # Get user goals from profile
         try:
@@ -902,12 +804,7 @@ class ProgressAnalyzer:
         
         # Get workout goal from active workout schedule
         try:
-            from ..workouts.models import WorkoutSchedule
-            active_schedule = WorkoutSchedule.objects.filter(
-                user=user,
-                is_active=True,
-                completed=False
-            ).select_related('workout_plan').first()
+            active_schedule = context.active_schedule
             
             if active_schedule and active_schedule.workout_plan:
                 result['workout_goal'] = active_schedule.workout_plan.days_per_week
@@ -922,11 +819,10 @@ class ProgressAnalyzer:
                 schedule_start = active_schedule.start_date
                 schedule_end = active_schedule.end_date
                 
-                workouts_this_week = Workout.objects.filter(
-                    user=user,
-                    date__gte=max(start_of_week, schedule_start),
-                    date__lte=min(end_of_week, schedule_end) if schedule_end else end_of_week
-                ).count()
+                workouts_this_week = context.count_workouts(
+                    max(start_of_week, schedule_start),
+                    min(end_of_week, schedule_end) if schedule_end else end_of_week
+                )
                 
                 result['workouts_this_week'] = workouts_this_week
             else:
@@ -963,7 +859,7 @@ class GoalTracker:
     """Track progress towards goals"""
     
     @staticmethod
-    def calculate_goal_progress(user):
+    def calculate_goal_progress(user, context=None):
         """Calculate progress towards user's goal"""
         try:
             profile = user.profile
@@ -972,16 +868,18 @@ class GoalTracker:
                 return None
             
             # Get starting and current weight
-            measurements = BodyMeasurement.objects.filter(user=user).order_by('date')
+            if context is None:
+                context = AnalyticsContext.for_days(user, 0)
+            measurements = context.measurements
             
-            if measurements.count() < 2:
+            if len(measurements) < 2:
                 return None
             
-            start_measurement = measurements.first()
-            current_measurement = measurements.last()
+            start_measurement = measurements[0]
+            current_measurement = measurements[-1]
             
-            start_weight = float(start_measurement.weight)
-            current_weight = float(current_measurement.weight)
+            start_weight = float(start_measurement['weight'])
+            current_weight = float(current_measurement['weight'])
             target_weight = float(profile.target_weight)
             
             # Calculate progress
@@ -1006,8 +904,32 @@ class GoalTracker:
                 'weight_remaining': round(remaining, 2),
                 'progress_percentage': round(progress_percentage, 1),
                 'estimated_weeks_to_goal': round(weeks_to_goal, 1),
-                'on_track': -0.5 <= (lost_so_far / ((current_measurement.date - start_measurement.date).days / 7)) <= -0.3
+                'on_track': -0.5 <= (lost_so_far / ((current_measurement['date'] - start_measurement['date']).days / 7)) <= -0.3
             }
         
         except Exception as e:
             return None
+
+
+class DashboardService:
+    """Dashboard statistics bundle (precomputed by precompute_insights)"""
+    
+    SNAPSHOT_KIND = 'dashboard'
+    
+    @staticmethod
+    def snapshot_version():
+        """Data the dashboard reads beyond the user's own (none)"""
+        return ''
+    
+    @staticmethod
+    def build(user):
+        """Compute all dashboard stats for the user"""
+        # Load the widest window once and share it between the calculators
+        context = AnalyticsContext.for_days(user, 30)
+        
+        return {
+            'metabolism': MetabolismCalculator.calculate_for_user(user),
+            'goal_progress': GoalTracker.calculate_goal_progress(user, context),
+            'recent_progress': ProgressAnalyzer.get_comprehensive_report(user, 7, context),
+            'monthly_progress': ProgressAnalyzer.get_comprehensive_report(user, 30, context),
+        }
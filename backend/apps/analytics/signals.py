@@ -0,0 +1,84 @@
+"""
+Signals for Analytics app
+Invalidate cached reports when the data they are built from changes
+and queue a refresh of the user's insight snapshots
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.measurements.models import BodyMeasurement
+from apps.nutrition.models import Meal, MealItem
+from apps.nutrition.signals import meals_bulk_changed
+from apps.users.models import User, UserProfile
+from apps.workouts.models import Workout, WorkoutExercise, WorkoutSchedule
+from .cache import ReportCache
+from .tasks import refresh_insights
+
+
+def _deleted_via(origin, model):
+    """Check whether a delete was started from the given model (instance or queryset)"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+def _parent_user_id(instance, field_name, model):
+    """Return the owning user id through a parent FK, without a query when it is cached"""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name).user_id
+    return model.objects.filter(
+        pk=getattr(instance, field.attname)
+    ).values_list('user_id', flat=True).first()
+
+
+def _invalidate(user_id):
+    """Bump the user's data version in the write's transaction"""
+    if user_id:
+        ReportCache.bump_version(user_id)
+        # Delayed so a burst of writes leads to a single refresh
+        refresh_insights.enqueue_once(
+            delay=getattr(settings, 'INSIGHT_REFRESH_DELAY', 60),
+            user_ids=[user_id]
+        )
+
+
+@receiver(post_save, sender=BodyMeasurement)
+@receiver(post_delete, sender=BodyMeasurement)
+@receiver(post_save, sender=Meal)
+@receiver(post_delete, sender=Meal)
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+@receiver(post_save, sender=WorkoutSchedule)
+@receiver(post_delete, sender=WorkoutSchedule)
+@receiver(post_save, sender=UserProfile)
+def invalidate_user_reports(sender, instance, origin=None, **kwargs):
+    """Invalidate reports when a user owned record changes"""
+    if _deleted_via(origin, User):
+        return
+    _invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=MealItem)
+@receiver(post_delete, sender=MealItem)
+def invalidate_reports_on_meal_item(sender, instance, origin=None, **kwargs):
+    """Invalidate reports when a meal item changes"""
+    # Meal and user deletes invalidate on their own
+    if _deleted_via(origin, Meal) or _deleted_via(origin, User):
+        return
+    _invalidate(_parent_user_id(instance, 'meal', Meal))
+
+
+@receiver(meals_bulk_changed)
+def invalidate_reports_on_bulk_meals(sender, user_ids, **kwargs):
+    """Invalidate reports after meals or items were created in bulk"""
+    for user_id in user_ids:
+        _invalidate(user_id)
+
+
+@receiver(post_save, sender=WorkoutExercise)
+@receiver(post_delete, sender=WorkoutExercise)
+def invalidate_reports_on_workout_exercise(sender, instance, origin=None, **kwargs):
+    """Invalidate reports when a workout exercise changes"""
+    # Workout and user deletes invalidate on their own
+    if _deleted_via(origin, Workout) or _deleted_via(origin, User):
+        return
+    _invalidate(_parent_user_id(instance, 'workout', Workout))
@@ -0,0 +1,94 @@
+"""
+Precomputed insight snapshots
+
+The precompute_insights command stores dashboard and recommendation bundles
+per user. A snapshot is served while it was computed from the user's current
+data (the DataVersion stamps of every user domain, plus any shared data the
+builder reads), on the same day and within INSIGHT_SNAPSHOT_MAX_AGE; otherwise
+the request computes live and stores the result for the next one. The stamps
+are database rows, so snapshots written by the command or by another worker
+are recognised as fresh by every process.
+
+A builder is any class with SNAPSHOT_KIND, build(user) and snapshot_version().
+"""
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from apps.core.versions import DataVersions, USER_DOMAINS
+from .models import InsightSnapshot
+
+
+class InsightSnapshotStore:
+    """Read and write InsightSnapshot rows"""
+
+    @staticmethod
+    def _max_age():
+        return timedelta(seconds=getattr(settings, 'INSIGHT_SNAPSHOT_MAX_AGE', 24 * 60 * 60))
+
+    @staticmethod
+    def encode(data):
+        """Convert to plain JSON types (rendered the same as the live response)"""
+        return json.loads(json.dumps(data, cls=JSONEncoder))
+
+    @staticmethod
+    def version(user_id, builder):
+        """Version stamp of the data a builder reads for the user"""
+        stamps = DataVersions.get_many(user_id, list(USER_DOMAINS))
+        parts = [f'{domain}={stamps[domain][0]}' for domain in sorted(stamps)]
+        parts.append(builder.snapshot_version())
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    @classmethod
+    def is_fresh(cls, snapshot, version):
+        now = timezone.now()
+        return (
+            snapshot.version == version
+            and snapshot.for_date == now.date()
+            and now - snapshot.computed_at < cls._max_age()
+        )
+
+    @classmethod
+    def compute(cls, user, builder, version=None):
+        """Build an unsaved snapshot, or None when the builder has no result"""
+        # Read the version first: writes made while computing leave the snapshot stale
+        if version is None:
+            version = cls.version(user.pk, builder)
+        data = builder.build(user)
+        if data is None:
+            return None
+        now = timezone.now()
+        return InsightSnapshot(
+            user=user,
+            kind=builder.SNAPSHOT_KIND,
+            data=cls.encode(data),
+            version=version,
+            for_date=now.date(),
+            computed_at=now,
+        )
+
+    @staticmethod
+    def save(snapshots):
+        """Insert or replace snapshots in one statement"""
+        InsightSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['user', 'kind'],
+            update_fields=['data', 'version', 'for_date', 'computed_at'],
+        )
+
+    @classmethod
+    def serve(cls, user, builder):
+        """Return the fresh snapshot data, computing and storing it on a miss"""
+        version = cls.version(user.pk, builder)
+        snapshot = InsightSnapshot.objects.filter(user=user, kind=builder.SNAPSHOT_KIND).first()
+        if snapshot is not None and cls.is_fresh(snapshot, version):
+            return snapshot.data
+
+        snapshot = cls.compute(user, builder, version)
+        if snapshot is None:
+            return None
+        cls.save([snapshot])
+        return snapshot.data
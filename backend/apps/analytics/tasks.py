@@ -0,0 +1,41 @@
+"""
+Background jobs for Analytics app
+"""
+from apps.jobs.queue import task
+from apps.recommendations.services import PersonalizedPlanService
+from apps.users.models import User
+from .services import DashboardService
+from .snapshots import InsightSnapshotStore
+
+BUILDERS = {
+    builder.SNAPSHOT_KIND: builder
+    for builder in (DashboardService, PersonalizedPlanService)
+}
+
+
+def compute_snapshots(user_ids, kinds):
+    """Compute and store snapshots for the users; returns (users, stored, skipped, errors)"""
+    users = User.objects.filter(pk__in=user_ids).select_related('profile')
+
+    snapshots = []
+    skipped = errors = 0
+    for user in users:
+        for kind in kinds:
+            try:
+                snapshot = InsightSnapshotStore.compute(user, BUILDERS[kind])
+            except Exception:
+                errors += 1
+                continue
+            if snapshot is None:
+                skipped += 1
+            else:
+                snapshots.append(snapshot)
+
+    InsightSnapshotStore.save(snapshots)
+    return len(user_ids), len(snapshots), skipped, errors
+
+
+@task('analytics.refresh_insights', priority=-1, concurrency=2)
+def refresh_insights(user_ids, kinds=None):
+    """Recompute insight snapshots off the request path"""
+    compute_snapshots(user_ids, kinds or sorted(BUILDERS))
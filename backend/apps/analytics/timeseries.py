@@ -0,0 +1,198 @@
+"""
+Dense time-series builder for analytics history
+
+Takes columnar data (one list of dates, one list of values per column) and
+places it on a dense day/week/month axis by ordinal arithmetic, so there are
+no per-day dict lookups or date objects built for every missing day.
+"""
+from datetime import date, timedelta
+
+RESOLUTIONS = ('day', 'week', 'month')
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _bucket_axis(start_date, end_date, resolution):
+    """Return (first bucket start, bucket count, date -> bucket index function)"""
+    if resolution == 'day':
+        origin = start_date.toordinal()
+        return start_date, end_date.toordinal() - origin + 1, lambda day: day.toordinal() - origin
+
+    if resolution == 'week':
+        first = start_date - timedelta(days=start_date.weekday())
+        origin = first.toordinal()
+        size = (end_date.toordinal() - origin) // 7 + 1
+        return first, size, lambda day: (day.toordinal() - origin) // 7
+
+    if resolution == 'month':
+        first = start_date.replace(day=1)
+        origin = _month_index(first)
+        return first, _month_index(end_date) - origin + 1, lambda day: _month_index(day) - origin
+
+    raise ValueError(f"Unknown resolution '{resolution}'. Use one of: {', '.join(RESOLUTIONS)}")
+
+
+def _bucket_dates(first, size, resolution):
+    if resolution == 'day':
+        origin = first.toordinal()
+        return [date.fromordinal(origin + i) for i in range(size)]
+    if resolution == 'week':
+        origin = first.toordinal()
+        return [date.fromordinal(origin + i * 7) for i in range(size)]
+    origin = _month_index(first)
+    return [date((origin + i) // 12, (origin + i) % 12 + 1, 1) for i in range(size)]
+
+
+def interpolate_gaps(values):
+    """Linearly fill None values between known points (edges are left empty)"""
+    previous = None
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if previous is not None and i - previous > 1:
+            start_value = values[previous]
+            step = (value - start_value) / (i - previous)
+            for j in range(previous + 1, i):
+                values[j] = start_value + step * (j - previous)
+        previous = i
+    return values
+
+
+def moving_average(values, window):
+    """Trailing moving average over the last `window` points, ignoring gaps"""
+    if window < 1:
+        raise ValueError('window must be at least 1')
+    result = [None] * len(values)
+    total = 0.0
+    count = 0
+    for i, value in enumerate(values):
+        if value is not None:
+            total += value
+            count += 1
+        if i >= window:
+            dropped = values[i - window]
+            if dropped is not None:
+                total -= dropped
+                count -= 1
+        if count and value is not None:
+            result[i] = total / count
+    return result
+
+
+def build_series(dates, columns, start_date, end_date, resolution='day',
+                 interpolate=False, window=None, precision=2):
+    """
+    Place (date, value) columns on a dense axis between start_date and end_date
+
+    `dates` must be sorted. Values falling into the same week/month are
+    averaged. Returns (bucket dates, {column: values}); with `window` each
+    column also gets a '<column>_avg' moving average.
+    """
+    first, size, index_of = _bucket_axis(start_date, end_date, resolution)
+
+    # Bucket every column in a single pass over the dates
+    sums = {name: [0.0] * size for name in columns}
+    counts = {name: [0] * size for name in columns}
+    for position, day in enumerate(dates):
+        if day < start_date or day > end_date:
+            continue
+        bucket = index_of(day)
+        for name, values in columns.items():
+            value = values[position]
+            if value is not None:
+                sums[name][bucket] += float(value)
+                counts[name][bucket] += 1
+
+    series = {}
+    for name in columns:
+        column_sums, column_counts = sums[name], counts[name]
+        values = [
+            column_sums[i] / column_counts[i] if column_counts[i] else None
+            for i in range(size)
+        ]
+        if interpolate:
+            interpolate_gaps(values)
+        series[name] = values
+        if window:
+            series[f'{name}_avg'] = moving_average(values, window)
+
+    if precision is not None:
+        for name, values in series.items():
+            series[name] = [None if value is None else round(value, precision) for value in values]
+
+    return _bucket_dates(first, size, resolution), series
+
+
+def to_records(bucket_dates, series):
+    """Turn a built series into the list of dicts the API returns"""
+    names = list(series)
+    columns = [series[name] for name in names]
+    return [
+        {'date': day, **dict(zip(names, row))}
+        for day, row in zip(bucket_dates, zip(*columns))
+    ]
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Returns the indices of at most `threshold` points of (x, y) that keep
+    the visual shape of the line. First and last points are always kept.
+    """
+    size = len(x)
+    if threshold >= size:
+        return list(range(size))
+    if threshold < 3:
+        return [0, size - 1][:threshold]
+
+    indices = [0]
+    bucket_size = (size - 2) / (threshold - 2)
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        # Average of the next bucket is the third triangle corner
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, size)
+        span = next_end - next_start
+        avg_x = sum(x[next_start:next_end]) / span
+        avg_y = sum(y[next_start:next_end]) / span
+
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        point_x, point_y = x[selected], y[selected]
+
+        best_area = -1.0
+        best_index = start
+        for i in range(start, end):
+            area = abs(
+                (point_x - avg_x) * (y[i] - point_y) - (point_x - x[i]) * (avg_y - point_y)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = i
+
+        indices.append(best_index)
+        selected = best_index
+
+    indices.append(size - 1)
+    return indices
+
+
+def bucket_ranges(size, threshold):
+    """Split `size` points into at most `threshold` contiguous (start, end) buckets"""
+    if threshold >= size:
+        return [(i, i + 1) for i in range(size)]
+    step = size / threshold
+    return [(int(i * step), int((i + 1) * step)) for i in range(threshold)]
+
+
+def bucket_average(values, ranges):
+    """Average each bucket of a column, ignoring gaps"""
+    result = []
+    for start, end in ranges:
+        present = [value for value in values[start:end] if value is not None]
+        result.append(sum(present) / len(present) if present else None)
+    return result
@@ -1,7 +1,8 @@
 from django.urls import path
 from .views import (
     MetabolismView, MacroCalculatorView, ProgressAnalysisView,
-    GoalProgressView, DashboardStatsView, CalorieCalculatorView
+    GoalProgressView, DashboardStatsView, CalorieCalculatorView,
+    ReportCacheStatsView
 )
 
 urlpatterns = [
@@ -11,4 +12,5 @@ urlpatterns = [
     path('goal-progress/', GoalProgressView.as_view(), name='goal-progress'),
     path('dashboard/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('calorie-calculator/', CalorieCalculatorView.as_view(), name='calorie-calculator'),
+    path('cache-stats/', ReportCacheStatsView.as_view(), name='cache-stats'),
 ]
@@ -1,16 +1,21 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
+from apps.core.conditional import ConditionalGetMixin
+from .cache import ReportCache
+from .snapshots import InsightSnapshotStore
+from .timeseries import RESOLUTIONS
 from .services import (
     MetabolismCalculator, MacroCalculator,
-    ProgressAnalyzer, GoalTracker
+    ProgressAnalyzer, GoalTracker, DashboardService
 )
 
 
-class MetabolismView(APIView):
+class MetabolismView(ConditionalGetMixin, APIView):
     """Calculate BMR and TDEE"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
     
     def get(self, request):
         """Get BMR and TDEE for current user"""
@@ -25,9 +30,10 @@ class MetabolismView(APIView):
         return Response(result)
 
 
-class MacroCalculatorView(APIView):
+class MacroCalculatorView(ConditionalGetMixin, APIView):
     """Calculate macro distribution"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
     
     def get(self, request):
         """Calculate macros based on user's TDEE and goal"""
@@ -72,12 +78,18 @@ class MacroCalculatorView(APIView):
         })
 
 
-class ProgressAnalysisView(APIView):
+class ProgressAnalysisView(ConditionalGetMixin, APIView):
     """Analyze user progress"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('nutrition', 'workouts', 'measurements', 'profile')
     
     def get(self, request):
-        """Get progress analysis"""
+        """
+        Get progress analysis
+
+        resolution / interpolate / moving_average shape the history series of
+        type=weight and type=body_composition only; other types ignore them.
+        """
         from datetime import datetime
         
         # Get date range from query params
@@ -107,16 +119,43 @@ class ProgressAnalysisView(APIView):
         # Get analysis type
         analysis_type = request.query_params.get('type', 'comprehensive')
         
+        # History options for weight and body composition series (see docstring)
+        resolution = request.query_params.get('resolution', 'day')
+        if resolution not in RESOLUTIONS:
+            return Response(
+                {'error': f"Invalid resolution. Use one of: {', '.join(RESOLUTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            moving_average = int(request.query_params.get('moving_average', 0))
+        except ValueError:
+            moving_average = -1
+        if moving_average < 0:
+            return Response(
+                {'error': 'Invalid moving_average. Use a positive number of points (0 to disable)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        moving_average = moving_average or None
+        series_options = {
+            'resolution': resolution,
+            'interpolate': request.query_params.get('interpolate', '').lower() in ('1', 'true'),
+            'moving_average': moving_average,
+        }
+        
         if analysis_type == 'weight':
             if start_date and end_date:
-                result = ProgressAnalyzer.get_weight_progress_by_date(request.user, start_date, end_date)
+                result = ProgressAnalyzer.get_weight_progress_by_date(
+                    request.user, start_date, end_date, **series_options
+                )
             else:
-                result = ProgressAnalyzer.get_weight_progress(request.user, days)
+                result = ProgressAnalyzer.get_weight_progress(request.user, days, **series_options)
         elif analysis_type == 'body_composition':
             if start_date and end_date:
-                result = ProgressAnalyzer.get_body_composition_progress_by_date(request.user, start_date, end_date)
+                result = ProgressAnalyzer.get_body_composition_progress_by_date(
+                    request.user, start_date, end_date, **series_options
+                )
             else:
-                result = ProgressAnalyzer.get_body_composition_progress(request.user, days)
+                result = ProgressAnalyzer.get_body_composition_progress(request.user, days, **series_options)
         elif analysis_type == 'nutrition':
             if start_date and end_date:
                 result = ProgressAnalyzer.get_nutrition_trends_by_date(request.user, start_date, end_date)
@@ -142,9 +181,10 @@ class ProgressAnalysisView(APIView):
         return Response(result)
 
 
-class GoalProgressView(APIView):
+class GoalProgressView(ConditionalGetMixin, APIView):
     """Track progress towards goal"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
     
     def get(self, request):
         """Get goal progress"""
@@ -159,30 +199,15 @@ class GoalProgressView(APIView):
         return Response(result)
 
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(ConditionalGetMixin, APIView):
     """Get dashboard statistics"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('nutrition', 'workouts', 'measurements', 'profile')
     
     def get(self, request):
         """Get all stats for dashboard"""
-        # Get metabolism data
-        metabolism = MetabolismCalculator.calculate_for_user(request.user)
-        
-        # Get goal progress
-        goal_progress = GoalTracker.calculate_goal_progress(request.user)
-        
-        # Get recent progress (7 days)
-        recent_progress = ProgressAnalyzer.get_comprehensive_report(request.user, 7)
-        
-        # Get monthly progress (30 days)
-        monthly_progress = ProgressAnalyzer.get_comprehensive_report(request.user, 30)
-        
-        return Response({
-            'metabolism': metabolism,
-            'goal_progress': goal_progress,
-            'recent_progress': recent_progress,
-            'monthly_progress': monthly_progress
-        })
+        # Served from the precomputed snapshot when it is still fresh
+        return Response(InsightSnapshotStore.serve(request.user, DashboardService))
 
 
 class CalorieCalculatorView(APIView):
@@ -236,3 +261,17 @@ class CalorieCalculatorView(APIView):
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+class ReportCacheStatsView(APIView):
+    """Report cache hit/miss counters (admin only)"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Get cache statistics"""
+        return Response(ReportCache.stats())
+    
+    def delete(self, request):
+        """Reset cache statistics"""
+        ReportCache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
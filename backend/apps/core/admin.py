@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import DataVersion
+
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    """Admin configuration for DataVersion model"""
+    list_display = ['domain', 'user', 'version', 'updated_at']
+    list_filter = ['domain']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    readonly_fields = ['version', 'updated_at']
@@ -0,0 +1,130 @@
+"""
+Conditional GET for per-user read endpoints
+
+Views declare the data domains their responses are built from. Right after
+authentication the domains' version stamps (versions.py) are turned into a
+weak ETag and a Last-Modified date; when the client's If-None-Match /
+If-Modified-Since still match, a bare 304 is returned before the handler runs,
+so no analytics or serialization work is done for unchanged data.
+
+    class MealViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+        conditional_domains = ('nutrition', 'profile', 'food_catalog')
+
+    @api_view(['GET'])
+    @conditional_get('measurements')
+    def latest_measurement(request):
+        ...
+"""
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from .versions import DataVersions
+
+
+class NotModified(Exception):
+    """Raised from APIView.initial to answer with the prepared 304 response"""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def get_validators(request, domains):
+    """
+    Build (etag, last_modified) for the request
+
+    The ETag also covers the URL (with query), the negotiated format, the
+    deploy (CONDITIONAL_GET_SALT) and the current date, since several
+    endpoints report "today" or "this week".
+    """
+    stamps = DataVersions.get_many(request.user.pk, domains)
+    parts = [
+        getattr(settings, 'CONDITIONAL_GET_SALT', ''),
+        str(request.user.pk),
+        str(timezone.now().date()),
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ]
+    parts.extend(f'{domain}={stamps[domain][0]}' for domain in sorted(stamps))
+    etag = 'W/"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    last_modified = int(max(modified for _, modified in stamps.values()))
+    return etag, last_modified
+
+
+def check_not_modified(request, etag, last_modified):
+    """Return a 304 (or 412) response when the client's copy is still current, else None"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Attach the validators; clients must revalidate before reusing the response"""
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for APIViews and ViewSets
+
+    conditional_domains lists the data domains (see versions.py) every GET of
+    the view reads; override get_conditional_domains to vary them per action.
+    """
+
+    conditional_domains = ()
+
+    def get_conditional_domains(self):
+        return self.conditional_domains
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self._validators = None
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+            return
+        domains = self.get_conditional_domains()
+        if domains:
+            self._validators = get_validators(request, domains)
+            response = check_not_modified(request, *self._validators)
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code == 200:
+            set_validators(response, *validators)
+        return response
+
+
+def conditional_get(*domains):
+    """ConditionalGetMixin for function views (place below @api_view)"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+
+            validators = get_validators(request, domains)
+            response = check_not_modified(request, *validators)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, *validators)
+            return response
+        return wrapper
+    return decorator
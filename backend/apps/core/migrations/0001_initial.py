@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("domain", models.CharField(max_length=30, verbose_name="ドメイン")),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=1, verbose_name="バージョン"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="更新日時"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="data_versions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "データバージョン",
+                "verbose_name_plural": "データバージョン",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dataversion",
+            constraint=models.UniqueConstraint(
+                fields=("user", "domain"), name="unique_user_data_version"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dataversion",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", True)),
+                fields=("domain",),
+                name="unique_shared_data_version",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from apps.users.models import User
+
+
+class DataVersion(models.Model):
+    """
+    Version stamp of one data domain (see versions.py)
+    Per user for user data; user is empty for the shared catalogs
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='data_versions'
+    )
+    domain = models.CharField(max_length=30, verbose_name='ドメイン')
+    version = models.PositiveBigIntegerField(default=1, verbose_name='バージョン')
+    updated_at = models.DateTimeField(default=timezone.now, verbose_name='更新日時')
+
+    class Meta:
+        verbose_name = 'データバージョン'
+        verbose_name_plural = 'データバージョン'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'domain'], name='unique_user_data_version'),
+            models.UniqueConstraint(
+                fields=['domain'], condition=Q(user__isnull=True), name='unique_shared_data_version'
+            ),
+        ]
+
+    def __str__(self):
+        owner = self.user_id or 'shared'
+        return f"{self.domain}:{owner} v{self.version}"
@@ -0,0 +1,124 @@
+"""
+Keyset pagination on (date, id)
+
+Page numbers need a COUNT(*) per page and an OFFSET scan that grows with the
+page number. Keyset pages continue after the last row of the previous page
+instead, so every page costs the same, served from a (user, date, id) index.
+
+Opt-in per request so page number clients keep working: send
+`?pagination=cursor` for the first page, then follow `next` (which carries
+`?cursor=`). Pages are newest first; `?ordering=` does not apply to them.
+
+    {"next": "https://.../api/nutrition/meals/?cursor=MjAyNC0wMS0wMnw0Mg", "results": [...]}
+"""
+import base64
+from collections import OrderedDict
+from datetime import date
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class DateCursorPagination(BasePagination):
+    """Newest first keyset pages on (date, id); page numbers unless requested"""
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, row):
+        value = f'{row.date.isoformat()}|{row.pk}'
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """Return (date, id) of the last row of the previous page, or None"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            last_date, last_id = value.split('|')
+            return date.fromisoformat(last_date), int(last_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if not self.is_requested(request):
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            last_date, last_id = cursor
+            # `date <= last` bounds the index scan; the exclude only drops the rest of that day
+            queryset = queryset.filter(date__lte=last_date).exclude(date=last_date, pk__gte=last_id)
+
+        # One extra row tells whether there is a next page (no COUNT)
+        rows = list(queryset.order_by('-date', '-pk')[:page_size + 1])
+        self.next_row = rows[page_size - 1] if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.next_row is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_row))
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return PageNumberPagination().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pages (newest first)',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyset cursor from the previous page\'s next link',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -0,0 +1,115 @@
+"""
+Fast JSON renderer and parser
+
+FastJSONRenderer / FastJSONParser replace DRF's JSONRenderer / JSONParser in
+REST_FRAMEWORK (DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES). They encode
+and decode with orjson when it is installed; without it, or for options orjson
+cannot express (indent other than 2, ASCII-only or non-compact output, non
+UTF-8 request bodies), they fall back to the stdlib json classes, and both
+paths produce the same output for valid JSON values.
+
+The one difference is non-finite floats (NaN / inf from numpy statistics):
+the orjson path writes them as null, while the strict stdlib path raises
+ValueError ("Out of range float values are not JSON compliant"), as DRF's
+JSONRenderer does. Finding them would mean walking every payload rendered
+with a null, which costs most of orjson's gain, so code that can produce
+them should map them to None itself.
+
+Values that do not go through a serializer field (analytics payloads built
+from dicts) are encoded like serializer fields would: dates, datetimes and
+times in REST_FRAMEWORK DATE_FORMAT / DATETIME_FORMAT / TIME_FORMAT, decimals
+as numbers (COERCE_DECIMAL_TO_STRING only applies to DecimalFields).
+"""
+import datetime
+import decimal
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONEncoder(encoders.JSONEncoder):
+    """DRF's encoder with the configured date / datetime / time formats"""
+
+    # Field instances only format values; their timezone follows the active one
+    datetime_field = serializers.DateTimeField()
+    date_field = serializers.DateField()
+    time_field = serializers.TimeField()
+
+    def default(self, obj):
+        # Checked first: the most common values of analytics payloads
+        if type(obj) is decimal.Decimal:
+            return float(obj)
+        if isinstance(obj, datetime.datetime):
+            return self.datetime_field.to_representation(obj)
+        if isinstance(obj, datetime.date):
+            # Same string as DateField for the ISO format, without strftime
+            if api_settings.DATE_FORMAT in (ISO_8601, '%Y-%m-%d'):
+                return obj.isoformat()
+            return self.date_field.to_representation(obj)
+        if isinstance(obj, datetime.time):
+            return self.time_field.to_representation(obj)
+        return super().default(obj)
+
+
+# Shared by every render: the hook keeps no per-call state
+_encoder = FastJSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson when available"""
+
+    encoder_class = FastJSONEncoder
+
+    # numpy values from analytics are encoded natively; temporal values go
+    # through the encoder hook to use the configured formats
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def use_orjson(self, indent):
+        return (
+            orjson is not None
+            and indent in (None, 2)
+            and self.ensure_ascii is False
+            and self.compact
+            and self.strict
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if not self.use_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = self.options | (orjson.OPT_INDENT_2 if indent else 0)
+        # NaN / inf become null here; the stdlib path raises for them (see module docstring)
+        ret = orjson.dumps(data, default=_encoder.default, option=option)
+        # Same escaping as JSONRenderer: U+2028 / U+2029 are not valid in JavaScript strings
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding with orjson when available"""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
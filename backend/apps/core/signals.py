@@ -0,0 +1,98 @@
+"""
+Signals for Core app
+Bump data version stamps when user data or a shared catalog changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.media.uploads import media_stored
+from apps.media.variants import variants_generated
+from apps.nutrition.signals import meals_bulk_changed
+from apps.users.models import User
+from .versions import DataVersions, SHARED_DOMAINS, USER_DOMAINS
+
+USER_MODELS = {
+    model: (domain, lookup)
+    for domain, models in USER_DOMAINS.items()
+    for model, lookup in models
+}
+SHARED_MODELS = {
+    model: (domain, bump_on_create)
+    for domain, models in SHARED_DOMAINS.items()
+    for model, bump_on_create in models
+}
+
+
+def _deleted_via(origin, model):
+    """Check whether a delete was started from the given model (instance or queryset)"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+def _owner_id(instance, lookup):
+    """Return the owning user id, through a parent FK without a query when it is cached"""
+    if lookup == 'pk':
+        return instance.pk
+    if '__' not in lookup:
+        return getattr(instance, f'{lookup}_id')
+
+    parent_name = lookup.split('__')[0]
+    field = instance._meta.get_field(parent_name)
+    if field.is_cached(instance):
+        return getattr(instance, parent_name).user_id
+    return field.related_model.objects.filter(
+        pk=getattr(instance, field.attname)
+    ).values_list('user_id', flat=True).first()
+
+
+def _bump(domain, user_id=None):
+    """Bump in the write's transaction, so it commits (or rolls back) with the data"""
+    DataVersions.bump(domain, user_id)
+
+
+def bump_user_data(sender, instance, origin=None, **kwargs):
+    """Bump the owner's domain when a user owned row changes"""
+    domain, lookup = USER_MODELS[sender]
+    # A deleted user has no stamps left; deleting the parent row bumps on its own
+    if _deleted_via(origin, User):
+        return
+    if '__' in lookup:
+        parent = sender._meta.get_field(lookup.split('__')[0]).related_model
+        if _deleted_via(origin, parent):
+            return
+
+    user_id = _owner_id(instance, lookup)
+    if user_id:
+        _bump(domain, user_id)
+
+
+def bump_shared_data(sender, instance, created=False, **kwargs):
+    """Bump a catalog when one of its rows (possibly shown in user data) changes"""
+    domain, bump_on_create = SHARED_MODELS[sender]
+    if created and not bump_on_create:
+        return
+    _bump(domain)
+
+
+for model in USER_MODELS:
+    post_save.connect(bump_user_data, sender=model, dispatch_uid=f'versions_save_{model.__name__}')
+    post_delete.connect(bump_user_data, sender=model, dispatch_uid=f'versions_delete_{model.__name__}')
+
+for model in SHARED_MODELS:
+    post_save.connect(bump_shared_data, sender=model, dispatch_uid=f'versions_save_{model.__name__}')
+    post_delete.connect(bump_shared_data, sender=model, dispatch_uid=f'versions_delete_{model.__name__}')
+
+
+@receiver(meals_bulk_changed)
+def bump_on_bulk_meals(sender, user_ids, **kwargs):
+    """Meals and items written with bulk_create send no model signals"""
+    for user_id in user_ids:
+        _bump('nutrition', user_id)
+
+
+@receiver(media_stored)
+@receiver(variants_generated)
+def bump_on_media(sender, instance, **kwargs):
+    """Background uploads and variants change file URLs with queryset updates / bulk writes"""
+    if sender in USER_MODELS:
+        bump_user_data(sender, instance)
+    elif sender in SHARED_MODELS:
+        _bump(SHARED_MODELS[sender][0])
@@ -0,0 +1,183 @@
+"""
+Sparse fieldsets for read serializers
+
+`?fields=` limits a response to the named fields and `?expand=` names the
+nested relations to embed. Dotted paths reach into nested serializers:
+
+    GET /api/nutrition/meals/?fields=id,date,name,total_calories
+    GET /api/nutrition/meals/?fields=id,date,items.serving_size,items.food.name
+    GET /api/workouts/workouts/?expand=exercises
+
+Without either parameter responses keep their full shape. With one of them a
+relation listed in Meta.expandable_fields is embedded only when it is expanded
+or named in `fields`; otherwise a foreign key is rendered as its id and a list
+is left out. Views pass the same request to sparse_queryset, so relations
+that are left out are not prefetched and unread columns are not loaded.
+
+Serializer Meta options:
+    expandable_fields: nested serializers embedded only on request
+    field_prefetches: {field: [lookups]} read by a method / property field
+    field_sources: {field: [columns]} read by a method / property field
+"""
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+class SparseFieldset:
+    """Requested fields (None: all) and expanded relations of one serializer level"""
+
+    def __init__(self, fields=None):
+        self.fields = fields
+        self.expand = set()
+        self.children = {}
+
+    @classmethod
+    def parse(cls, fields=None, expand=None):
+        root = cls(set() if fields is not None else None)
+        for path in _split(fields or ''):
+            node = root
+            *parents, name = path.split('.')
+            for parent in parents:
+                node.fields.add(parent)
+                node.expand.add(parent)
+                node = node.child(parent, restrict=True)
+            node.fields.add(name)
+        for path in _split(expand or ''):
+            node = root
+            for name in path.split('.'):
+                node.expand.add(name)
+                node = node.child(name)
+        return root
+
+    @classmethod
+    def from_request(cls, request):
+        """Parse the query parameters of a read request (None when it asks for the full shape)"""
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        return cls.parse(params.get(FIELDS_PARAM), params.get(EXPAND_PARAM))
+
+    def child(self, name, restrict=False):
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = SparseFieldset()
+        if restrict and node.fields is None:
+            node.fields = set()
+        return node
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return name in self.expand or (self.fields is not None and name in self.fields)
+
+
+class SparseFieldsetsMixin:
+    """Prune a ModelSerializer's fields to the request's sparse fieldset"""
+
+    def get_sparse(self):
+        if hasattr(self, '_sparse'):
+            return self._sparse
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        # Only the outermost serializer reads the request; nested ones get their part from it
+        if parent is None:
+            return SparseFieldset.from_request(self.context.get('request'))
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.get_sparse()
+        if sparse is None:
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            field = fields[name]
+            if not sparse.includes(name):
+                del fields[name]
+            elif name not in expandable:
+                continue
+            elif sparse.expands(name):
+                getattr(field, 'child', field)._sparse = sparse.child(name)
+            elif isinstance(field, serializers.ListSerializer):
+                del fields[name]
+            else:
+                fields[name] = serializers.PrimaryKeyRelatedField(source=field.source, read_only=True)
+        return fields
+
+    @classmethod
+    def sparse_prefetches(cls, sparse, prefix=''):
+        """prefetch_related lookups the sparse shape reads"""
+        meta = cls.Meta
+        lookups = []
+        for name, related in getattr(meta, 'field_prefetches', {}).items():
+            if sparse.includes(name):
+                lookups.extend(prefix + lookup for lookup in related)
+
+        for name in getattr(meta, 'expandable_fields', ()):
+            if not (sparse.includes(name) and sparse.expands(name)):
+                continue
+            field = cls._declared_fields[name]
+            nested = getattr(field, 'child', field)
+            lookup = prefix + (field.source or name).replace('.', '__')
+            lookups.append(lookup)
+            if isinstance(nested, SparseFieldsetsMixin):
+                lookups.extend(nested.sparse_prefetches(sparse.child(name), lookup + '__'))
+        return list(dict.fromkeys(lookups))
+
+    @classmethod
+    def sparse_columns(cls, sparse):
+        """Columns the sparse shape reads (None: all, or unknown for some field)"""
+        if sparse.fields is None:
+            return None
+
+        meta = cls.Meta
+        concrete = {field.name for field in meta.model._meta.concrete_fields}
+        sources = getattr(meta, 'field_sources', {})
+        prefetched = set(getattr(meta, 'field_prefetches', {})) | set(getattr(meta, 'expandable_fields', ()))
+        columns = {meta.model._meta.pk.name}
+        for name in sparse.fields:
+            field = cls._declared_fields.get(name)
+            root = ((field.source if field is not None else None) or name).split('.')[0]
+            if name in sources:
+                columns.update(sources[name])
+            elif root in concrete:
+                columns.add(root)
+            elif name in concrete:
+                columns.add(name)
+            elif name not in prefetched:
+                # A method / property field with undeclared reads: load every column
+                return None
+        return columns
+
+
+def sparse_queryset(queryset, serializer_class, request, full, required=()):
+    """
+    Shape a read queryset for the request
+
+    Args:
+        queryset: base queryset
+        serializer_class: SparseFieldsetsMixin serializer of the response
+        request: current request
+        full: function applying the usual prefetches for the full shape
+        required: columns the view itself reads (e.g. for pagination)
+    """
+    sparse = SparseFieldset.from_request(request)
+    if sparse is None:
+        return full(queryset)
+
+    queryset = queryset.prefetch_related(*serializer_class.sparse_prefetches(sparse))
+    columns = serializer_class.sparse_columns(sparse)
+    if columns is not None:
+        queryset = queryset.only(*columns, *required)
+    return queryset
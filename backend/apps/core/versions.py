@@ -0,0 +1,111 @@
+"""
+Per-domain data version stamps
+
+Every user has one stamp per data domain (nutrition, workouts, measurements,
+profile); the food and exercise catalogs have one shared stamp each. Stamps
+are DataVersion rows bumped in the transaction of the write (see signals.py),
+so every process sees a write as soon as it is committed, and a rolled back
+write leaves the stamp as it was. Conditional GET (conditional.py) turns the
+stamps into ETag / Last-Modified headers.
+
+Other stamps use their own domain names: per user (ReportCache: 'reports')
+or shared when read and bumped without a user (ExerciseCatalog: 'exercise_catalog',
+LocalFoodIndex: 'food_index').
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from apps.measurements.models import BodyMeasurement, ProgressLog
+from apps.nutrition.models import Food, Meal, MealItem, FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
+from apps.users.models import User, UserProfile, FoodPreference, UserPreferences
+from apps.workouts.models import (
+    Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
+    Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
+)
+from .models import DataVersion
+
+# Rows of each user domain with the lookup of their owner
+USER_DOMAINS = {
+    'nutrition': [
+        (Meal, 'user'),
+        (MealItem, 'meal__user'),
+        (FavoriteFood, 'user'),
+        (FavoriteMeal, 'user'),
+        (FavoriteMealItem, 'favorite_meal__user'),
+        (Recipe, 'user'),
+    ],
+    'workouts': [
+        (Workout, 'user'),
+        (WorkoutExercise, 'workout__user'),
+        (WorkoutSchedule, 'user'),
+        (FavoriteExercise, 'user'),
+    ],
+    'measurements': [
+        (BodyMeasurement, 'user'),
+        (ProgressLog, 'user'),
+    ],
+    'profile': [
+        (User, 'pk'),
+        (UserProfile, 'user'),
+        (FoodPreference, 'user'),
+        (UserPreferences, 'user'),
+    ],
+}
+
+# Catalog rows shown inside user data, with whether creating one changes any
+# response (a new food or exercise is in nobody's data yet, a new plan day is)
+SHARED_DOMAINS = {
+    'food_catalog': [
+        (Food, False),
+    ],
+    'workout_catalog': [
+        (Exercise, False),
+        (ExerciseMedia, True),
+        (WorkoutPlan, False),
+        (WorkoutPlanDay, True),
+        (WorkoutPlanExercise, True),
+    ],
+}
+
+
+class DataVersions:
+    """Read and bump the version stamp (tag, modified timestamp) of a domain"""
+
+    @staticmethod
+    def _owner(domain, user_id):
+        return None if domain in SHARED_DOMAINS else user_id
+
+    @classmethod
+    def get_many(cls, user_id, domains):
+        """Return {domain: (tag, modified)} for the user, creating missing stamps"""
+        user_domains = [domain for domain in domains if domain not in SHARED_DOMAINS]
+        shared_domains = [domain for domain in domains if domain in SHARED_DOMAINS]
+        rows = DataVersion.objects.filter(
+            Q(user_id=user_id, domain__in=user_domains) | Q(user__isnull=True, domain__in=shared_domains)
+        ).values_list('domain', 'version', 'updated_at')
+        found = {domain: (version, updated_at) for domain, version, updated_at in rows}
+
+        stamps = {}
+        for domain in domains:
+            if domain not in found:
+                # First read of the domain (another request may create it meanwhile)
+                row, _ = DataVersion.objects.get_or_create(user_id=cls._owner(domain, user_id), domain=domain)
+                found[domain] = (row.version, row.updated_at)
+            version, updated_at = found[domain]
+            stamps[domain] = (str(version), updated_at.timestamp())
+        return stamps
+
+    @classmethod
+    def bump(cls, domain, user_id=None):
+        """Mark a domain of the user (or a shared catalog) as changed"""
+        owner = cls._owner(domain, user_id)
+        rows = DataVersion.objects.filter(user_id=owner, domain=domain)
+        values = {'version': F('version') + 1, 'updated_at': timezone.now()}
+        if rows.update(**values):
+            return
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(user_id=owner, domain=domain, updated_at=values['updated_at'])
+        except IntegrityError:
+            # Created by a concurrent write
+            rows.update(**values)
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin configuration for Job model"""
+    list_display = ['id', 'task', 'status', 'priority', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error']
+    actions = ['retry_jobs']
+    
+    @admin.action(description='選択したジョブを再実行')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            finished_at=None,
+        )
+        self.message_user(request, f'{updated}件のジョブを再投入しました')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = 'Jobs'
+
+    def ready(self):
+        # Register the tasks defined in each app's tasks.py
+        autodiscover_modules('tasks')
@@ -0,0 +1,126 @@
+"""
+Django管理コマンド: バックグラウンドジョブのワーカー
+
+Job テーブルから実行可能なジョブを優先度順に取得し、スレッドで並列に実行する。
+SIGINT / SIGTERM を受けると実行中のジョブの終了を待って停止する。
+"""
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from apps.jobs.queue import JobQueue, registry
+
+
+class Command(BaseCommand):
+    help = 'データベースのジョブキューを処理するワーカーを起動'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='同時に実行するジョブ数')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='キューが空のときの待機秒数')
+        parser.add_argument(
+            '--stale-timeout', type=int, default=15 * 60,
+            help='この秒数を超えてハートビートのないジョブを停止したワーカーのものとして再投入'
+        )
+        parser.add_argument('--max-jobs', type=int, help='指定数のジョブを処理したら終了')
+        parser.add_argument('--burst', action='store_true', help='キューが空になったら終了')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency は1以上を指定してください')
+        if options['stale_timeout'] < 3:
+            raise CommandError('--stale-timeout は3以上を指定してください')
+
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        self.stdout.write(
+            f"ワーカー {self.worker_id} 起動 (同時実行 {options['concurrency']} / "
+            f"タスク {', '.join(sorted(registry)) or 'なし'})"
+        )
+        self.succeeded = self.failed = 0
+        started = time.monotonic()
+        self._loop(options)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ ワーカー停止: 完了 {self.succeeded} / 失敗 {self.failed} ({elapsed:.1f}秒)"
+        ))
+
+    def _stop(self, signum, frame):
+        if not self.stopping:
+            self.stdout.write('停止要求を受信: 実行中のジョブの終了を待機します')
+        self.stopping = True
+
+    def _loop(self, options):
+        concurrency = options['concurrency']
+        max_jobs = options['max_jobs']
+        claimed_total = 0
+        last_requeue = None
+        last_heartbeat = time.monotonic()
+        active = set()
+
+        with ThreadPoolExecutor(concurrency) as executor:
+            while not self.stopping:
+                now = time.monotonic()
+                if last_requeue is None or now - last_requeue >= options['stale_timeout'] / 2:
+                    self._requeue_stale(options['stale_timeout'])
+                    last_requeue = now
+                # Long jobs stay locked while this worker is alive
+                if active and now - last_heartbeat >= options['stale_timeout'] / 3:
+                    JobQueue.heartbeat(self.worker_id)
+                    last_heartbeat = now
+
+                free = concurrency - len(active)
+                if max_jobs is not None:
+                    free = min(free, max_jobs - claimed_total)
+                jobs = JobQueue.claim(self.worker_id, free) if free > 0 else []
+                claimed_total += len(jobs)
+                for job in jobs:
+                    active.add(executor.submit(self._run, job))
+
+                if not active:
+                    if options['burst'] or (max_jobs is not None and claimed_total >= max_jobs):
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                # Wake up when a job finishes (or poll again if nothing was claimed)
+                timeout = 0 if jobs and len(active) < concurrency else options['poll_interval']
+                done, active = wait(active, timeout=timeout, return_when=FIRST_COMPLETED)
+                self._collect(done)
+
+            while active:
+                done, active = wait(active, timeout=options['stale_timeout'] / 3)
+                self._collect(done)
+                if active:
+                    JobQueue.heartbeat(self.worker_id)
+
+    def _run(self, job):
+        """Run one job in a pool thread (each thread has its own connection)"""
+        close_old_connections()
+        try:
+            started = time.monotonic()
+            succeeded = JobQueue.run(job)
+            return job, succeeded, time.monotonic() - started
+        finally:
+            connections.close_all()
+
+    def _collect(self, futures):
+        for future in futures:
+            job, succeeded, elapsed = future.result()
+            if succeeded:
+                self.succeeded += 1
+                self.stdout.write(f"完了: {job.task} #{job.pk} ({elapsed:.2f}秒)")
+            else:
+                self.failed += 1
+                self.stderr.write(f"失敗: {job.task} #{job.pk} ({job.attempts}/{job.max_attempts}回目)")
+
+    def _requeue_stale(self, timeout):
+        requeued, failed = JobQueue.requeue_stale(timeout)
+        if requeued or failed:
+            self.stdout.write(f"停止したワーカーのジョブ: 再投入 {requeued} / 失敗 {failed}")
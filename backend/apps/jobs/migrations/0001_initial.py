@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=100, verbose_name="タスク")),
+                (
+                    "payload",
+                    models.JSONField(blank=True, default=dict, verbose_name="引数"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "待機中"),
+                            ("running", "実行中"),
+                            ("succeeded", "完了"),
+                            ("failed", "失敗"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="状態",
+                    ),
+                ),
+                ("priority", models.SmallIntegerField(default=0, verbose_name="優先度")),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="試行回数"),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(default=3, verbose_name="最大試行回数"),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="実行予定日時"
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(blank=True, max_length=100, verbose_name="ワーカー"),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="取得日時"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="最後のエラー")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "finished_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="終了日時"),
+                ),
+            ],
+            options={
+                "verbose_name": "ジョブ",
+                "verbose_name_plural": "ジョブ",
+                "ordering": ["-priority", "run_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-priority", "run_at", "id"],
+                        name="jobs_job_status_541e6c_idx",
+                    ),
+                    models.Index(
+                        fields=["task", "status"], name="jobs_job_task_38e384_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
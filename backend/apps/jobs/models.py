@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Background job stored in the database (see queue.py)
+    Claimed and run by `manage.py run_worker`
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, '待機中'),
+        (RUNNING, '実行中'),
+        (SUCCEEDED, '完了'),
+        (FAILED, '失敗'),
+    ]
+    
+    task = models.CharField(max_length=100, verbose_name='タスク')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='引数')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED, verbose_name='状態')
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0, verbose_name='優先度')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='試行回数')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='最大試行回数')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='実行予定日時')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='ワーカー')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='取得日時')
+    last_error = models.TextField(blank=True, verbose_name='最後のエラー')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='終了日時')
+    
+    class Meta:
+        verbose_name = 'ジョブ'
+        verbose_name_plural = 'ジョブ'
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            # Claim order of runnable jobs
+            models.Index(fields=['status', '-priority', 'run_at', 'id']),
+            # Running count per task (concurrency limits)
+            models.Index(fields=['task', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,205 @@
+"""
+Database backed job queue
+
+Jobs are rows in the Job table; no broker is needed. Workers
+(`manage.py run_worker`) claim runnable jobs in priority order with
+SELECT ... FOR UPDATE SKIP LOCKED, so several workers never block on or
+take the same row. Databases without SKIP LOCKED (SQLite in development)
+fall back to a conditional UPDATE per job: only the worker whose UPDATE
+changes the row owns it.
+
+Tasks are registered with the `task` decorator in an app's tasks.py:
+
+    @task('workouts.recalculate_calories', max_attempts=5)
+    def recalculate_calories(workout_ids):
+        ...
+
+    recalculate_calories.enqueue(workout_ids=[1, 2])
+
+Jobs enqueued inside a transaction become visible to workers on commit.
+
+Workers refresh locked_at of their running jobs as a heartbeat; only jobs
+whose worker stopped heartbeating are requeued, and finishing a job only
+updates the row while the worker still owns it.
+"""
+import traceback
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import Job
+
+# First retry delay; doubled on every further attempt
+RETRY_BASE_SECONDS = 30
+# Queued rows looked at per claimed job (rows of tasks at their limit are passed over)
+CLAIM_SCAN_FACTOR = 5
+
+
+class Task:
+    """A registered job function with its queue options"""
+
+    def __init__(self, func, name, priority=0, max_attempts=3, concurrency=None):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        # Most jobs of this task running at once over all workers (None: unlimited)
+        self.concurrency = concurrency
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, priority=None, delay=None, **payload):
+        """Queue a run with JSON-serializable keyword arguments"""
+        return Job.objects.create(
+            task=self.name,
+            payload=payload,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay or 0),
+        )
+
+    def enqueue_once(self, priority=None, delay=None, **payload):
+        """Queue a run unless the same run is already waiting (returns None then)"""
+        if Job.objects.filter(task=self.name, status=Job.QUEUED, payload=payload).exists():
+            return None
+        return self.enqueue(priority, delay, **payload)
+
+
+registry = {}
+
+
+def task(name, priority=0, max_attempts=3, concurrency=None):
+    """Register a function as a job task"""
+    def decorator(func):
+        registered = Task(func, name, priority, max_attempts, concurrency)
+        registry[name] = registered
+        return registered
+    return decorator
+
+
+class JobQueue:
+    """Claim, run and retry jobs"""
+
+    @staticmethod
+    def _lock_task(name):
+        """Serialize concurrency checks of one task between workers (PostgreSQL)"""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+
+    @classmethod
+    def _has_slot(cls, name, running):
+        """Whether the task is below its concurrency limit"""
+        registered = registry.get(name)
+        if registered is None or registered.concurrency is None:
+            return True
+        if name not in running:
+            cls._lock_task(name)
+            running[name] = Job.objects.filter(task=name, status=Job.RUNNING).count()
+        return running[name] < registered.concurrency
+
+    @classmethod
+    def claim(cls, worker_id, limit=1):
+        """Mark up to `limit` runnable jobs as running by this worker and return them"""
+        if limit < 1:
+            return []
+
+        now = timezone.now()
+        claimed = []
+        with transaction.atomic():
+            queryset = Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+
+            running = {}
+            for job in queryset.order_by('-priority', 'run_at', 'id')[:limit * CLAIM_SCAN_FACTOR]:
+                if len(claimed) >= limit:
+                    break
+                if not cls._has_slot(job.task, running):
+                    continue
+                # Locked rows always match; without SKIP LOCKED this decides the race
+                updated = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+                    status=Job.RUNNING,
+                    attempts=F('attempts') + 1,
+                    locked_by=worker_id,
+                    locked_at=now,
+                )
+                if not updated:
+                    continue
+                if job.task in running:
+                    running[job.task] += 1
+                job.status = Job.RUNNING
+                job.attempts += 1
+                job.locked_by = worker_id
+                job.locked_at = now
+                claimed.append(job)
+        return claimed
+
+    @staticmethod
+    def _owned(job):
+        """The job's row while it is still running under the worker that claimed it"""
+        return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+
+    @classmethod
+    def run(cls, job):
+        """Run a claimed job; returns True when it succeeded"""
+        registered = registry.get(job.task)
+        try:
+            if registered is None:
+                raise LookupError(f'Unknown task: {job.task}')
+            registered(**job.payload)
+        except Exception:
+            cls.fail(job, traceback.format_exc())
+            return False
+
+        cls._owned(job).update(
+            status=Job.SUCCEEDED,
+            finished_at=timezone.now(),
+            last_error='',
+        )
+        return True
+
+    @classmethod
+    def fail(cls, job, error):
+        """Retry with exponential backoff, or give up after max_attempts"""
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            cls._owned(job).update(
+                status=Job.QUEUED,
+                run_at=now + timedelta(seconds=delay),
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+            )
+        else:
+            cls._owned(job).update(
+                status=Job.FAILED,
+                finished_at=now,
+                last_error=error,
+            )
+
+    @staticmethod
+    def heartbeat(worker_id):
+        """Refresh locked_at of the worker's running jobs"""
+        return Job.objects.filter(status=Job.RUNNING, locked_by=worker_id).update(locked_at=timezone.now())
+
+    @staticmethod
+    def requeue_stale(timeout):
+        """Release jobs whose worker stopped heartbeating without finishing them"""
+        now = timezone.now()
+        stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=timeout))
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED,
+            finished_at=now,
+            last_error='Worker stopped while running the job',
+        )
+        requeued = stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+        return requeued, failed
+
+    @staticmethod
+    def stats():
+        """Job counts per status"""
+        counts = dict(Job.objects.values_list('status').annotate(count=Count('id')).values_list('status', 'count'))
+        return {status: counts.get(status, 0) for status, _ in Job.STATUS_CHOICES}
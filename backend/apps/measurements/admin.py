@@ -2,7 +2,7 @@
 Admin configuration for Measurements app
 """
 from django.contrib import admin
-from .models import BodyMeasurement, ProgressLog
+from .models import BodyMeasurement, MeasurementSnapshot, ProgressLog
 
 
 @admin.register(BodyMeasurement)
@@ -34,6 +34,14 @@ class BodyMeasurementAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(MeasurementSnapshot)
+class MeasurementSnapshotAdmin(admin.ModelAdmin):
+    """Admin configuration for MeasurementSnapshot model"""
+    list_display = ['user', 'latest_date', 'weight', 'body_fat_percentage', 'previous_date', 'updated_at']
+    search_fields = ['user__email', 'user__username']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(ProgressLog)
 class ProgressLogAdmin(admin.ModelAdmin):
     """Admin configuration for ProgressLog model"""
@@ -5,3 +5,6 @@ class MeasurementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.measurements'
     verbose_name = 'Measurements'
+
+    def ready(self):
+        import apps.measurements.signals
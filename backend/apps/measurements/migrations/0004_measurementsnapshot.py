@@ -0,0 +1,137 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Create a MeasurementSnapshot for every user with measurements"""
+    BodyMeasurement = apps.get_model("measurements", "BodyMeasurement")
+    MeasurementSnapshot = apps.get_model("measurements", "MeasurementSnapshot")
+
+    snapshots = {}
+    previous_body_fat = {}
+    rows = BodyMeasurement.objects.order_by("user_id", "-date").values(
+        "user_id", "date", "weight", "height", "body_fat_percentage"
+    )
+    for row in rows.iterator(chunk_size=2000):
+        user_id = row["user_id"]
+        snapshot = snapshots.get(user_id)
+        if snapshot is None:
+            snapshots[user_id] = MeasurementSnapshot(
+                user_id=user_id,
+                latest_date=row["date"],
+                weight=row["weight"],
+                height=row["height"],
+                body_fat_percentage=row["body_fat_percentage"],
+            )
+            continue
+        if snapshot.previous_date is None:
+            snapshot.previous_date = row["date"]
+            snapshot.previous_weight = row["weight"]
+            snapshot.previous_height = row["height"]
+        if user_id not in previous_body_fat and row["body_fat_percentage"] is not None:
+            previous_body_fat[user_id] = row["body_fat_percentage"]
+            snapshot.previous_body_fat_percentage = row["body_fat_percentage"]
+
+    MeasurementSnapshot.objects.bulk_create(snapshots.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("measurements", "0003_alter_bodymeasurement_options_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MeasurementSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("latest_date", models.DateField(verbose_name="最新測定日")),
+                (
+                    "weight",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=5, verbose_name="体重 (kg)"
+                    ),
+                ),
+                (
+                    "height",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="身長 (cm)",
+                    ),
+                ),
+                (
+                    "body_fat_percentage",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=1,
+                        max_digits=4,
+                        null=True,
+                        verbose_name="体脂肪率 %",
+                    ),
+                ),
+                (
+                    "previous_date",
+                    models.DateField(blank=True, null=True, verbose_name="前回測定日"),
+                ),
+                (
+                    "previous_weight",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="前回体重 (kg)",
+                    ),
+                ),
+                (
+                    "previous_height",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="前回身長 (cm)",
+                    ),
+                ),
+                (
+                    "previous_body_fat_percentage",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=1,
+                        max_digits=4,
+                        null=True,
+                        verbose_name="前回体脂肪率 %",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="measurement_snapshot",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "最新測定スナップショット",
+                "verbose_name_plural": "最新測定スナップショット",
+            },
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
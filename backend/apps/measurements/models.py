@@ -2,6 +2,7 @@
 Models for body measurements tracking
 """
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User
 
@@ -145,30 +146,85 @@ class BodyMeasurement(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.date} - {self.weight}kg"
     
+    @staticmethod
+    def annotate_previous(queryset):
+        """
+        Annotate each row with the previous measurement's values in the same query
+        
+        weight_change/body_fat_change use these annotations instead of a query per row.
+        The values are correlated subqueries over all of the user's measurements, so
+        the queryset can be filtered (e.g. by date) before or after annotating.
+        """
+        earlier = BodyMeasurement.objects.filter(
+            user_id=OuterRef('user_id'),
+            date__lt=OuterRef('date')
+        ).order_by('-date')
+        return queryset.annotate(
+            previous_weight=Subquery(earlier.values('weight')[:1]),
+            # Body fat compares against the latest earlier measurement that has one
+            previous_body_fat_percentage=Subquery(
+                earlier.filter(body_fat_percentage__isnull=False).values('body_fat_percentage')[:1]
+            ),
+        )
+    
+    @staticmethod
+    def calculate_bmi(weight, height_cm):
+        """Calculate BMI from weight (kg) and height (cm)"""
+        if not weight or not height_cm:
+            return None
+        height_m = float(height_cm) / 100  # Convert cm to m
+        return round(float(weight) / (height_m ** 2), 1)
+    
     @property
     def bmi(self):
         """Calculate BMI if height is available"""
         try:
             # Use measurement's height if available, otherwise fall back to profile height
             height_cm = self.height if self.height else (self.user.profile.height if hasattr(self.user, 'profile') else None)
-            if height_cm:
-                height_m = float(height_cm) / 100  # Convert cm to m
-                return round(float(self.weight) / (height_m ** 2), 1)
-            return None
+            return self.calculate_bmi(self.weight, height_cm)
         except:
             return None
     
+    def _previous_values(self):
+        """
+        (previous weight, previous body fat %) of a row read without annotate_previous
+        
+        Loaded once per instance and date: from the snapshot when it is already in
+        memory and this is the latest row, otherwise with one query for both values.
+        """
+        cached = self.__dict__.get('_previous_cache')
+        if cached is not None and cached[0] == self.date:
+            return cached[1]
+        
+        snapshot = None
+        if BodyMeasurement.user.is_cached(self) and User.measurement_snapshot.is_cached(self.user):
+            snapshot = MeasurementSnapshot.for_user(self.user)
+        if snapshot is not None and snapshot.latest_date == self.date:
+            values = (snapshot.previous_weight, snapshot.previous_body_fat_percentage)
+        else:
+            earlier = BodyMeasurement.objects.filter(
+                user_id=self.user_id,
+                date__lt=self.date
+            ).order_by('-date')
+            values = User.objects.filter(pk=self.user_id).values_list(
+                Subquery(earlier.values('weight')[:1]),
+                Subquery(earlier.filter(body_fat_percentage__isnull=False).values('body_fat_percentage')[:1]),
+            ).first() or (None, None)
+        
+        self.__dict__['_previous_cache'] = (self.date, values)
+        return values
+    
     @property
     def weight_change(self):
         """Calculate weight change from previous measurement"""
-        previous = BodyMeasurement.objects.filter(
-            user=self.user,
-            date__lt=self.date
-        ).order_by('-date').first()
+        if 'previous_weight' in self.__dict__:
+            previous_weight = self.previous_weight
+        else:
+            previous_weight = self._previous_values()[0]
         
-        if previous:
-            return round(float(self.weight) - float(previous.weight), 2)
-        return None
+        if previous_weight is None:
+            return None
+        return round(float(self.weight) - float(previous_weight), 2)
     
     @property
     def body_fat_change(self):
@@ -176,15 +232,102 @@ class BodyMeasurement(models.Model):
         if not self.body_fat_percentage:
             return None
         
-        previous = BodyMeasurement.objects.filter(
-            user=self.user,
-            date__lt=self.date,
+        if 'previous_body_fat_percentage' in self.__dict__:
+            previous_body_fat = self.previous_body_fat_percentage
+        else:
+            previous_body_fat = self._previous_values()[1]
+        
+        if not previous_body_fat:
+            return None
+        return round(float(self.body_fat_percentage) - float(previous_body_fat), 1)
+
+
+class MeasurementSnapshot(models.Model):
+    """
+    Latest and previous body measurement values per user
+    Kept up to date by measurement signals so readers avoid the latest-row query
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='measurement_snapshot')
+    
+    # Latest measurement
+    latest_date = models.DateField(verbose_name='最新測定日')
+    weight = models.DecimalField(max_digits=5, decimal_places=2, verbose_name='体重 (kg)')
+    height = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, verbose_name='身長 (cm)')
+    body_fat_percentage = models.DecimalField(
+        max_digits=4, decimal_places=1, null=True, blank=True, verbose_name='体脂肪率 %'
+    )
+    
+    # Previous measurement (body fat: latest earlier measurement that has one)
+    previous_date = models.DateField(null=True, blank=True, verbose_name='前回測定日')
+    previous_weight = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True, verbose_name='前回体重 (kg)'
+    )
+    previous_height = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True, verbose_name='前回身長 (cm)'
+    )
+    previous_body_fat_percentage = models.DecimalField(
+        max_digits=4, decimal_places=1, null=True, blank=True, verbose_name='前回体脂肪率 %'
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '最新測定スナップショット'
+        verbose_name_plural = '最新測定スナップショット'
+    
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.latest_date} - {self.weight}kg"
+    
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's snapshot (cached on the user instance) or None"""
+        try:
+            return user.measurement_snapshot
+        except cls.DoesNotExist:
+            return None
+    
+    @classmethod
+    def for_measurement(cls, measurement):
+        """Return the snapshot of a measurement's user without loading the user"""
+        if BodyMeasurement.user.is_cached(measurement):
+            return cls.for_user(measurement.user)
+        return cls.objects.filter(user_id=measurement.user_id).first()
+    
+    @classmethod
+    def refresh(cls, user_id):
+        """Rebuild the user's snapshot from stored measurements"""
+        latest_two = list(
+            BodyMeasurement.objects.filter(user_id=user_id).order_by('-date').values(
+                'date', 'weight', 'height', 'body_fat_percentage'
+            )[:2]
+        )
+        
+        if not latest_two:
+            cls.objects.filter(user_id=user_id).delete()
+            return None
+        
+        latest = latest_two[0]
+        previous = latest_two[1] if len(latest_two) > 1 else {}
+        previous_body_fat = BodyMeasurement.objects.filter(
+            user_id=user_id,
+            date__lt=latest['date'],
             body_fat_percentage__isnull=False
-        ).order_by('-date').first()
+        ).order_by('-date').values_list('body_fat_percentage', flat=True).first()
         
-        if previous and previous.body_fat_percentage:
-            return round(float(self.body_fat_percentage) - float(previous.body_fat_percentage), 1)
-        return None
+        snapshot, _ = cls.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                'latest_date': latest['date'],
+                'weight': latest['weight'],
+                'height': latest['height'],
+                'body_fat_percentage': latest['body_fat_percentage'],
+                'previous_date': previous.get('date'),
+                'previous_weight': previous.get('weight'),
+                'previous_height': previous.get('height'),
+                'previous_body_fat_percentage': previous_body_fat,
+            }
+        )
+        return snapshot
 
 
 class ProgressLog(models.Model):
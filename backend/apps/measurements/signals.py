@@ -0,0 +1,23 @@
+"""
+Signals for Measurements app
+Keep MeasurementSnapshot in sync with body measurements
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User
+from .models import BodyMeasurement, MeasurementSnapshot
+
+
+@receiver(post_save, sender=BodyMeasurement)
+def refresh_snapshot_on_save(sender, instance, **kwargs):
+    """Refresh the user's snapshot after a measurement is saved"""
+    MeasurementSnapshot.refresh(instance.user_id)
+
+
+@receiver(post_delete, sender=BodyMeasurement)
+def refresh_snapshot_on_delete(sender, instance, origin=None, **kwargs):
+    """Refresh the user's snapshot after a measurement is deleted"""
+    # A deleted user takes the snapshot with it
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    MeasurementSnapshot.refresh(instance.user_id)
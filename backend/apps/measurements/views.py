@@ -6,6 +6,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Avg
 from datetime import datetime, timedelta
+from apps.analytics.timeseries import lttb_indices, bucket_ranges, bucket_average
+from apps.core.conditional import ConditionalGetMixin, conditional_get
+from apps.core.pagination import DateCursorPagination
 from .models import BodyMeasurement, ProgressLog
 from .serializers import (
     BodyMeasurementSerializer,
@@ -18,12 +21,14 @@ from .serializers import (
 )
 
 
-class BodyMeasurementListCreateView(generics.ListCreateAPIView):
+class BodyMeasurementListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List all measurements or create a new one
     GET/POST /api/measurements/
     """
     permission_classes = [permissions.IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
+    pagination_class = DateCursorPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -31,18 +36,22 @@ class BodyMeasurementListCreateView(generics.ListCreateAPIView):
         return BodyMeasurementListSerializer
     
     def get_queryset(self):
-        return BodyMeasurement.objects.filter(user=self.request.user)
+        queryset = BodyMeasurement.objects.filter(user=self.request.user)
+        if self.request.method == 'GET':
+            queryset = BodyMeasurement.annotate_previous(queryset).select_related('user__profile')
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class BodyMeasurementDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BodyMeasurementDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a measurement
     GET/PUT/PATCH/DELETE /api/measurements/{id}/
     """
     permission_classes = [permissions.IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -53,12 +62,14 @@ class BodyMeasurementDetailView(generics.RetrieveUpdateDestroyAPIView):
         return BodyMeasurement.objects.filter(user=self.request.user)
 
 
-class ProgressLogListCreateView(generics.ListCreateAPIView):
+class ProgressLogListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List all progress logs or create a new one
     GET/POST /api/measurements/progress-logs/
     """
     permission_classes = [permissions.IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
+    pagination_class = DateCursorPagination
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -72,47 +83,169 @@ class ProgressLogListCreateView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class ProgressLogDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProgressLogDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a progress log
     GET/PUT/PATCH/DELETE /api/measurements/progress-logs/{id}/
     """
     serializer_class = ProgressLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_domains = ('measurements', 'profile')
     
     def get_queryset(self):
         return ProgressLog.objects.filter(user=self.request.user)
 
 
+# Numeric measurement columns the history endpoint can return
+HISTORY_METRICS = (
+    'weight', 'height', 'body_fat_percentage', 'muscle_mass',
+    'chest', 'waist', 'hips', 'neck', 'shoulders',
+    'arms_left', 'arms_right', 'thighs_left', 'thighs_right',
+    'calves_left', 'calves_right',
+)
+
+# Simplified names (as accepted on create) expand to both sides
+HISTORY_METRIC_ALIASES = {
+    'arms': ('arms_left', 'arms_right'),
+    'thighs': ('thighs_left', 'thighs_right'),
+    'calves': ('calves_left', 'calves_right'),
+}
+
+DOWNSAMPLE_METHODS = ('lttb', 'average')
+
+
+def _parse_history_metrics(value):
+    """Turn the comma separated `metrics` param into column names (bmi is derived)"""
+    metrics = []
+    for name in (part.strip() for part in value.split(',')):
+        if not name:
+            continue
+        columns = HISTORY_METRIC_ALIASES.get(name, (name,))
+        for column in columns:
+            if column not in HISTORY_METRICS and column != 'bmi':
+                raise ValueError(name)
+            if column not in metrics:
+                metrics.append(column)
+    return metrics
+
+
+def _downsample_history(dates, series, max_points, method):
+    """Reduce parallel history columns to at most max_points rows"""
+    if not max_points or len(dates) <= max_points:
+        return dates, series
+    
+    if method == 'average':
+        ranges = bucket_ranges(len(dates), max_points)
+        return (
+            [dates[start] for start, _ in ranges],
+            {name: bucket_average(values, ranges) for name, values in series.items()}
+        )
+    
+    # LTTB on the first column that has values; the same rows are kept for every column
+    primary = next((values for values in series.values() if any(v is not None for v in values)), None)
+    if primary is None:
+        indices = [start for start, _ in bucket_ranges(len(dates), max_points)]
+    else:
+        rows = [i for i, value in enumerate(primary) if value is not None]
+        kept = lttb_indices([dates[i].toordinal() for i in rows], [primary[i] for i in rows], max_points)
+        indices = [rows[i] for i in kept]
+    return (
+        [dates[i] for i in indices],
+        {name: [values[i] for i in indices] for name, values in series.items()}
+    )
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_get('measurements', 'profile')
 def measurement_history(request):
     """
     Get measurement history for charts
     GET /api/measurements/history/
-    Query params: days (default: 30)
+    Query params: days (default: 30),
+                  metrics (comma separated columns, e.g. weight,waist,arms,bmi),
+                  max_points (downsample to at most this many points),
+                  downsample (lttb or average, default: lttb)
     """
     days = int(request.query_params.get('days', 30))
     start_date = datetime.now().date() - timedelta(days=days)
     
-    measurements = BodyMeasurement.objects.filter(
+    metrics_param = request.query_params.get('metrics')
+    try:
+        metrics = _parse_history_metrics(metrics_param) if metrics_param else [
+            'weight', 'body_fat_percentage', 'bmi'
+        ]
+    except ValueError as e:
+        return Response(
+            {'error': f"Unknown metric '{e}'. Available: {', '.join(HISTORY_METRICS + tuple(HISTORY_METRIC_ALIASES) + ('bmi',))}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        max_points = int(request.query_params.get('max_points', 0))
+    except ValueError:
+        max_points = 0
+    max_points = max(max_points, 3) if max_points else 0
+    method = request.query_params.get('downsample', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        return Response(
+            {'error': f"Invalid downsample method. Use one of: {', '.join(DOWNSAMPLE_METHODS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Fetch plain columns instead of model instances
+    columns = [m for m in metrics if m != 'bmi']
+    if 'bmi' in metrics:
+        columns += [c for c in ('weight', 'height') if c not in columns]
+    rows = BodyMeasurement.objects.filter(
         user=request.user,
         date__gte=start_date
-    ).order_by('date')
+    ).order_by('date').values_list('date', *columns)
     
-    data = {
-        'dates': [m.date for m in measurements],
-        'weights': [m.weight for m in measurements],
-        'body_fat_percentages': [m.body_fat_percentage for m in measurements],
-        'bmis': [m.bmi for m in measurements],
-    }
+    dates = []
+    raw = {column: [] for column in columns}
+    for row in rows:
+        dates.append(row[0])
+        for column, value in zip(columns, row[1:]):
+            raw[column].append(None if value is None else float(value))
     
-    serializer = MeasurementHistorySerializer(data)
-    return Response(serializer.data)
+    series = {}
+    for metric in metrics:
+        if metric == 'bmi':
+            # Measurement height, falling back to the profile height (like BodyMeasurement.bmi)
+            profile = getattr(request.user, 'profile', None)
+            profile_height = profile.height if profile else None
+            series['bmi'] = [
+                BodyMeasurement.calculate_bmi(weight, height or profile_height)
+                for weight, height in zip(raw['weight'], raw['height'])
+            ]
+        else:
+            series[metric] = raw[metric]
+    
+    total_points = len(dates)
+    dates, series = _downsample_history(dates, series, max_points, method)
+    
+    if not metrics_param:
+        # Original chart format
+        serializer = MeasurementHistorySerializer({
+            'dates': dates,
+            'weights': series['weight'],
+            'body_fat_percentages': series['body_fat_percentage'],
+            'bmis': series['bmi'],
+        })
+        return Response(serializer.data)
+    
+    return Response({
+        'dates': dates,
+        'metrics': series,
+        'total_points': total_points,
+        'returned_points': len(dates),
+    })
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_get('measurements', 'profile')
 def progress_summary(request):
     """
     Get progress summary statistics
@@ -169,6 +302,7 @@ def progress_summary(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_get('measurements', 'profile')
 def latest_measurement(request):
     """
     Get the latest body measurement
@@ -189,6 +323,7 @@ def latest_measurement(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_get('measurements', 'profile')
 def measurement_comparison(request):
     """
     Compare current measurements with starting measurements
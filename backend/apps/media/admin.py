@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import MediaUpload
+
+
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    """Admin configuration for MediaUpload model"""
+    list_display = ['original_name', 'content_type', 'object_id', 'field_name', 'status', 'size', 'created_at']
+    list_filter = ['status', 'content_type']
+    search_fields = ['original_name', 'stored_name']
+    raw_id_fields = ['user']
+    readonly_fields = ['staged_path', 'stored_name', 'error', 'created_at', 'completed_at']
@@ -0,0 +1,42 @@
+"""
+Django管理コマンド: 既存画像のバリアント生成
+
+登録済みの画像フィールド (食品・食事・レシピ・エクササイズ・プロフィール画像など) の
+thumb / card / full バリアントを作成する。最新のバリアントがある画像はスキップ。
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.media.signals import IMAGE_FIELDS
+from apps.media.variants import MediaVariantGenerator
+
+
+class Command(BaseCommand):
+    help = '既存の画像から thumb / card / full バリアントを生成'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models', nargs='+',
+            help='対象モデル名 (例: Food Exercise; 省略時は全て)'
+        )
+
+    def handle(self, *args, **options):
+        selected = {name.lower() for name in options['models'] or []}
+        started = time.monotonic()
+        created = failed = 0
+
+        for model, field_names in IMAGE_FIELDS.items():
+            if selected and model.__name__.lower() not in selected:
+                continue
+            for field_name in field_names:
+                queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                for instance in queryset.iterator(chunk_size=500):
+                    try:
+                        created += MediaVariantGenerator.generate(instance, field_name)
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{model.__name__} #{instance.pk}: {e}')
+                self.stdout.write(f'{model.__name__}.{field_name}: 完了')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ バリアント {created}件を生成 (失敗 {failed}) {time.monotonic() - started:.1f}秒'
+        ))
@@ -0,0 +1,26 @@
+"""
+Django管理コマンド: 中断したメディアアップロードの再開
+
+プロセスの再起動などで処理されずに残った待機中のアップロードを、
+一時ファイルが残っていれば再度ストレージへ送信する。
+Webサービスの起動時 (Procfile / render.yaml) に --older-than 0 で実行される。
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.media.uploads import MediaUploadPipeline
+
+
+class Command(BaseCommand):
+    help = '待機中のまま残ったメディアアップロードを再開'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=5 * 60,
+            help='この秒数より前に作成された待機中のアップロードのみ対象 (起動時は0: 処理中のプロセスがない)'
+        )
+
+    def handle(self, *args, **options):
+        count = MediaUploadPipeline.resume(timedelta(seconds=options['older_than']))
+        # Wait for the pool before the command exits
+        MediaUploadPipeline.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'✅ {count}件のアップロードを再開しました'))
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaUpload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("field_name", models.CharField(max_length=100, verbose_name="フィールド")),
+                (
+                    "replace_existing",
+                    models.BooleanField(default=False, verbose_name="既存ファイルを置換"),
+                ),
+                (
+                    "original_name",
+                    models.CharField(max_length=255, verbose_name="元のファイル名"),
+                ),
+                (
+                    "staged_path",
+                    models.CharField(max_length=500, verbose_name="一時ファイル"),
+                ),
+                ("size", models.PositiveBigIntegerField(default=0, verbose_name="サイズ")),
+                (
+                    "stored_name",
+                    models.CharField(blank=True, max_length=500, verbose_name="保存先"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "アップロード中"),
+                            ("ready", "完了"),
+                            ("failed", "失敗"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="状態",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="エラー")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "completed_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="完了日時"),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="media_uploads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "メディアアップロード",
+                "verbose_name_plural": "メディアアップロード",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["content_type", "object_id", "field_name"],
+                        name="media_media_content_a578eb_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="media_media_status_07ac25_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("media", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaVariant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("field_name", models.CharField(max_length=100, verbose_name="フィールド")),
+                (
+                    "variant",
+                    models.CharField(
+                        choices=[("thumb", "サムネイル"), ("card", "カード"), ("full", "フル")],
+                        max_length=10,
+                        verbose_name="種類",
+                    ),
+                ),
+                ("source_name", models.CharField(max_length=500, verbose_name="元ファイル")),
+                ("name", models.CharField(max_length=500, verbose_name="ファイル")),
+                ("width", models.PositiveIntegerField(verbose_name="幅")),
+                ("height", models.PositiveIntegerField(verbose_name="高さ")),
+                ("size", models.PositiveIntegerField(verbose_name="サイズ")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "メディアバリアント",
+                "verbose_name_plural": "メディアバリアント",
+                "unique_together": {
+                    ("content_type", "object_id", "field_name", "variant")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.db import models
+from apps.users.models import User
+
+
+class MediaUpload(models.Model):
+    """
+    A file staged locally and pushed to storage in the background (see uploads.py)
+    Points at the model field that receives the stored file name
+    """
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'アップロード中'),
+        (READY, '完了'),
+        (FAILED, '失敗'),
+    ]
+    
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='media_uploads'
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=100, verbose_name='フィールド')
+    # Delete the file the field held before (e.g. the previous profile picture)
+    replace_existing = models.BooleanField(default=False, verbose_name='既存ファイルを置換')
+    
+    original_name = models.CharField(max_length=255, verbose_name='元のファイル名')
+    staged_path = models.CharField(max_length=500, verbose_name='一時ファイル')
+    size = models.PositiveBigIntegerField(default=0, verbose_name='サイズ')
+    stored_name = models.CharField(max_length=500, blank=True, verbose_name='保存先')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, verbose_name='状態')
+    error = models.TextField(blank=True, verbose_name='エラー')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name='完了日時')
+    
+    class Meta:
+        verbose_name = 'メディアアップロード'
+        verbose_name_plural = 'メディアアップロード'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'field_name']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.original_name} ({self.get_status_display()})"
+
+
+class MediaVariant(models.Model):
+    """
+    Resized copy of an image field (thumb / card / full), see variants.py
+    Only used while `source_name` still matches the field's current file
+    """
+    VARIANT_CHOICES = [
+        ('thumb', 'サムネイル'),
+        ('card', 'カード'),
+        ('full', 'フル'),
+    ]
+    
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=100, verbose_name='フィールド')
+    variant = models.CharField(max_length=10, choices=VARIANT_CHOICES, verbose_name='種類')
+    source_name = models.CharField(max_length=500, verbose_name='元ファイル')
+    name = models.CharField(max_length=500, verbose_name='ファイル')
+    width = models.PositiveIntegerField(verbose_name='幅')
+    height = models.PositiveIntegerField(verbose_name='高さ')
+    size = models.PositiveIntegerField(verbose_name='サイズ')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'メディアバリアント'
+        verbose_name_plural = 'メディアバリアント'
+        unique_together = ['content_type', 'object_id', 'field_name', 'variant']
+    
+    def __str__(self):
+        return f"{self.source_name} ({self.variant} {self.width}x{self.height})"
+    
+    @property
+    def url(self):
+        return default_storage.url(self.name)
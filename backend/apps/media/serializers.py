@@ -0,0 +1,78 @@
+from rest_framework import serializers
+from .models import MediaUpload
+from .uploads import is_external
+from .variants import VARIANTS
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Serializer for MediaUpload model (status polling)"""
+    
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'field_name', 'object_id', 'original_name', 'size',
+            'status', 'error', 'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs of an image field's variants: {'thumb', 'card', 'full', 'original'}
+    Variants that do not exist yet (or non-image files) fall back to the original
+    Reads obj.media_variants, so list views should prefetch it
+    """
+    
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if request and not is_external(url):
+            return request.build_absolute_uri(url)
+        return url
+    
+    def variant_urls(self, obj):
+        source = getattr(obj, self.image_field)
+        if not source:
+            return None
+        
+        original = self._absolute(source.name if is_external(source.name) else source.url)
+        urls = {name: original for name in VARIANTS}
+        urls['original'] = original
+        for variant in obj.media_variants.all():
+            # Variants of a replaced file are ignored until rebuilt
+            if variant.field_name == self.image_field and variant.source_name == source.name:
+                urls[variant.variant] = self._absolute(variant.url)
+        return urls
+    
+    def to_representation(self, obj):
+        return self.variant_urls(obj)
+
+
+class ImageSourceField(ImageVariantsField):
+    """
+    URL of the variant that suits where the object is shown
+    full on detail responses, card in lists, thumb when nested in another
+    object; ?image_variant=<name> overrides
+    """
+    
+    def context_variant(self):
+        request = self.context.get('request')
+        requested = request.query_params.get('image_variant') if request else None
+        if requested in VARIANTS or requested == 'original':
+            return requested
+        
+        serializer = self.parent
+        if serializer is self.root:
+            return 'full'
+        if serializer.parent is self.root and isinstance(self.root, serializers.ListSerializer):
+            return 'card'
+        return 'thumb'
+    
+    def to_representation(self, obj):
+        urls = self.variant_urls(obj)
+        return urls and urls[self.context_variant()]
@@ -0,0 +1,58 @@
+"""
+Signals for Media app
+Build image variants when an image field receives a new file
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.core.files.storage import default_storage
+from apps.nutrition.models import Food, Meal, Recipe
+from apps.users.models import User
+from apps.workouts.models import Exercise, ExerciseMedia
+from .models import MediaVariant
+from .uploads import MediaUploadPipeline, media_stored
+from .variants import MediaVariantGenerator
+
+# Image fields that get thumb / card / full variants
+IMAGE_FIELDS = {
+    Food: ['image'],
+    Meal: ['image'],
+    Recipe: ['image'],
+    Exercise: ['image'],
+    ExerciseMedia: ['file'],
+    User: ['profile_picture'],
+}
+
+
+def remember_new_files(sender, instance, **kwargs):
+    """Note which image fields hold a file that this save will store"""
+    instance._new_media_fields = [
+        field_name for field_name in IMAGE_FIELDS[sender]
+        if getattr(instance, field_name) and not getattr(instance, field_name)._committed
+    ]
+
+
+def schedule_variants(sender, instance, **kwargs):
+    """Build variants of newly stored files off the request path"""
+    for field_name in getattr(instance, '_new_media_fields', ()):
+        MediaVariantGenerator.schedule(instance, field_name)
+    instance._new_media_fields = []
+
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(remember_new_files, sender=model, dispatch_uid=f'media_variants_pre_{model.__name__}')
+    post_save.connect(schedule_variants, sender=model, dispatch_uid=f'media_variants_post_{model.__name__}')
+
+
+@receiver(media_stored)
+def build_variants_for_upload(sender, instance, field_name, path, **kwargs):
+    """Variants of background uploads are built from the staged copy"""
+    if field_name in IMAGE_FIELDS.get(sender, ()):
+        MediaVariantGenerator.generate(instance, field_name, source_path=path)
+
+
+@receiver(post_delete, sender=MediaVariant)
+def delete_variant_file(sender, instance, **kwargs):
+    """Remove the variant file with its row (also on cascades from the source object)"""
+    name = instance.name
+    transaction.on_commit(lambda: MediaUploadPipeline.delete_later(default_storage, name))
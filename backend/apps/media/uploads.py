@@ -0,0 +1,227 @@
+"""
+Background media upload pipeline
+
+Request handlers only copy the uploaded file to a local staging directory and
+record a pending MediaUpload. A bounded thread pool then pushes the staged
+file to the field's storage (Cloudinary in production, the file system with
+USE_LOCAL_MEDIA_STORAGE) and writes the stored name into the target field.
+Replaced and deleted files are removed from storage on the same pool.
+
+MEDIA_UPLOAD_WORKERS = 0 processes uploads inline (useful in tests).
+
+The pool lives in the web process, so a restart drops its queue and leaves
+the rows pending. The web start command (Procfile / render.yaml) runs
+`manage.py resume_media_uploads --older-than 0` before gunicorn to finish
+them. Uploads are not handed to the job queue: the staged files are on the
+web instance's disk, which the worker service cannot read.
+"""
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
+from django.db import connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import MediaUpload
+
+logger = logging.getLogger(__name__)
+
+# Sent from the pool after a file was stored on its target (instance, field_name, path)
+media_stored = Signal()
+
+
+def is_external(name):
+    """Whether a file field holds an external URL instead of a stored name"""
+    return str(name).startswith(('http://', 'https://'))
+
+
+class MediaUploadPipeline:
+    """Stage uploads locally and store them on a bounded thread pool"""
+
+    _lock = threading.Lock()
+    _executor = None
+    _slots = None
+
+    @staticmethod
+    def _staging_root():
+        return str(getattr(settings, 'MEDIA_STAGING_ROOT', settings.BASE_DIR / 'media_staging'))
+
+    @staticmethod
+    def _workers():
+        return getattr(settings, 'MEDIA_UPLOAD_WORKERS', 4)
+
+    @classmethod
+    def submit(cls, func, *args):
+        """Run on the pool; blocks when MEDIA_UPLOAD_QUEUE_SIZE tasks are waiting"""
+        # Inline when disabled, or already on a pool thread (waiting for a slot there could deadlock)
+        if not cls._workers() or threading.current_thread().name.startswith('media-upload'):
+            func(*args)
+            return
+
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(cls._workers(), thread_name_prefix='media-upload')
+                cls._slots = threading.BoundedSemaphore(getattr(settings, 'MEDIA_UPLOAD_QUEUE_SIZE', 32))
+
+        def run():
+            try:
+                func(*args)
+            except Exception:
+                logger.exception('Media task failed')
+            finally:
+                # Pool threads keep their own connections; do not leak them
+                connections.close_all()
+                cls._slots.release()
+
+        cls._slots.acquire()
+        cls._executor.submit(run)
+
+    @classmethod
+    def on_commit(cls, func, *args):
+        """Submit once the current transaction commits (rows must be visible to the pool)"""
+        transaction.on_commit(lambda: cls.submit(func, *args))
+
+    @classmethod
+    def shutdown(cls):
+        """Wait for queued uploads and deletions to finish"""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @classmethod
+    def stage(cls, uploaded_file, target, field_name, user=None, replace_existing=False):
+        """
+        Copy an uploaded file to the staging directory and queue it
+
+        Args:
+            uploaded_file: UploadedFile from request.FILES
+            target: saved model instance that receives the file
+            field_name: FileField / ImageField on the target
+            user: uploader (may read the upload status)
+            replace_existing: delete the field's previous file once stored
+
+        Returns:
+            pending MediaUpload
+        """
+        os.makedirs(cls._staging_root(), exist_ok=True)
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        staged_path = os.path.join(cls._staging_root(), f'{uuid.uuid4().hex}{extension}')
+        with open(staged_path, 'wb') as f:
+            for chunk in uploaded_file.chunks():
+                f.write(chunk)
+
+        upload = MediaUpload.objects.create(
+            user=user,
+            content_type=ContentType.objects.get_for_model(target),
+            object_id=target.pk,
+            field_name=field_name,
+            replace_existing=replace_existing,
+            original_name=os.path.basename(uploaded_file.name)[:255],
+            staged_path=staged_path,
+            size=uploaded_file.size or 0,
+        )
+        cls.on_commit(cls.process, upload.pk)
+        return upload
+
+    @classmethod
+    def process(cls, upload_id):
+        """Push one staged file to storage and point the target field at it"""
+        upload = MediaUpload.objects.select_related('content_type').filter(
+            pk=upload_id, status=MediaUpload.PENDING
+        ).first()
+        if upload is None:
+            return
+
+        model = upload.content_type.model_class()
+        field = model._meta.get_field(upload.field_name)
+        target = model.objects.filter(pk=upload.object_id).first()
+        try:
+            if target is None:
+                raise LookupError('Upload target was deleted')
+            with open(upload.staged_path, 'rb') as f:
+                stored_name = field.storage.save(
+                    field.generate_filename(target, upload.original_name),
+                    File(f, name=upload.original_name)
+                )
+            cls._apply(upload, model, field, target, stored_name)
+        except Exception as e:
+            logger.warning(f"Media upload {upload.pk} failed: {e}")
+            upload.status = MediaUpload.FAILED
+            upload.error = str(e)
+            # Let the target clean up, e.g. drop a placeholder row
+            if target is not None and hasattr(target, 'media_upload_failed'):
+                target.media_upload_failed(upload.field_name)
+        else:
+            upload.status = MediaUpload.READY
+            upload.stored_name = stored_name
+            # Derived files (e.g. image variants) are built from the local copy
+            for receiver, response in media_stored.send_robust(
+                sender=model, instance=target, field_name=upload.field_name, path=upload.staged_path
+            ):
+                if isinstance(response, Exception):
+                    logger.warning(f"media_stored receiver {receiver} failed: {response}")
+        finally:
+            if os.path.exists(upload.staged_path):
+                os.remove(upload.staged_path)
+            upload.completed_at = timezone.now()
+            upload.save(update_fields=['status', 'stored_name', 'error', 'completed_at'])
+
+    @classmethod
+    def _apply(cls, upload, model, field, target, stored_name):
+        """Write the stored name to the target unless a newer upload already landed"""
+        rows = model.objects.filter(pk=upload.object_id)
+        while True:
+            newer = MediaUpload.objects.filter(
+                content_type=upload.content_type,
+                object_id=upload.object_id,
+                field_name=upload.field_name,
+                status=MediaUpload.READY,
+                pk__gt=upload.pk,
+            ).exists()
+            current = list(rows.values_list(field.attname, flat=True))
+            if newer or not current:
+                cls.delete_later(field.storage, stored_name)
+                raise LookupError('Superseded by a newer upload' if newer else 'Upload target was deleted')
+
+            # Compare-and-set (no lock upgrade, so SQLite waits instead of failing);
+            # a concurrent change of the field matches nothing and is re-read
+            previous = current[0]
+            if rows.filter(**{field.attname: previous}).update(**{field.attname: stored_name}):
+                break
+
+        setattr(target, field.attname, stored_name)
+        if upload.replace_existing and previous and previous != stored_name:
+            cls.delete_later(field.storage, previous)
+
+    @classmethod
+    def delete_later(cls, storage, name):
+        """Remove a stored file in the background (external URLs are left alone)"""
+        if not name or is_external(name):
+            return
+
+        def delete():
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.warning(f"Failed to delete file {name}: {e}")
+
+        cls.submit(delete)
+
+    @classmethod
+    def resume(cls, older_than=None):
+        """Queue pending uploads left behind by a stopped process; returns the count"""
+        pending = MediaUpload.objects.filter(status=MediaUpload.PENDING)
+        if older_than is not None:
+            pending = pending.filter(created_at__lt=timezone.now() - older_than)
+
+        count = 0
+        for upload in pending.only('id', 'staged_path'):
+            if os.path.exists(upload.staged_path):
+                cls.submit(cls.process, upload.pk)
+                count += 1
+        return count
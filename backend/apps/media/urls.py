@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import MediaUploadDetailView
+
+urlpatterns = [
+    path('uploads/<int:pk>/', MediaUploadDetailView.as_view(), name='media-upload-detail'),
+]
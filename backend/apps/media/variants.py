@@ -0,0 +1,142 @@
+"""
+Resized image variants
+
+Every registered image field gets three bounded-size copies: thumb (lists of
+nested objects), card (list screens) and full (detail screens). They are
+encoded as WebP (JPEG when Pillow lacks WebP) on the upload pool, so requests
+never resize images. Serializers pick a variant with ImageSourceField and fall
+back to the original until the variants exist.
+"""
+import posixpath
+from io import BytesIO
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from .models import MediaVariant
+from .uploads import MediaUploadPipeline, is_external
+
+# Sent after the variants of a field were (re)built (instance, field_name)
+variants_generated = Signal()
+
+# Longest side in pixels, largest first (each variant is resized from the previous one)
+VARIANTS = {
+    'full': 1600,
+    'card': 480,
+    'thumb': 160,
+}
+
+
+class MediaVariantGenerator:
+    """Create and replace the variants of one image field"""
+
+    @staticmethod
+    def _format():
+        if getattr(settings, 'MEDIA_VARIANT_FORMAT', 'WEBP') == 'WEBP' and features.check('webp'):
+            return 'WEBP', 'webp'
+        return 'JPEG', 'jpg'
+
+    @staticmethod
+    def _prepare(image, image_format):
+        """Apply EXIF rotation and convert to a mode the format can store"""
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        if image_format == 'WEBP' and has_alpha:
+            return image.convert('RGBA')
+        if has_alpha:
+            # JPEG has no alpha: flatten onto white
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+            return background
+        return image.convert('RGB')
+
+    @classmethod
+    def generate(cls, instance, field_name, source_path=None):
+        """
+        Build the variants of instance.<field_name>
+
+        Args:
+            instance: saved model instance
+            field_name: ImageField / FileField holding the source
+            source_path: local copy of the source (skips a storage download)
+
+        Returns:
+            number of variants written (0 when up to date or not an image)
+        """
+        source = getattr(instance, field_name)
+        if not source or is_external(source.name):
+            return 0
+
+        content_type = ContentType.objects.get_for_model(instance)
+        existing = {
+            variant.variant: variant
+            for variant in MediaVariant.objects.filter(
+                content_type=content_type, object_id=instance.pk, field_name=field_name
+            )
+        }
+        if set(existing) == set(VARIANTS) and all(v.source_name == source.name for v in existing.values()):
+            return 0
+
+        try:
+            with (open(source_path, 'rb') if source_path else source.storage.open(source.name, 'rb')) as f:
+                image = Image.open(f)
+                # JPEG sources decode at a reduced scale when much larger than needed
+                image.draft('RGB', (max(VARIANTS.values()),) * 2)
+                image.load()
+        except (UnidentifiedImageError, OSError):
+            # Videos and other non-image files have no variants
+            return 0
+
+        image_format, extension = cls._format()
+        image = cls._prepare(image, image_format)
+        directory, filename = posixpath.split(source.name)
+        stem = posixpath.splitext(filename)[0]
+
+        variants = []
+        for variant, bound in VARIANTS.items():
+            image.thumbnail((bound, bound), Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, image_format, quality=getattr(settings, 'MEDIA_VARIANT_QUALITY', 80))
+            name = default_storage.save(
+                posixpath.join(directory, 'variants', f'{stem}_{variant}.{extension}'),
+                ContentFile(buffer.getvalue())
+            )
+            variants.append(MediaVariant(
+                content_type=content_type,
+                object_id=instance.pk,
+                field_name=field_name,
+                variant=variant,
+                source_name=source.name,
+                name=name,
+                width=image.width,
+                height=image.height,
+                size=buffer.tell(),
+            ))
+
+        MediaVariant.objects.bulk_create(
+            variants,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id', 'field_name', 'variant'],
+            update_fields=['source_name', 'name', 'width', 'height', 'size', 'updated_at'],
+        )
+        # Files of the replaced source
+        for old in existing.values():
+            MediaUploadPipeline.delete_later(default_storage, old.name)
+        variants_generated.send(sender=type(instance), instance=instance, field_name=field_name)
+        return len(variants)
+
+    @classmethod
+    def generate_for(cls, content_type_id, object_id, field_name):
+        """Pool entry point: reload the instance and build its variants"""
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        instance = model.objects.filter(pk=object_id).first()
+        if instance is not None:
+            cls.generate(instance, field_name)
+
+    @classmethod
+    def schedule(cls, instance, field_name):
+        """Build variants on the upload pool once the current transaction commits"""
+        content_type_id = ContentType.objects.get_for_model(instance).pk
+        MediaUploadPipeline.on_commit(cls.generate_for, content_type_id, instance.pk, field_name)
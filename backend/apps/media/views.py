@@ -0,0 +1,16 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from .models import MediaUpload
+from .serializers import MediaUploadSerializer
+
+
+class MediaUploadDetailView(generics.RetrieveAPIView):
+    """
+    Status of a background upload
+    GET /api/media/uploads/<id>/
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = MediaUploadSerializer
+    
+    def get_queryset(self):
+        return MediaUpload.objects.filter(user=self.request.user)
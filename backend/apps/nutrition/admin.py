@@ -3,7 +3,7 @@ Admin configuration for Nutrition app
 """
 from django.contrib import admin
 from .models import (
-    Food, Meal, MealItem, MealPlan,
+    Food, Meal, MealItem, MealPlan, DailyNutritionTotals, FrequentFood,
     FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
 )
 
@@ -85,6 +85,24 @@ class MealItemAdmin(admin.ModelAdmin):
     readonly_fields = ['calories', 'protein', 'carbohydrates', 'fats', 'created_at']
 
 
+@admin.register(DailyNutritionTotals)
+class DailyNutritionTotalsAdmin(admin.ModelAdmin):
+    """Admin configuration for DailyNutritionTotals model"""
+    list_display = ['user', 'date', 'calories', 'protein', 'carbs', 'fats', 'meals_count']
+    list_filter = ['date']
+    search_fields = ['user__email', 'user__username']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'date'
+
+
+@admin.register(FrequentFood)
+class FrequentFoodAdmin(admin.ModelAdmin):
+    """Admin configuration for FrequentFood model"""
+    list_display = ['user', 'food', 'use_count', 'last_used_at', 'rank']
+    search_fields = ['user__email', 'food__name']
+    raw_id_fields = ['user', 'food']
+
+
 @admin.register(MealPlan)
 class MealPlanAdmin(admin.ModelAdmin):
     """Admin configuration for MealPlan model"""
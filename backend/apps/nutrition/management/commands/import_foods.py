@@ -0,0 +1,246 @@
+"""
+Django管理コマンド: 食品データベースの一括インポート
+
+CSV / JSONL をチャンク単位でストリーミングし、(name, brand) で重複排除して
+bulk_create / bulk_update で登録する。チェックポイントから再開可能。
+"""
+import csv
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from apps.nutrition.models import Food
+from apps.nutrition.search import LocalFoodIndex
+
+# Column name aliases used by common nutrient databases
+FIELD_ALIASES = {
+    'food_name': 'name',
+    'kcal': 'calories',
+    'energy': 'calories',
+    'energy_kcal': 'calories',
+    'carbs': 'carbohydrates',
+    'carbohydrate': 'carbohydrates',
+    'fat': 'fats',
+    'total_fat': 'fats',
+    'sugars': 'sugar',
+}
+
+REQUIRED_FIELDS = ('name', 'calories', 'protein', 'carbohydrates', 'fats')
+DECIMAL_FIELDS = (
+    'serving_size', 'calories', 'protein', 'carbohydrates', 'fats', 'fiber', 'sugar',
+    'sodium', 'vitamin_a', 'vitamin_c', 'calcium', 'iron',
+)
+TEXT_FIELDS = ('name', 'brand', 'category', 'unit', 'description')
+IMPORT_FIELDS = TEXT_FIELDS + DECIMAL_FIELDS
+CATEGORIES = {key for key, _ in Food.CATEGORY_CHOICES}
+
+# Largest value each decimal column can store
+DECIMAL_LIMITS = {
+    field: Decimal(10) ** (Food._meta.get_field(field).max_digits - Food._meta.get_field(field).decimal_places)
+    for field in DECIMAL_FIELDS
+}
+
+
+class Command(BaseCommand):
+    help = '食品データ (CSV / JSONL) をチャンク単位で一括インポート'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV または JSONL ファイルのパス')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='ファイル形式 (省略時は拡張子から判定)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='1トランザクションあたりの行数')
+        parser.add_argument(
+            '--checkpoint',
+            help='チェックポイントファイル (省略時は <path>.checkpoint.json)'
+        )
+        parser.add_argument('--resume', action='store_true', help='チェックポイントから再開')
+        parser.add_argument('--skip-existing', action='store_true', help='既存の食品を更新しない')
+        parser.add_argument('--default-category', default='other', help='カテゴリーが不明な場合の値')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'ファイルが見つかりません: {path}')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size は1以上を指定してください')
+        if options['default_category'] not in CATEGORIES:
+            raise CommandError(f"--default-category は次のいずれか: {', '.join(sorted(CATEGORIES))}")
+
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint.json'
+        self.default_category = options['default_category']
+        self.update_existing = not options['skip_existing']
+
+        state = {
+            'path': os.path.abspath(path),
+            'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0,
+        }
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('path') != state['path']:
+                raise CommandError(f"チェックポイントは別のファイルのものです: {saved.get('path')}")
+            state.update(saved)
+            self.stdout.write(f"チェックポイントから再開: {state['rows']}行目以降")
+
+        started = time.monotonic()
+        resumed_rows = state['rows']
+
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = self._read_rows(f, file_format)
+            # Rows before the checkpoint were committed by a previous run
+            rows = islice(rows, state['rows'], None)
+
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+
+                created, updated, unchanged, skipped = self._import_chunk(chunk)
+                state['rows'] += len(chunk)
+                state['created'] += created
+                state['updated'] += updated
+                state['unchanged'] += unchanged
+                state['skipped'] += skipped
+                self._save_checkpoint(checkpoint_path, state)
+
+                elapsed = time.monotonic() - started
+                rate = (state['rows'] - resumed_rows) / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"{state['rows']}行処理 (新規 {state['created']} / 更新 {state['updated']} / "
+                    f"変更なし {state['unchanged']} / スキップ {state['skipped']}) {rate:,.0f}行/秒"
+                )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ インポート完了: {state['rows']}行 (新規 {state['created']} / 更新 {state['updated']} / "
+            f"変更なし {state['unchanged']} / スキップ {state['skipped']}) {elapsed:.1f}秒"
+        ))
+
+    def _read_rows(self, f, file_format):
+        """Yield one dict per source row (line numbers stay aligned for resuming)"""
+        if file_format == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+            return
+
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                yield None
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                self.stderr.write(f'{line_number}行目: JSONとして読み込めません')
+                yield None
+
+    def _clean_row(self, row):
+        """Map a source row onto Food fields, or return None if it is unusable"""
+        if not row:
+            return None
+
+        data = {}
+        for key, value in row.items():
+            if key is None:
+                continue
+            field = key.strip().lower()
+            field = FIELD_ALIASES.get(field, field)
+            if field in IMPORT_FIELDS and field not in data:
+                data[field] = value.strip() if isinstance(value, str) else value
+
+        if any(data.get(field) in (None, '') for field in REQUIRED_FIELDS):
+            return None
+
+        for field in DECIMAL_FIELDS:
+            value = data.get(field)
+            if value in (None, ''):
+                data.pop(field, None)
+                continue
+            try:
+                data[field] = Decimal(str(value)).quantize(Decimal('0.1'))
+            except InvalidOperation:
+                return None
+            # nan (CSV text or JSON NaN) survives quantize but cannot be compared
+            if not data[field].is_finite() or data[field] < 0 or data[field] >= DECIMAL_LIMITS[field]:
+                return None
+
+        # Nutrition per serving divides by the serving size
+        if data.get('serving_size', 1) <= 0:
+            return None
+
+        data['name'] = str(data['name'])[:200]
+        data['brand'] = str(data.get('brand') or '')[:100]
+        if 'unit' in data:
+            data['unit'] = str(data['unit'])[:20] or 'g'
+        category = str(data.get('category') or '').lower()
+        data['category'] = category if category in CATEGORIES else self.default_category
+        return data
+
+    @transaction.atomic
+    def _import_chunk(self, chunk):
+        """Upsert one chunk; returns (created, updated, unchanged, skipped)"""
+        # Dedupe inside the chunk (last row wins)
+        cleaned = {}
+        skipped = 0
+        for row in chunk:
+            data = self._clean_row(row)
+            if data is None:
+                skipped += 1
+                continue
+            cleaned[(data['name'], data['brand'])] = data
+        if not cleaned:
+            return 0, 0, 0, skipped
+
+        existing = {}
+        for food in Food.objects.filter(
+            is_custom=False,
+            name__in={name for name, _ in cleaned}
+        ).order_by('id'):
+            existing.setdefault((food.name, food.brand), food)
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        update_fields = {'updated_at'}
+        for key, data in cleaned.items():
+            food = existing.get(key)
+            if food is None:
+                to_create.append(Food(**data))
+                continue
+            if not self.update_existing:
+                continue
+            # Only rows whose values changed are written (re-imports stay cheap)
+            changed = [field for field, value in data.items() if getattr(food, field) != value]
+            if changed:
+                for field in changed:
+                    setattr(food, field, data[field])
+                food.updated_at = now
+                update_fields.update(changed)
+                to_update.append(food)
+
+        Food.objects.bulk_create(to_create, batch_size=1000)
+        if to_update:
+            update_fields -= {'name', 'brand'}
+            Food.objects.bulk_update(to_update, sorted(update_fields), batch_size=1000)
+        if to_create or to_update:
+            # bulk_create / bulk_update skip the Food signals
+            LocalFoodIndex.bump_version()
+        unchanged = len(cleaned) - len(to_create) - len(to_update)
+        return len(to_create), len(to_update), unchanged, skipped
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_path, state):
+        """Atomically write the progress after a committed chunk"""
+        temp_path = f'{checkpoint_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, checkpoint_path)
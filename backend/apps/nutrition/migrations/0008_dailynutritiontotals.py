@@ -0,0 +1,115 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_daily_totals(apps, schema_editor):
+    """Populate DailyNutritionTotals from existing meals"""
+    Meal = apps.get_model("nutrition", "Meal")
+    MealItem = apps.get_model("nutrition", "MealItem")
+    DailyNutritionTotals = apps.get_model("nutrition", "DailyNutritionTotals")
+
+    totals = {}
+    for row in Meal.objects.values("user_id", "date").annotate(
+        meals_count=models.Count("id")
+    ):
+        totals[(row["user_id"], row["date"])] = DailyNutritionTotals(
+            user_id=row["user_id"], date=row["date"], meals_count=row["meals_count"]
+        )
+
+    for row in MealItem.objects.values("meal__user_id", "meal__date").annotate(
+        calories=models.Sum("calories"),
+        protein=models.Sum("protein"),
+        carbs=models.Sum("carbohydrates"),
+        fats=models.Sum("fats"),
+    ):
+        rollup = totals[(row["meal__user_id"], row["meal__date"])]
+        rollup.calories = row["calories"] or 0
+        rollup.protein = row["protein"] or 0
+        rollup.carbs = row["carbs"] or 0
+        rollup.fats = row["fats"] or 0
+
+    DailyNutritionTotals.objects.bulk_create(totals.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("nutrition", "0007_mealplan_end_date_mealplan_start_date"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyNutritionTotals",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="日付")),
+                (
+                    "calories",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=8,
+                        verbose_name="Calories",
+                    ),
+                ),
+                (
+                    "protein",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=7,
+                        verbose_name="Protein (g)",
+                    ),
+                ),
+                (
+                    "carbs",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=7,
+                        verbose_name="Carbs (g)",
+                    ),
+                ),
+                (
+                    "fats",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=7,
+                        verbose_name="Fats (g)",
+                    ),
+                ),
+                (
+                    "meals_count",
+                    models.IntegerField(default=0, verbose_name="Meals Count"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_nutrition_totals",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "日別栄養集計",
+                "verbose_name_plural": "日別栄養集計",
+                "ordering": ["-date"],
+                "unique_together": {("user", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:05
+
+from django.db import migrations
+
+# Expression indexes used by apps.nutrition.search.PostgresFoodSearch
+POSTGRES_INDEXES = [
+    (
+        "nutrition_food_name_trgm",
+        "CREATE INDEX IF NOT EXISTS nutrition_food_name_trgm "
+        "ON nutrition_food USING gin (UPPER(name::text) gin_trgm_ops)",
+    ),
+    (
+        "nutrition_food_brand_trgm",
+        "CREATE INDEX IF NOT EXISTS nutrition_food_brand_trgm "
+        "ON nutrition_food USING gin (UPPER(brand::text) gin_trgm_ops)",
+    ),
+    (
+        "nutrition_food_name_sim_trgm",
+        "CREATE INDEX IF NOT EXISTS nutrition_food_name_sim_trgm "
+        "ON nutrition_food USING gin (name gin_trgm_ops)",
+    ),
+    (
+        "nutrition_food_document",
+        "CREATE INDEX IF NOT EXISTS nutrition_food_document ON nutrition_food USING gin "
+        "(to_tsvector('simple'::regconfig, "
+        "COALESCE(name::text, '') || ' ' || COALESCE(brand::text, '')))",
+    ),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """Create trigram / full-text indexes (PostgreSQL only)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for _, sql in POSTGRES_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0008_dailynutritiontotals"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
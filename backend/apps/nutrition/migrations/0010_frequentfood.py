@@ -0,0 +1,98 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import math
+from datetime import datetime, timezone
+
+HALF_LIFE_DAYS = 14
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def backfill_frequent_foods(apps, schema_editor):
+    """Build FrequentFood from existing meal items (same decay as the model)"""
+    MealItem = apps.get_model("nutrition", "MealItem")
+    FrequentFood = apps.get_model("nutrition", "FrequentFood")
+
+    entries = {}
+    items = MealItem.objects.values_list(
+        "meal__user_id", "food_id", "created_at"
+    ).iterator(chunk_size=5000)
+    for user_id, food_id, created_at in items:
+        days = (created_at - EPOCH).total_seconds() / 86400
+        increment = days / HALF_LIFE_DAYS * math.log(2)
+        entry = entries.get((user_id, food_id))
+        if entry is None:
+            entries[(user_id, food_id)] = FrequentFood(
+                user_id=user_id,
+                food_id=food_id,
+                use_count=1,
+                last_used_at=created_at,
+                rank=increment,
+            )
+            continue
+        high, low = max(entry.rank, increment), min(entry.rank, increment)
+        entry.rank = high + math.log1p(math.exp(low - high))
+        entry.use_count += 1
+        entry.last_used_at = max(entry.last_used_at, created_at)
+
+    FrequentFood.objects.bulk_create(entries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("nutrition", "0009_food_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FrequentFood",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "use_count",
+                    models.PositiveIntegerField(default=0, verbose_name="使用回数"),
+                ),
+                ("last_used_at", models.DateTimeField(verbose_name="最終使用日時")),
+                ("rank", models.FloatField(default=0, verbose_name="ランク")),
+                (
+                    "food",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="frequent_users",
+                        to="nutrition.food",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="frequent_foods",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "よく使う食品",
+                "verbose_name_plural": "よく使う食品",
+                "ordering": ["-rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-rank"], name="nutrition_f_user_id_9610a4_idx"
+                    )
+                ],
+                "unique_together": {("user", "food")},
+            },
+        ),
+        migrations.RunPython(backfill_frequent_foods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0010_frequentfood"),
+    ]
+
+    operations = [
+        # New index first, so date queries stay indexed while migrating
+        migrations.AddIndex(
+            model_name="meal",
+            index=models.Index(
+                fields=["user", "date", "id"], name="nutrition_m_user_id_079d97_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="meal",
+            name="nutrition_m_user_id_80eec6_idx",
+        ),
+    ]
@@ -1,7 +1,12 @@
 """
 Models for nutrition tracking and meal planning
 """
-from django.db import models
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.contrib.contenttypes.fields import GenericRelation
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.users.models import User
 
@@ -124,6 +129,7 @@ class Food(models.Model):
     # Additional info
     description = models.TextField(blank=True, verbose_name='Description')
     image = models.ImageField(upload_to='food_images/', blank=True, null=True, verbose_name='Image')
+    media_variants = GenericRelation('media.MediaVariant')
     is_custom = models.BooleanField(default=False, verbose_name='Custom Food')
     created_by = models.ForeignKey(
         User,
@@ -179,6 +185,7 @@ class Meal(models.Model):
     
     notes = models.TextField(blank=True, verbose_name='メモ')
     image = models.ImageField(upload_to='meal_images/', blank=True, null=True, verbose_name='画像')
+    media_variants = GenericRelation('media.MediaVariant')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -188,7 +195,8 @@ class Meal(models.Model):
         verbose_name_plural = '食事'
         ordering = ['-date', '-time']
         indexes = [
-            models.Index(fields=['user', 'date']),
+            # Keyset pages on (date, id); also serves the date range filters
+            models.Index(fields=['user', 'date', 'id']),
             models.Index(fields=['meal_type']),
         ]
     
@@ -253,16 +261,218 @@ class MealItem(models.Model):
     def __str__(self):
         return f"{self.food.name} - {self.serving_size}g"
     
-    def save(self, *args, **kwargs):
-        """Calculate and cache nutritional values before saving"""
-        nutrition = self.food.get_nutrition_per_serving(self.serving_size)
+    def set_nutrition(self, food):
+        """Cache nutritional values for this serving from the given food"""
+        nutrition = food.get_nutrition_per_serving(self.serving_size)
         self.calories = nutrition['calories']
         self.protein = nutrition['protein']
         self.carbohydrates = nutrition['carbohydrates']
         self.fats = nutrition['fats']
+    
+    def save(self, *args, **kwargs):
+        """Calculate and cache nutritional values before saving"""
+        self.set_nutrition(self.food)
         super().save(*args, **kwargs)
 
 
+class DailyNutritionTotals(models.Model):
+    """
+    Materialized per-user daily nutrition totals
+    Maintained incrementally by the Meal/MealItem signals
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_nutrition_totals')
+    date = models.DateField(verbose_name='日付')
+
+    calories = models.DecimalField(max_digits=8, decimal_places=1, default=0, verbose_name='Calories')
+    protein = models.DecimalField(max_digits=7, decimal_places=1, default=0, verbose_name='Protein (g)')
+    carbs = models.DecimalField(max_digits=7, decimal_places=1, default=0, verbose_name='Carbs (g)')
+    fats = models.DecimalField(max_digits=7, decimal_places=1, default=0, verbose_name='Fats (g)')
+    meals_count = models.IntegerField(default=0, verbose_name='Meals Count')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = '日別栄養集計'
+        verbose_name_plural = '日別栄養集計'
+        ordering = ['-date']
+        unique_together = ['user', 'date']
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.date} ({self.calories}kcal)"
+
+    @classmethod
+    def apply_delta(cls, user_id, date, calories=0, protein=0, carbs=0, fats=0, meals_count=0):
+        """Add the given amounts to the user's totals for a date"""
+        cls.objects.get_or_create(user_id=user_id, date=date)
+        cls.objects.filter(user_id=user_id, date=date).update(
+            calories=models.F('calories') + Decimal(str(calories)),
+            protein=models.F('protein') + Decimal(str(protein)),
+            carbs=models.F('carbs') + Decimal(str(carbs)),
+            fats=models.F('fats') + Decimal(str(fats)),
+            meals_count=models.F('meals_count') + meals_count,
+        )
+
+    @classmethod
+    def rebuild(cls, user_id, date):
+        """Recalculate the user's totals for a date from meal items"""
+        meals = Meal.objects.filter(user_id=user_id, date=date)
+        totals = MealItem.objects.filter(meal__in=meals).aggregate(
+            calories=models.Sum('calories'),
+            protein=models.Sum('protein'),
+            carbs=models.Sum('carbohydrates'),
+            fats=models.Sum('fats'),
+        )
+        meals_count = meals.count()
+
+        if not meals_count:
+            cls.objects.filter(user_id=user_id, date=date).delete()
+            return None
+
+        rollup, created = cls.objects.update_or_create(
+            user_id=user_id,
+            date=date,
+            defaults={
+                'calories': totals['calories'] or 0,
+                'protein': totals['protein'] or 0,
+                'carbs': totals['carbs'] or 0,
+                'fats': totals['fats'] or 0,
+                'meals_count': meals_count,
+            }
+        )
+        return rollup
+
+    @classmethod
+    def daily_summaries(cls, user, start_date, end_date):
+        """Return one summary per day in the range, filling days without meals"""
+        rollups = {
+            rollup.date: rollup
+            for rollup in cls.objects.filter(
+                user=user,
+                date__gte=start_date,
+                date__lte=end_date
+            )
+        }
+        
+        summaries = []
+        current_date = start_date
+        while current_date <= end_date:
+            rollup = rollups.get(current_date) or cls(date=current_date)
+            summaries.append(rollup.as_summary())
+            current_date += timedelta(days=1)
+        return summaries
+
+    def as_summary(self):
+        """Return the totals in the daily summary format"""
+        return {
+            'date': self.date,
+            'total_calories': float(self.calories),
+            'total_protein': float(self.protein),
+            'total_carbs': float(self.carbs),
+            'total_fats': float(self.fats),
+            'meals_count': self.meals_count,
+        }
+
+
+class FrequentFood(models.Model):
+    """
+    Per-user decayed food usage for quick add
+    
+    `rank` is log(sum of 2^(age / half life)) measured from a fixed epoch, so
+    ordering by it equals ordering by the decayed score at any moment and a
+    new use only touches its own row.
+    """
+    HALF_LIFE_DAYS = 14
+    EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='frequent_foods')
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name='frequent_users')
+    use_count = models.PositiveIntegerField(default=0, verbose_name='使用回数')
+    last_used_at = models.DateTimeField(verbose_name='最終使用日時')
+    rank = models.FloatField(default=0, verbose_name='ランク')
+    
+    class Meta:
+        verbose_name = 'よく使う食品'
+        verbose_name_plural = 'よく使う食品'
+        unique_together = ['user', 'food']
+        ordering = ['-rank']
+        indexes = [
+            models.Index(fields=['user', '-rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.food.name} ({self.use_count})"
+    
+    @classmethod
+    def _time_rank(cls, moment):
+        """Time since the epoch on the natural-log scale of the decay"""
+        days = (moment - cls.EPOCH).total_seconds() / 86400
+        return days / cls.HALF_LIFE_DAYS * math.log(2)
+    
+    @staticmethod
+    def _log_add(a, b):
+        """log(exp(a) + exp(b)) without overflow"""
+        high, low = max(a, b), min(a, b)
+        return high + math.log1p(math.exp(low - high))
+    
+    @classmethod
+    @transaction.atomic
+    def record_usage(cls, user_id, food_counts, used_at=None):
+        """
+        Add uses of foods to the user's index
+        
+        Args:
+            user_id: owner
+            food_counts: dict of food_id -> number of uses
+            used_at: time of use (defaults to now)
+        """
+        if not food_counts:
+            return
+        used_at = used_at or timezone.now()
+        time_rank = cls._time_rank(used_at)
+        
+        # Insert missing rows first (concurrent first uses conflict, not fail),
+        # then lock every row so the log-add always starts from a stored rank
+        cls.objects.bulk_create([
+            cls(user_id=user_id, food_id=food_id, use_count=0, last_used_at=used_at)
+            for food_id in food_counts
+        ], ignore_conflicts=True)
+        
+        to_update = []
+        for entry in cls.objects.select_for_update().filter(user_id=user_id, food_id__in=list(food_counts)):
+            count = food_counts[entry.food_id]
+            increment = time_rank + math.log(count)
+            # use_count 0: inserted above, there is no earlier rank to add to
+            entry.rank = cls._log_add(entry.rank, increment) if entry.use_count else increment
+            entry.use_count += count
+            entry.last_used_at = max(entry.last_used_at, used_at)
+            to_update.append(entry)
+        
+        if to_update:
+            cls.objects.bulk_update(to_update, ['use_count', 'last_used_at', 'rank'])
+    
+    @classmethod
+    def decayed_score(cls, rank, now=None):
+        """Decayed use count (each use counts 1 when new, half after HALF_LIFE_DAYS)"""
+        return math.exp(rank - cls._time_rank(now or timezone.now()))
+    
+    @property
+    def score(self):
+        return self.decayed_score(self.rank)
+    
+    @classmethod
+    def scores_for(cls, user_id, food_ids):
+        """Return {food_id: decayed score} for the given foods"""
+        if not food_ids:
+            return {}
+        now_rank = cls._time_rank(timezone.now())
+        return {
+            food_id: math.exp(rank - now_rank)
+            for food_id, rank in cls.objects.filter(
+                user_id=user_id, food_id__in=food_ids
+            ).values_list('food_id', 'rank')
+        }
+
+
 class MealPlan(models.Model):
     """
     Model for pre-defined meal plans
@@ -443,6 +653,7 @@ class Recipe(models.Model):
     time = models.CharField(max_length=50, verbose_name='調理時間')
     servings = models.CharField(max_length=50, verbose_name='人数')
     image = models.ImageField(upload_to='recipe_images/', blank=True, null=True, verbose_name='画像')
+    media_variants = GenericRelation('media.MediaVariant')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,261 @@
+"""
+Ranked food search
+
+PostgreSQL: candidates come from the pg_trgm / full-text GIN indexes created in
+migration 0009. Other databases (SQLite in development): candidates come from an
+in-process prefix + trigram index, rebuilt when the shared 'food_index' stamp
+(bumped by the Food signals and import_foods) changes, so every process sees
+foods written by the others. Both backends share the same ranking.
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from django.db import connection
+from django.db.models import Count, F, Q
+from apps.core.versions import DataVersions
+from .models import Food, FrequentFood, MealItem
+
+# Candidates fetched before ranking
+CANDIDATE_LIMIT = 200
+# Rarest query trigrams scanned by the local index
+MAX_POSTINGS = 6
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace"""
+    return ' '.join((text or '').lower().split())
+
+
+def trigrams(text):
+    """Padded character trigrams (pg_trgm style)"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query_grams, text):
+    """Trigram similarity between 0 and 1"""
+    text_grams = trigrams(text)
+    if not query_grams or not text_grams:
+        return 0
+    return len(query_grams & text_grams) / len(query_grams | text_grams)
+
+
+def score_food(query, query_grams, name, brand, popularity=0, personal=0):
+    """Rank a candidate: exact > prefix > word prefix > substring > fuzzy, plus brand, popularity and own usage"""
+    name = normalize(name)
+    brand = normalize(brand)
+
+    if name == query:
+        score = 100
+    elif name.startswith(query):
+        score = 60
+    elif any(word.startswith(query) for word in name.split()):
+        score = 40
+    elif query in name:
+        score = 25
+    else:
+        score = similarity(query_grams, name) * 20
+
+    if brand and (brand == query or query.startswith(brand) or brand.startswith(query)):
+        score += 10
+    elif brand and query in brand:
+        score += 5
+
+    score += min(10, math.log1p(popularity) * 2)
+    # Foods the user logs often (decayed FrequentFood score)
+    score += min(20, math.log1p(personal) * 8)
+    # Prefer shorter (more specific) names on ties
+    score -= len(name) / 100
+    return score
+
+
+def food_popularity(food_ids):
+    """How often each food was logged (one indexed query over the candidates)"""
+    if not food_ids:
+        return {}
+    return dict(
+        MealItem.objects.filter(food_id__in=food_ids)
+        .values_list('food_id')
+        .annotate(count=Count('id'))
+        .values_list('food_id', 'count')
+    )
+
+
+class PostgresFoodSearch:
+    """Candidates from pg_trgm and full-text GIN indexes"""
+
+    def candidates(self, query, user, category=None):
+        from django.contrib.postgres.lookups import TrigramSimilar
+        from django.contrib.postgres.search import SearchQuery, SearchVector, TrigramSimilarity
+
+        queryset = Food.objects.filter(Q(is_custom=False) | Q(created_by=user))
+        if category:
+            queryset = queryset.filter(category=category)
+
+        # Prefix full-text query over name + brand, e.g. "chick:* & breast:*"
+        terms = [''.join(ch for ch in term if ch.isalnum()) for term in query.split()]
+        tsquery = ' & '.join(f'{term}:*' for term in terms if term)
+
+        match = Q(name__icontains=query) | Q(brand__icontains=query)
+        queryset = queryset.annotate(similarity=TrigramSimilarity('name', query))
+        if tsquery:
+            queryset = queryset.annotate(
+                document=SearchVector('name', 'brand', config='simple')
+            )
+            match |= Q(document=SearchQuery(tsquery, config='simple', search_type='raw'))
+
+        rows = list(
+            queryset.filter(match).order_by('-similarity').values_list('id', 'name', 'brand')[:CANDIDATE_LIMIT]
+        )
+        if not rows:
+            # Typo tolerance: nearest names by trigram similarity. `name % query`
+            # (pg_trgm.similarity_threshold, 0.3 by default) is served by the
+            # name gin_trgm_ops index; a filter on the annotated similarity is not
+            rows = list(
+                queryset.filter(TrigramSimilar(F('name'), query)).order_by('-similarity')
+                .values_list('id', 'name', 'brand')[:CANDIDATE_LIMIT]
+            )
+        return rows
+
+
+class LocalFoodIndex:
+    """In-process prefix/trigram index over the food catalog"""
+
+    # Shared stamp (no user) of every food row, including new ones
+    VERSION_DOMAIN = 'food_index'
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+
+    @classmethod
+    def current_version(cls):
+        return DataVersions.get_many(None, [cls.VERSION_DOMAIN])[cls.VERSION_DOMAIN][0]
+
+    @classmethod
+    def bump_version(cls):
+        """Mark the catalog as changed (every process rebuilds on its next search)"""
+        DataVersions.bump(cls.VERSION_DOMAIN)
+
+    def build(self, version):
+        with self.lock:
+            self.ids = array('q')
+            self.names = []
+            self.brands = []
+            self.owners = []
+            self.categories = []
+            self.words = []
+            self.grams = {}
+
+            rows = Food.objects.values_list(
+                'id', 'name', 'brand', 'created_by_id', 'is_custom', 'category'
+            ).iterator(chunk_size=5000)
+            for row in rows:
+                self._append(*row)
+
+            self.words.sort()
+            self.version = version
+
+    def _append(self, food_id, name, brand, created_by_id, is_custom, category):
+        position = len(self.ids)
+        self.ids.append(food_id)
+        self.names.append(name)
+        self.brands.append(brand or '')
+        self.owners.append(created_by_id if is_custom else None)
+        self.categories.append(category)
+
+        text = normalize(f'{name} {brand or ""}')
+        for word in set(text.split()):
+            self.words.append((word, position))
+        for gram in trigrams(text):
+            postings = self.grams.get(gram)
+            if postings is None:
+                postings = self.grams[gram] = array('I')
+            postings.append(position)
+        return position
+
+    def _visible(self, position, user, category):
+        owner = self.owners[position]
+        return (
+            (owner is None or owner == user.pk)
+            and (not category or self.categories[position] == category)
+        )
+
+    def candidates(self, query, user, category=None):
+        version = self.current_version()
+        with self.lock:
+            if self.version != version:
+                self.build(version)
+
+            found = []
+            seen = set()
+
+            # Word prefix matches (covers full-name prefixes too)
+            first_word = query.split()[0]
+            index = bisect_left(self.words, (first_word, -1))
+            while index < len(self.words) and len(found) < CANDIDATE_LIMIT:
+                word, position = self.words[index]
+                if not word.startswith(first_word):
+                    break
+                index += 1
+                if position not in seen and self._visible(position, user, category):
+                    seen.add(position)
+                    found.append(position)
+
+            # Substring / fuzzy matches from the rarest query trigrams
+            if len(found) < CANDIDATE_LIMIT:
+                query_grams = trigrams(query)
+                postings = sorted(
+                    (self.grams[gram] for gram in query_grams if gram in self.grams), key=len
+                )[:MAX_POSTINGS]
+                counts = Counter()
+                for posting in postings:
+                    counts.update(posting)
+                # A candidate must share roughly a third of the query trigrams
+                needed = max(1, round(len(query_grams) * 0.3))
+                for position, hits in counts.most_common():
+                    if hits < needed or len(found) >= CANDIDATE_LIMIT:
+                        break
+                    if position not in seen and self._visible(position, user, category):
+                        seen.add(position)
+                        found.append(position)
+
+            return [(self.ids[p], self.names[p], self.brands[p]) for p in found]
+
+
+local_index = LocalFoodIndex()
+
+
+def get_backend():
+    """Search backend for the current database"""
+    if connection.vendor == 'postgresql':
+        return PostgresFoodSearch()
+    return local_index
+
+
+def search_foods(query, user, category=None, limit=20):
+    """Return up to `limit` food ids ranked for the query"""
+    query = normalize(query)
+    if not query:
+        return []
+
+    rows = get_backend().candidates(query, user, category)
+    food_ids = [food_id for food_id, _, _ in rows]
+    popularity = food_popularity(food_ids)
+    personal = FrequentFood.scores_for(user.pk, food_ids)
+    query_grams = trigrams(query)
+
+    ranked = sorted(
+        rows,
+        key=lambda row: score_food(
+            query, query_grams, row[1], row[2],
+            popularity.get(row[0], 0), personal.get(row[0], 0)
+        ),
+        reverse=True
+    )
+    return [food_id for food_id, _, _ in ranked[:limit]]
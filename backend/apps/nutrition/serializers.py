@@ -1,19 +1,25 @@
 """
 Serializers for Nutrition models
 """
+from django.db import transaction
 from rest_framework import serializers
+from apps.core.sparse import SparseFieldsetsMixin
+from apps.media.serializers import ImageSourceField, ImageVariantsField
 from .models import (
     Food, Meal, MealItem, MealPlan, 
-    FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
+    FavoriteFood, FrequentFood, FavoriteMeal, FavoriteMealItem, Recipe
 )
+from .services import MealItemBulkService
 
 
-class FoodSerializer(serializers.ModelSerializer):
+class FoodSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Food model"""
     created_by_name = serializers.CharField(
         source='created_by.get_full_name',
         read_only=True
     )
+    image_src = ImageSourceField('image')
+    image_variants = ImageVariantsField('image')
     
     class Meta:
         model = Food
@@ -21,11 +27,20 @@ class FoodSerializer(serializers.ModelSerializer):
             'id', 'name', 'category', 'brand', 'serving_size', 'unit',
             'calories', 'protein', 'carbohydrates', 'fats',
             'fiber', 'sugar', 'sodium', 'vitamin_a', 'vitamin_c',
-            'calcium', 'iron', 'description', 'image',
+            'calcium', 'iron', 'description', 'image', 'image_src', 'image_variants',
             'is_custom', 'created_by', 'created_by_name',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        field_prefetches = {
+            'image_src': ['media_variants'],
+            'image_variants': ['media_variants'],
+            'created_by_name': ['created_by'],
+        }
+        field_sources = {
+            'image_src': ['image'],
+            'image_variants': ['image'],
+        }
 
 
 class FoodCreateSerializer(serializers.ModelSerializer):
@@ -41,7 +56,7 @@ class FoodCreateSerializer(serializers.ModelSerializer):
         ]
 
 
-class MealItemSerializer(serializers.ModelSerializer):
+class MealItemSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for MealItem model"""
     food = FoodSerializer(read_only=True)
     food_id = serializers.IntegerField(write_only=True)
@@ -54,9 +69,10 @@ class MealItemSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         read_only_fields = ['id', 'calories', 'protein', 'carbohydrates', 'fats', 'created_at']
+        expandable_fields = ['food']
 
 
-class MealSerializer(serializers.ModelSerializer):
+class MealSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Meal model"""
     items = MealItemSerializer(many=True, read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
@@ -64,15 +80,32 @@ class MealSerializer(serializers.ModelSerializer):
     total_protein = serializers.ReadOnlyField()
     total_carbs = serializers.ReadOnlyField()
     total_fats = serializers.ReadOnlyField()
+    image_src = ImageSourceField('image')
+    image_variants = ImageVariantsField('image')
     
     class Meta:
         model = Meal
         fields = [
             'id', 'user', 'user_name', 'name', 'meal_type', 'date', 'time',
-            'notes', 'image', 'items', 'total_calories', 'total_protein',
+            'notes', 'image', 'image_src', 'image_variants', 'items', 'total_calories', 'total_protein',
             'total_carbs', 'total_fats', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        expandable_fields = ['items']
+        field_prefetches = {
+            'image_src': ['media_variants'],
+            'image_variants': ['media_variants'],
+            'user_name': ['user'],
+            # Totals are summed from the items (without their foods)
+            'total_calories': ['items'],
+            'total_protein': ['items'],
+            'total_carbs': ['items'],
+            'total_fats': ['items'],
+        }
+        field_sources = {
+            'image_src': ['image'],
+            'image_variants': ['image'],
+        }
 
 
 class MealCreateSerializer(serializers.ModelSerializer):
@@ -83,22 +116,21 @@ class MealCreateSerializer(serializers.ModelSerializer):
         model = Meal
         fields = ['name', 'meal_type', 'date', 'time', 'notes', 'image', 'items']
     
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
         meal = Meal.objects.create(**validated_data)
         
-        for item_data in items_data:
-            food_id = item_data.pop('food_id')
-            MealItem.objects.create(
-                meal=meal,
-                food_id=food_id,
-                **item_data
-            )
+        # Foods are fetched once and items inserted in one query
+        try:
+            MealItemBulkService.add_items(meal, items_data)
+        except Food.DoesNotExist as e:
+            raise serializers.ValidationError({'items': str(e)})
         
         return meal
 
 
-class MealPlanSerializer(serializers.ModelSerializer):
+class MealPlanSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for MealPlan model with flexible input/output"""
     created_by_name = serializers.CharField(
         source='created_by.get_full_name',
@@ -182,7 +214,7 @@ class MealPlanSerializer(serializers.ModelSerializer):
         return data
 
 
-class FavoriteFoodSerializer(serializers.ModelSerializer):
+class FavoriteFoodSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for FavoriteFood model"""
     food = FoodSerializer(read_only=True)
     food_id = serializers.IntegerField(write_only=True)
@@ -191,9 +223,24 @@ class FavoriteFoodSerializer(serializers.ModelSerializer):
         model = FavoriteFood
         fields = ['id', 'user', 'food', 'food_id', 'added_at']
         read_only_fields = ['id', 'user', 'added_at']
+        expandable_fields = ['food']
 
 
-class FavoriteMealItemSerializer(serializers.ModelSerializer):
+class FrequentFoodSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Serializer for FrequentFood model"""
+    food = FoodSerializer(read_only=True)
+    score = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = FrequentFood
+        fields = ['food', 'use_count', 'last_used_at', 'score']
+        expandable_fields = ['food']
+    
+    def get_score(self, obj):
+        return round(obj.score, 3)
+
+
+class FavoriteMealItemSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for FavoriteMealItem model"""
     food = FoodSerializer(read_only=True)
     food_id = serializers.IntegerField(write_only=True)
@@ -202,9 +249,10 @@ class FavoriteMealItemSerializer(serializers.ModelSerializer):
         model = FavoriteMealItem
         fields = ['id', 'food', 'food_id', 'serving_size']
         read_only_fields = ['id']
+        expandable_fields = ['food']
 
 
-class FavoriteMealSerializer(serializers.ModelSerializer):
+class FavoriteMealSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for FavoriteMeal model"""
     items = FavoriteMealItemSerializer(many=True, read_only=True)
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
@@ -216,6 +264,7 @@ class FavoriteMealSerializer(serializers.ModelSerializer):
             'description', 'items', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        expandable_fields = ['items']
 
 
 class FavoriteMealCreateSerializer(serializers.ModelSerializer):
@@ -241,19 +290,29 @@ class FavoriteMealCreateSerializer(serializers.ModelSerializer):
         return favorite_meal
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Recipe model"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    image_src = ImageSourceField('image')
+    image_variants = ImageVariantsField('image')
     
     class Meta:
         model = Recipe
         fields = [
             'id', 'user', 'user_name', 'name', 'description',
             'calories', 'protein', 'carbs', 'fats',
-            'time', 'servings', 'image',
+            'time', 'servings', 'image', 'image_src', 'image_variants',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        field_prefetches = {
+            'image_src': ['media_variants'],
+            'image_variants': ['media_variants'],
+        }
+        field_sources = {
+            'image_src': ['image'],
+            'image_variants': ['image'],
+        }
 
 
 class DailyNutritionSummarySerializer(serializers.Serializer):
@@ -0,0 +1,121 @@
+"""
+Nutrition services for batch meal logging
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+from django.db import transaction
+from .models import Food, Meal, MealItem, DailyNutritionTotals, FrequentFood
+from .signals import meals_bulk_changed
+
+
+class MealItemBulkService:
+    """Create meal items (and meals) in batches"""
+    
+    @staticmethod
+    def _load_foods(items_data):
+        """Fetch every referenced food in one query"""
+        food_ids = {item['food_id'] for item in items_data}
+        foods = Food.objects.in_bulk(food_ids)
+        missing = food_ids - set(foods)
+        if missing:
+            raise Food.DoesNotExist(f"Food not found: {', '.join(str(i) for i in sorted(missing))}")
+        return foods
+    
+    @staticmethod
+    def _build_items(meal, items_data, foods):
+        """Build unsaved items with nutrition computed in memory"""
+        items = []
+        for item_data in items_data:
+            item = MealItem(
+                meal=meal,
+                food=foods[item_data['food_id']],
+                serving_size=item_data['serving_size']
+            )
+            item.set_nutrition(item.food)
+            items.append(item)
+        return items
+    
+    @staticmethod
+    def _apply_rollups(items, new_meals=()):
+        """Update DailyNutritionTotals once per affected (user, day)"""
+        # Views may assign date strings to meals
+        to_date = Meal._meta.get_field('date').to_python
+        
+        deltas = defaultdict(lambda: defaultdict(int))
+        for meal in new_meals:
+            deltas[(meal.user_id, to_date(meal.date))]['meals_count'] += 1
+        for item in items:
+            delta = deltas[(item.meal.user_id, to_date(item.meal.date))]
+            delta['calories'] += Decimal(str(item.calories))
+            delta['protein'] += Decimal(str(item.protein))
+            delta['carbs'] += Decimal(str(item.carbohydrates))
+            delta['fats'] += Decimal(str(item.fats))
+        
+        for (user_id, date), delta in deltas.items():
+            DailyNutritionTotals.apply_delta(user_id, date, **delta)
+        
+        meals_bulk_changed.send(
+            sender=MealItem,
+            user_ids={user_id for user_id, _ in deltas}
+        )
+    
+    @staticmethod
+    def _record_usage(items):
+        """Update the quick add index once per user"""
+        usage = defaultdict(Counter)
+        for item in items:
+            usage[item.meal.user_id][item.food_id] += 1
+        for user_id, food_counts in usage.items():
+            FrequentFood.record_usage(user_id, food_counts)
+    
+    @classmethod
+    @transaction.atomic
+    def add_items(cls, meal, items_data):
+        """
+        Add items to an existing meal
+        
+        Args:
+            meal: saved Meal
+            items_data: iterable of dicts with food_id and serving_size
+        
+        Returns:
+            list of created MealItems
+        """
+        items_data = list(items_data)
+        if not items_data:
+            return []
+        
+        foods = cls._load_foods(items_data)
+        items = MealItem.objects.bulk_create(cls._build_items(meal, items_data, foods))
+        cls._apply_rollups(items)
+        cls._record_usage(items)
+        return items
+    
+    @classmethod
+    @transaction.atomic
+    def create_meals(cls, user, meals_data):
+        """
+        Create many meals with their items
+        
+        Args:
+            user: owner of the meals
+            meals_data: iterable of validated meal dicts, each with an optional
+                        'items' list of dicts with food_id and serving_size
+        
+        Returns:
+            list of created Meals
+        """
+        meals_data = [dict(meal_data) for meal_data in meals_data]
+        items_by_meal = [meal_data.pop('items', None) or [] for meal_data in meals_data]
+        foods = cls._load_foods([item for items in items_by_meal for item in items])
+        
+        meals = Meal.objects.bulk_create([Meal(user=user, **meal_data) for meal_data in meals_data])
+        
+        items = []
+        for meal, items_data in zip(meals, items_by_meal):
+            items.extend(cls._build_items(meal, items_data, foods))
+        items = MealItem.objects.bulk_create(items)
+        
+        cls._apply_rollups(items, new_meals=meals)
+        cls._record_usage(items)
+        return meals
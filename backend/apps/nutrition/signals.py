@@ -0,0 +1,143 @@
+"""
+Signals for Nutrition app
+Keep DailyNutritionTotals in sync with meals and meal items
+Bump the local food search index version when foods change
+Record food usage for the quick add index
+"""
+from decimal import Decimal
+from django.db.models.signals import post_save, pre_save, post_delete
+from django.dispatch import receiver, Signal
+from apps.users.models import User
+from .models import Food, Meal, MealItem, DailyNutritionTotals, FrequentFood
+from .search import LocalFoodIndex
+
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbohydrates', 'fats')
+
+# Sent after meals/items are written with bulk_create (which skips model signals)
+# Provides: user_ids
+meals_bulk_changed = Signal()
+
+
+def _deleted_via(origin, model):
+    """Check whether a delete was started from the given model (instance or queryset)"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+def _meal_date(meal):
+    """Return the meal date as a date object (views may assign strings)"""
+    return Meal._meta.get_field('date').to_python(meal.date)
+
+
+def _meal_day(meal_id):
+    """Return (user_id, date) for a meal"""
+    return Meal.objects.values_list('user_id', 'date').get(pk=meal_id)
+
+
+def _item_nutrients(values, sign=1):
+    """Map meal item nutrient values to DailyNutritionTotals delta kwargs"""
+    calories, protein, carbohydrates, fats = (
+        Decimal(str(values[field] or 0)) * sign for field in NUTRIENT_FIELDS
+    )
+    return {
+        'calories': calories,
+        'protein': protein,
+        'carbs': carbohydrates,
+        'fats': fats,
+    }
+
+
+@receiver(pre_save, sender=Meal)
+def remember_previous_meal_date(sender, instance, **kwargs):
+    """Remember the stored date so a moved meal can update both days"""
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = Meal.objects.filter(
+            pk=instance.pk
+        ).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=Meal)
+def update_totals_on_meal_save(sender, instance, created, **kwargs):
+    """Count new meals and move totals when a meal changes date"""
+    date = _meal_date(instance)
+
+    if created:
+        DailyNutritionTotals.apply_delta(instance.user_id, date, meals_count=1)
+        return
+
+    previous_date = getattr(instance, '_previous_date', None)
+    if previous_date and previous_date != date:
+        DailyNutritionTotals.rebuild(instance.user_id, previous_date)
+        DailyNutritionTotals.rebuild(instance.user_id, date)
+
+
+@receiver(post_delete, sender=Meal)
+def update_totals_on_meal_delete(sender, instance, origin=None, **kwargs):
+    """Recalculate the day after a meal (and its items) is deleted"""
+    if _deleted_via(origin, User):
+        return
+    DailyNutritionTotals.rebuild(instance.user_id, _meal_date(instance))
+
+
+@receiver(pre_save, sender=MealItem)
+def remember_previous_item_values(sender, instance, **kwargs):
+    """Remember stored nutrient values so only the difference is applied"""
+    instance._previous_values = None
+    if instance.pk:
+        instance._previous_values = MealItem.objects.filter(
+            pk=instance.pk
+        ).values('meal_id', *NUTRIENT_FIELDS).first()
+
+
+@receiver(post_save, sender=MealItem)
+def update_totals_on_item_save(sender, instance, created, **kwargs):
+    """Apply the item's nutrient delta to its day"""
+    values = {field: getattr(instance, field) for field in NUTRIENT_FIELDS}
+    meal = instance.meal
+    user_id, date = meal.user_id, _meal_date(meal)
+
+    previous = getattr(instance, '_previous_values', None)
+    if created or not previous:
+        DailyNutritionTotals.apply_delta(user_id, date, **_item_nutrients(values))
+        return
+
+    if previous['meal_id'] != instance.meal_id:
+        previous_user_id, previous_date = _meal_day(previous['meal_id'])
+        DailyNutritionTotals.apply_delta(
+            previous_user_id, previous_date, **_item_nutrients(previous, sign=-1)
+        )
+        DailyNutritionTotals.apply_delta(user_id, date, **_item_nutrients(values))
+        return
+
+    delta = {
+        key: value - _item_nutrients(previous)[key]
+        for key, value in _item_nutrients(values).items()
+    }
+    if any(delta.values()):
+        DailyNutritionTotals.apply_delta(user_id, date, **delta)
+
+
+@receiver(post_delete, sender=MealItem)
+def update_totals_on_item_delete(sender, instance, origin=None, **kwargs):
+    """Subtract a removed item from its day"""
+    # Meal deletes rebuild the whole day; user deletes drop the totals anyway
+    if _deleted_via(origin, Meal) or _deleted_via(origin, User):
+        return
+
+    values = {field: getattr(instance, field) for field in NUTRIENT_FIELDS}
+    user_id, date = _meal_day(instance.meal_id)
+    DailyNutritionTotals.apply_delta(user_id, date, **_item_nutrients(values, sign=-1))
+
+
+@receiver(post_save, sender=MealItem)
+def record_food_usage(sender, instance, created, **kwargs):
+    """Count a newly logged food in the user's quick add index"""
+    if created:
+        FrequentFood.record_usage(instance.meal.user_id, {instance.food_id: 1})
+
+
+@receiver(post_save, sender=Food)
+@receiver(post_delete, sender=Food)
+def invalidate_search_index(sender, **kwargs):
+    """Bump the search index version in the write's transaction"""
+    LocalFoodIndex.bump_version()
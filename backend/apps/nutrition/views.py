@@ -8,17 +8,22 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.pagination import DateCursorPagination
+from apps.core.sparse import sparse_queryset
 from .models import (
-    Food, Meal, MealItem, MealPlan,
-    FavoriteFood, FavoriteMeal, FavoriteMealItem, Recipe
+    Food, Meal, MealItem, MealPlan, DailyNutritionTotals,
+    FavoriteFood, FrequentFood, FavoriteMeal, FavoriteMealItem, Recipe
 )
 from .serializers import (
     FoodSerializer, FoodCreateSerializer,
     MealSerializer, MealCreateSerializer, MealItemSerializer,
-    MealPlanSerializer, FavoriteFoodSerializer,
+    MealPlanSerializer, FavoriteFoodSerializer, FrequentFoodSerializer,
     FavoriteMealSerializer, FavoriteMealCreateSerializer,
     DailyNutritionSummarySerializer, RecipeSerializer
 )
+from .services import MealItemBulkService
+from .search import search_foods
 
 
 class FoodViewSet(viewsets.ModelViewSet):
@@ -37,7 +42,7 @@ class FoodViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return Food.objects.filter(
             Q(is_custom=False) | Q(created_by=user)
-        )
+        ).prefetch_related('media_variants')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -73,24 +78,70 @@ class FoodViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_custom(self, request):
         """Get user's custom foods"""
-        foods = Food.objects.filter(created_by=request.user, is_custom=True)
+        foods = Food.objects.filter(created_by=request.user, is_custom=True).prefetch_related('media_variants')
         serializer = self.get_serializer(foods, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked food search (exact / prefix matches first, typo tolerant)"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        food_ids = search_foods(
+            query, request.user,
+            category=request.query_params.get('category'),
+            limit=limit
+        )
+        foods = Food.objects.prefetch_related('media_variants').in_bulk(food_ids)
+        serializer = self.get_serializer([foods[pk] for pk in food_ids if pk in foods], many=True)
+        return Response({'query': query, 'count': len(serializer.data), 'results': serializer.data})
+    
+    @action(detail=False, methods=['get'])
+    def frequent(self, request):
+        """Get the user's most used foods (recent uses weigh more)"""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        entries = FrequentFood.objects.filter(
+            Q(food__is_custom=False) | Q(food__created_by=request.user),
+            user=request.user
+        ).select_related('food__created_by').prefetch_related('food__media_variants').order_by('-rank')[:limit]
+        serializer = FrequentFoodSerializer(entries, many=True)
+        return Response(serializer.data)
 
 
-class MealViewSet(viewsets.ModelViewSet):
+class MealViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Meal model
     Provides CRUD operations for meals
     """
     permission_classes = [IsAuthenticated]
+    # daily_summary also reads the calorie target from the profile
+    conditional_domains = ('nutrition', 'profile', 'food_catalog')
+    pagination_class = DateCursorPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['date', 'time', 'created_at']
     ordering = ['-date', '-time']
     
     def get_queryset(self):
         """Return meals for the current user"""
-        queryset = Meal.objects.filter(user=self.request.user).prefetch_related('items__food')
+        # ?fields= / ?expand= decide what is prefetched and loaded
+        queryset = sparse_queryset(
+            Meal.objects.filter(user=self.request.user),
+            MealSerializer,
+            self.request,
+            full=lambda queryset: queryset.prefetch_related('media_variants', 'items__food__media_variants'),
+            required=('date',)
+        )
         
         # Filter by date range
         start_date = self.request.query_params.get('start_date')
@@ -135,13 +186,9 @@ class MealViewSet(viewsets.ModelViewSet):
         else:
             date = date_str
         
-        meals = Meal.objects.filter(user=request.user, date=date)
-        
-        # Calculate totals
-        total_calories = sum(meal.total_calories for meal in meals)
-        total_protein = sum(meal.total_protein for meal in meals)
-        total_carbs = sum(meal.total_carbs for meal in meals)
-        total_fats = sum(meal.total_fats for meal in meals)
+        rollup = DailyNutritionTotals.objects.filter(user=request.user, date=date).first()
+        totals = rollup.as_summary() if rollup else DailyNutritionTotals(date=date).as_summary()
+        total_calories = totals['total_calories']
         
         # Get user's target calories
         target_calories = None
@@ -152,12 +199,7 @@ class MealViewSet(viewsets.ModelViewSet):
                 calories_remaining = target_calories - total_calories
         
         data = {
-            'date': date,
-            'total_calories': total_calories,
-            'total_protein': total_protein,
-            'total_carbs': total_carbs,
-            'total_fats': total_fats,
-            'meals_count': meals.count(),
+            **totals,
             'target_calories': target_calories,
             'calories_remaining': calories_remaining
         }
@@ -167,44 +209,76 @@ class MealViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def weekly_summary(self, request):
-        """Get weekly nutrition summary"""
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=6)
-        
-        daily_summaries = []
-        current_date = start_date
-        
-        while current_date <= end_date:
-            meals = Meal.objects.filter(user=request.user, date=current_date)
-            
-            total_calories = sum(meal.total_calories for meal in meals)
-            total_protein = sum(meal.total_protein for meal in meals)
-            total_carbs = sum(meal.total_carbs for meal in meals)
-            total_fats = sum(meal.total_fats for meal in meals)
-            
-            daily_summaries.append({
-                'date': current_date,
-                'total_calories': total_calories,
-                'total_protein': total_protein,
-                'total_carbs': total_carbs,
-                'total_fats': total_fats,
-                'meals_count': meals.count()
-            })
-            
-            current_date += timedelta(days=1)
+        """
+        Get nutrition summary per day
+        Query params: days (default: 7, max: 366), start_date (default: days ending today)
+        """
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 366)
+        except ValueError:
+            days = 7
+        
+        start_date_str = request.query_params.get('start_date')
+        if start_date_str:
+            try:
+                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid date format. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            end_date = start_date + timedelta(days=days - 1)
+        else:
+            end_date = timezone.now().date()
+            start_date = end_date - timedelta(days=days - 1)
         
+        daily_summaries = DailyNutritionTotals.daily_summaries(request.user, start_date, end_date)
         return Response(daily_summaries)
     
     @action(detail=True, methods=['post'])
     def add_item(self, request, pk=None):
-        """Add an item to a meal"""
+        """Add an item (or a list of items) to a meal"""
         meal = self.get_object()
-        serializer = MealItemSerializer(data=request.data)
+        many = isinstance(request.data, list)
+        serializer = MealItemSerializer(data=request.data, many=many)
         
-        if serializer.is_valid():
-            serializer.save(meal=meal)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        items_data = serializer.validated_data if many else [serializer.validated_data]
+        try:
+            items = MealItemBulkService.add_items(meal, items_data)
+        except Food.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = MealItemSerializer(items, many=True).data
+        return Response(data if many else data[0], status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many meals with their items in one request
+        Body: {"meals": [{name, meal_type, date, time, notes, items: [{food_id, serving_size}]}]}
+        (a plain list of meals is accepted too)
+        """
+        meals_data = request.data.get('meals') if isinstance(request.data, dict) else request.data
+        if not isinstance(meals_data, list) or not meals_data:
+            return Response(
+                {'error': 'Provide a non-empty list of meals'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = MealCreateSerializer(data=meals_data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            meals = MealItemBulkService.create_meals(request.user, serializer.validated_data)
+        except Food.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        meals = self.get_queryset().filter(pk__in=[meal.pk for meal in meals]).order_by('date', 'id')
+        return Response(MealSerializer(meals, many=True).data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['delete'])
     def remove_item(self, request, pk=None):
@@ -284,7 +358,9 @@ class FavoriteFoodViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Return favorite foods for the current user"""
-        return FavoriteFood.objects.filter(user=self.request.user).select_related('food')
+        return FavoriteFood.objects.filter(user=self.request.user).select_related('food').prefetch_related(
+            'food__media_variants'
+        )
     
     def perform_create(self, serializer):
         """Assign favorite to current user"""
@@ -329,7 +405,7 @@ class FavoriteMealViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Return favorite meals for the current user"""
-        return FavoriteMeal.objects.filter(user=self.request.user).prefetch_related('items__food')
+        return FavoriteMeal.objects.filter(user=self.request.user).prefetch_related('items__food__media_variants')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -358,12 +434,10 @@ class FavoriteMealViewSet(viewsets.ModelViewSet):
         )
         
         # Copy items from template
-        for item in favorite_meal.items.all():
-            MealItem.objects.create(
-                meal=meal,
-                food=item.food,
-                serving_size=item.serving_size
-            )
+        MealItemBulkService.add_items(meal, [
+            {'food_id': item.food_id, 'serving_size': item.serving_size}
+            for item in favorite_meal.items.all()
+        ])
         
         serializer = MealSerializer(meal)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -383,7 +457,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Return recipes for the current user"""
-        return Recipe.objects.filter(user=self.request.user)
+        return Recipe.objects.filter(user=self.request.user).prefetch_related('media_variants')
     
     def perform_create(self, serializer):
         """Assign recipe to current user"""
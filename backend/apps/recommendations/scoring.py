@@ -0,0 +1,187 @@
+"""
+Vectorized exercise scoring
+
+The exercise catalog is kept as NumPy feature arrays (type, difficulty,
+calories per minute, MET, owner). Every exercise is scored
+for a user with array operations and the top k are taken with argpartition,
+so request time no longer grows with Python loops over the catalog.
+
+The arrays are rebuilt when the catalog's DataVersion row changes (bumped
+by the Exercise signals in the write's transaction), so every process sees
+edits once they are committed.
+"""
+import threading
+from datetime import timedelta
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+from apps.core.versions import DataVersions
+from apps.workouts.models import Exercise, WorkoutExercise
+
+# Scoring weights (same rules as the original if-chains)
+NEW_EXERCISE_SCORE = 30
+RARE_EXERCISE_SCORE = 15
+RARE_EXERCISE_LIMIT = 3
+GOAL_MATCH_SCORE = 25
+BEGINNER_SCORE = 10
+HIGH_BURN_SCORE = 20
+HIGH_BURN_CALORIES = 8
+
+GOAL_EXERCISE_TYPES = {
+    'weight_loss': ('cardio', 'Great for weight loss'),
+    'muscle_gain': ('strength', 'Builds muscle'),
+}
+
+HISTORY_DAYS = 30
+
+
+class ExerciseCatalog:
+    """Feature arrays of every exercise, ordered like Exercise.objects (by name)"""
+
+    # Shared stamp (no user) of the exercise rows
+    VERSION_DOMAIN = 'exercise_catalog'
+
+    TYPES = [key for key, _ in Exercise.EXERCISE_TYPES]
+    DIFFICULTIES = [key for key, _ in Exercise.DIFFICULTY_LEVELS]
+
+    _lock = threading.Lock()
+    _current = None
+
+    def __init__(self, version):
+        self.version = version
+
+        rows = list(Exercise.objects.order_by('name', 'id').values_list(
+            'id', 'exercise_type', 'difficulty', 'calories_per_minute', 'met_value',
+            'is_custom', 'created_by_id'
+        ))
+        size = len(rows)
+        type_codes = {key: code for code, key in enumerate(self.TYPES)}
+        difficulty_codes = {key: code for code, key in enumerate(self.DIFFICULTIES)}
+
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=size)
+        self.types = np.fromiter((type_codes.get(row[1], -1) for row in rows), dtype=np.int8, count=size)
+        self.difficulties = np.fromiter(
+            (difficulty_codes.get(row[2], -1) for row in rows), dtype=np.int8, count=size
+        )
+        self.calories = np.fromiter((float(row[3] or 0) for row in rows), dtype=np.float64, count=size)
+        self.met = np.fromiter((float(row[4] or 0) for row in rows), dtype=np.float64, count=size)
+        self.is_public = np.fromiter((not row[5] for row in rows), dtype=bool, count=size)
+        self.owners = np.fromiter((row[6] or 0 for row in rows), dtype=np.int64, count=size)
+        self.position = {exercise_id: index for index, exercise_id in enumerate(self.ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def current_version(cls):
+        return DataVersions.get_many(None, [cls.VERSION_DOMAIN])[cls.VERSION_DOMAIN][0]
+
+    @classmethod
+    def bump_version(cls):
+        """Mark the catalog as changed (arrays are rebuilt on next use)"""
+        DataVersions.bump(cls.VERSION_DOMAIN)
+
+    @classmethod
+    def get(cls):
+        """Return the catalog, rebuilding it if the exercises changed"""
+        version = cls.current_version()
+        catalog = cls._current
+        if catalog is not None and catalog.version == version:
+            return catalog
+        with cls._lock:
+            if cls._current is None or cls._current.version != version:
+                cls._current = cls(version)
+            return cls._current
+
+
+class ExerciseScorer:
+    """Score the exercise catalog for one user"""
+
+    @staticmethod
+    def _history(user, catalog):
+        """Recent uses per catalog row (one grouped query)"""
+        counts = np.zeros(len(catalog), dtype=np.int32)
+        since = timezone.now().date() - timedelta(days=HISTORY_DAYS)
+        rows = WorkoutExercise.objects.filter(
+            workout__user=user,
+            workout__date__gte=since
+        ).values_list('exercise_id').annotate(count=Count('id')).values_list('exercise_id', 'count')
+        for exercise_id, count in rows:
+            row = catalog.position.get(exercise_id)
+            if row is not None:
+                counts[row] = count
+        return counts
+
+    @classmethod
+    def score(cls, user, fitness_goal, catalog):
+        """Return (scores, feature masks) for every catalog row"""
+        counts = cls._history(user, catalog)
+
+        masks = {
+            'new': counts == 0,
+            'rare': (counts > 0) & (counts < RARE_EXERCISE_LIMIT),
+            'beginner': catalog.difficulties == catalog.DIFFICULTIES.index('beginner'),
+            'high_burn': catalog.calories > HIGH_BURN_CALORIES,
+        }
+        scores = (
+            NEW_EXERCISE_SCORE * masks['new']
+            + RARE_EXERCISE_SCORE * masks['rare']
+            + BEGINNER_SCORE * masks['beginner']
+            + HIGH_BURN_SCORE * masks['high_burn']
+        ).astype(np.int32)
+
+        goal_type = GOAL_EXERCISE_TYPES.get(fitness_goal)
+        if goal_type:
+            masks['goal'] = catalog.types == catalog.TYPES.index(goal_type[0])
+            scores += GOAL_MATCH_SCORE * masks['goal']
+
+        visible = catalog.is_public | (catalog.owners == user.pk)
+        scores[~visible] = 0
+        return scores, masks
+
+    @staticmethod
+    def top_k(scores, k):
+        """Indices of the k best scores (> 0), ties kept in catalog (name) order"""
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            threshold = scores[best].min()
+            candidates = candidates[scores[candidates] >= threshold]
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
+
+    @staticmethod
+    def reasons(masks, row, fitness_goal):
+        """Human readable reasons for one row"""
+        reasons = []
+        if masks['new'][row]:
+            reasons.append("New exercise to try")
+        elif masks['rare'][row]:
+            reasons.append("Haven't done this much")
+        if 'goal' in masks and masks['goal'][row]:
+            reasons.append(GOAL_EXERCISE_TYPES[fitness_goal][1])
+        if masks['beginner'][row]:
+            reasons.append("Easy to learn")
+        if masks['high_burn'][row]:
+            reasons.append("High calorie burn")
+        return reasons
+
+    @classmethod
+    def recommend(cls, user, fitness_goal, limit=10):
+        """Return the top exercises as [{'exercise', 'score', 'reasons'}]"""
+        catalog = ExerciseCatalog.get()
+        if not len(catalog):
+            return []
+
+        scores, masks = cls.score(user, fitness_goal, catalog)
+        rows = cls.top_k(scores, limit)
+        exercises = Exercise.objects.in_bulk(catalog.ids[rows].tolist())
+        return [
+            {
+                'exercise': exercises[exercise_id],
+                'score': int(scores[row]),
+                'reasons': cls.reasons(masks, row, fitness_goal),
+            }
+            for row, exercise_id in zip(rows.tolist(), catalog.ids[rows].tolist())
+            if exercise_id in exercises
+        ]
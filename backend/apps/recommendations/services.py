@@ -4,11 +4,14 @@ Recommendation service for generating personalized workout and meal suggestions
 import os
 from datetime import datetime, timedelta
 from django.db.models import Avg, Count, Q, Sum
-from apps.measurements.models import BodyMeasurement
+from apps.measurements.models import BodyMeasurement, MeasurementSnapshot
 from apps.nutrition.models import Meal, Food
 from apps.users.models import FoodPreference
-from apps.workouts.models import Workout, Exercise, WorkoutPlan
+from apps.workouts.models import Workout, WorkoutPlan
+from apps.workouts.serializers import ExerciseSerializer, WorkoutPlanSerializer
+from apps.analytics.context import AnalyticsContext
 from apps.analytics.services import MetabolismCalculator, ProgressAnalyzer
+from .scoring import ExerciseCatalog, ExerciseScorer
 
 
 class WorkoutRecommendationEngine:
@@ -75,70 +78,8 @@ class WorkoutRecommendationEngine:
         try:
             profile = user.profile
             
-            # Get user's workout history
-            recent_workouts = Workout.objects.filter(
-                user=user,
-                date__gte=datetime.now().date() - timedelta(days=30)
-            ).prefetch_related('exercises__exercise')
-            
-            # Get exercises user has done
-            done_exercise_ids = set()
-            exercise_counts = {}
-            
-            for workout in recent_workouts:
-                for workout_exercise in workout.exercises.all():
-                    exercise = workout_exercise.exercise
-                    done_exercise_ids.add(exercise.id)
-                    exercise_counts[exercise.id] = exercise_counts.get(exercise.id, 0) + 1
-            
-            # Get exercises user hasn't tried or rarely does
-            all_exercises = Exercise.objects.filter(
-                Q(is_custom=False) | Q(created_by=user)
-            )
-            
-            recommendations = []
-            
-            for exercise in all_exercises:
-                score = 0
-                reasons = []
-                
-                # Prefer exercises not done recently
-                if exercise.id not in done_exercise_ids:
-                    score += 30
-                    reasons.append("New exercise to try")
-                elif exercise_counts.get(exercise.id, 0) < 3:
-                    score += 15
-                    reasons.append("Haven't done this much")
-                
-                # Match with goal
-                if profile.fitness_goal == 'weight_loss' and exercise.exercise_type == 'cardio':
-                    score += 25
-                    reasons.append("Great for weight loss")
-                elif profile.fitness_goal == 'muscle_gain' and exercise.exercise_type == 'strength':
-                    score += 25
-                    reasons.append("Builds muscle")
-                
-                # Consider difficulty
-                if exercise.difficulty == 'beginner':
-                    score += 10
-                    reasons.append("Easy to learn")
-                
-                # High calorie burn
-                if exercise.calories_per_minute and float(exercise.calories_per_minute) > 8:
-                    score += 20
-                    reasons.append("High calorie burn")
-                
-                if score > 0:
-                    recommendations.append({
-                        'exercise': exercise,
-                        'score': score,
-                        'reasons': reasons
-                    })
-            
-            # Sort by score
-            recommendations.sort(key=lambda x: x['score'], reverse=True)
-            
-            return recommendations[:10]
+            # Scored over the cached catalog feature arrays (see scoring.py)
+            return ExerciseScorer.recommend(user, profile.fitness_goal, limit=10)
         
         except Exception as e:
             return []
@@ -271,7 +212,8 @@ class NutritionRecommendationEngine:
                     target_calories = target_calories * 1.15  # 15% increase
             
             # Calculate recommended water intake (35ml per kg of body weight)
-            weight = getattr(profile, 'weight', 70)  # Default 70kg if not set
+            snapshot = MeasurementSnapshot.for_user(user)
+            weight = float(snapshot.weight) if snapshot else 70  # Default 70kg if not set
             recommended_water = round(weight * 35 / 250)  # Convert to glasses (250ml each)
             
             tips = []
@@ -425,8 +367,9 @@ class AIRecommendationEngine:
         
         try:
             profile = user.profile
+            context = AnalyticsContext.for_days(user, 30)
             metabolism = MetabolismCalculator.calculate_for_user(user)
-            progress = ProgressAnalyzer.get_comprehensive_report(user, 30)
+            progress = ProgressAnalyzer.get_comprehensive_report(user, 30, context)
             
             # Rule-based recommendation (can be replaced with AI)
             plan = {
@@ -463,3 +406,31 @@ class AIRecommendationEngine:
         ]
         
         return insights
+
+
+class PersonalizedPlanService:
+    """Personalized plan bundle (precomputed by precompute_insights)"""
+    
+    SNAPSHOT_KIND = 'personalized_plan'
+    
+    @staticmethod
+    def snapshot_version():
+        """Exercise suggestions also depend on the shared exercise catalog"""
+        return str(ExerciseCatalog.current_version())
+    
+    @staticmethod
+    def build(user):
+        """Generate the plan with its model instances serialized"""
+        plan = AIRecommendationEngine.generate_personalized_plan(user)
+        if plan is None:
+            return None
+        
+        plan['workout_recommendation'] = [
+            {**item, 'plan': WorkoutPlanSerializer(item['plan']).data}
+            for item in plan['workout_recommendation']
+        ]
+        plan['exercise_suggestions'] = [
+            {**item, 'exercise': ExerciseSerializer(item['exercise']).data}
+            for item in plan['exercise_suggestions']
+        ]
+        return plan
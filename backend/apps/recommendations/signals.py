@@ -0,0 +1,15 @@
+"""
+Signals for Recommendations app
+Rebuild the exercise feature arrays when the catalog changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.workouts.models import Exercise
+from .scoring import ExerciseCatalog
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog(sender, **kwargs):
+    """Bump the catalog version in the write's transaction"""
+    ExerciseCatalog.bump_version()
@@ -2,10 +2,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from apps.analytics.snapshots import InsightSnapshotStore
 from .services import (
     WorkoutRecommendationEngine,
     NutritionRecommendationEngine,
-    AIRecommendationEngine
+    AIRecommendationEngine,
+    PersonalizedPlanService
 )
 
 
@@ -68,7 +70,8 @@ class PersonalizedPlanView(APIView):
     
     def get(self, request):
         """Get AI-powered personalized plan"""
-        plan = AIRecommendationEngine.generate_personalized_plan(request.user)
+        # Served from the precomputed snapshot when it is still fresh
+        plan = InsightSnapshotStore.serve(request.user, PersonalizedPlanService)
         
         if plan is None:
             return Response(
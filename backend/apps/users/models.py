@@ -2,6 +2,7 @@
 User Models for FitNutrition
 """
 from django.contrib.auth.models import AbstractUser
+from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -19,6 +20,7 @@ class User(AbstractUser):
         null=True,
         verbose_name='プロフィール画像'
     )
+    media_variants = GenericRelation('media.MediaVariant')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
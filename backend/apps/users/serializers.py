@@ -3,18 +3,22 @@ Serializers for User models
 """
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from apps.media.serializers import ImageSourceField, ImageVariantsField
 from .models import User, UserProfile, FoodPreference, UserPreferences
 
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model"""
     age = serializers.ReadOnlyField()
+    profile_picture_src = ImageSourceField('profile_picture')
+    profile_picture_variants = ImageVariantsField('profile_picture')
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'phone', 'date_of_birth', 'age', 'profile_picture',
+            'profile_picture_src', 'profile_picture_variants',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'username', 'created_at', 'updated_at']
@@ -185,12 +189,15 @@ class UserDetailSerializer(serializers.ModelSerializer):
     total_meals = serializers.SerializerMethodField()
     total_workouts = serializers.SerializerMethodField()
     days_active = serializers.SerializerMethodField()
+    profile_picture_src = ImageSourceField('profile_picture')
+    profile_picture_variants = ImageVariantsField('profile_picture')
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
             'phone', 'date_of_birth', 'age', 'profile_picture',
+            'profile_picture_src', 'profile_picture_variants',
             'profile', 'food_preferences',
             'total_measurements', 'total_meals', 'total_workouts', 'days_active',
             'created_at', 'updated_at'
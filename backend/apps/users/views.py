@@ -7,6 +7,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from apps.core.conditional import ConditionalGetMixin
+from apps.media.serializers import MediaUploadSerializer
+from apps.media.uploads import MediaUploadPipeline
 from .models import User, UserProfile, FoodPreference, UserPreferences
 from .serializers import (
     UserSerializer,
@@ -106,12 +109,14 @@ class UserLogoutView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
+class UserProfileView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to retrieve, update, and delete user profile
     GET/PUT/PATCH/DELETE /api/profile/
     """
     permission_classes = [permissions.IsAuthenticated]
+    # UserDetailSerializer also counts measurements, meals and workouts
+    conditional_domains = ('profile', 'measurements', 'nutrition', 'workouts')
     
     def get_object(self):
         return self.request.user
@@ -139,13 +144,14 @@ class UserProfileView(generics.RetrieveUpdateDestroyAPIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserProfileDetailView(generics.RetrieveUpdateAPIView):
+class UserProfileDetailView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """
     API endpoint for user profile details
     GET/PUT/PATCH /api/profile/details/
     """
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_domains = ('profile',)
 
     def get_object(self):
         profile, created = UserProfile.objects.get_or_create(user=self.request.user)
@@ -285,19 +291,18 @@ def upload_profile_picture(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Delete old profile picture if exists
-        if user.profile_picture:
-            user.profile_picture.delete(save=False)
-        
-        # Update profile picture
-        user.profile_picture = request.FILES['profile_picture']
-        user.save()
+        # Stored in the background; the old picture is deleted once the new one is in place
+        upload = MediaUploadPipeline.stage(
+            request.FILES['profile_picture'], user, 'profile_picture',
+            user=user, replace_existing=True
+        )
         
         serializer = UserSerializer(user)
         return Response({
-            'message': 'プロフィール画像が正常にアップロードされました',
+            'message': 'プロフィール画像をアップロードしています',
+            'upload': MediaUploadSerializer(upload).data,
             'user': serializer.data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_202_ACCEPTED)
     except Exception as e:
         return Response({
             'error': f'プロフィール画像のアップロードに失敗しました: {str(e)}'
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
+    Exercise, ExerciseMedia, MuscleGroup, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
     Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
 )
 
@@ -154,3 +154,9 @@ class ExerciseMediaAdmin(admin.ModelAdmin):
     search_fields = ['exercise__name', 'caption']
     autocomplete_fields = ['exercise']
     ordering = ['exercise', 'order']
+
+
+@admin.register(MuscleGroup)
+class MuscleGroupAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
@@ -0,0 +1,131 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+
+
+def _names(muscles):
+    if isinstance(muscles, str):
+        try:
+            muscles = json.loads(muscles)
+        except ValueError:
+            muscles = [muscles]
+        if isinstance(muscles, str):
+            muscles = [muscles]
+    if not isinstance(muscles, (list, tuple)):
+        return []
+    names = []
+    for muscle in muscles:
+        if isinstance(muscle, str):
+            name = muscle.strip().lower()[:50]
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def backfill_exercise_muscles(apps, schema_editor):
+    """Build the muscle group relation from the existing JSON lists"""
+    Exercise = apps.get_model("workouts", "Exercise")
+    MuscleGroup = apps.get_model("workouts", "MuscleGroup")
+    ExerciseMuscle = apps.get_model("workouts", "ExerciseMuscle")
+
+    wanted = {}
+    for exercise_id, primary, secondary in Exercise.objects.values_list(
+        "id", "primary_muscles", "secondary_muscles"
+    ).iterator():
+        muscles = {name: False for name in _names(secondary)}
+        muscles.update({name: True for name in _names(primary)})
+        wanted[exercise_id] = muscles
+
+    names = {name for muscles in wanted.values() for name in muscles}
+    MuscleGroup.objects.bulk_create([MuscleGroup(name=name) for name in names])
+    groups = dict(MuscleGroup.objects.values_list("name", "id"))
+
+    ExerciseMuscle.objects.bulk_create(
+        [
+            ExerciseMuscle(
+                exercise_id=exercise_id,
+                muscle_group_id=groups[name],
+                is_primary=is_primary,
+            )
+            for exercise_id, muscles in wanted.items()
+            for name, is_primary in muscles.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0009_workout_exercise_checks_workout_progress_percentage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MuscleGroup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="筋群"),
+                ),
+            ],
+            options={
+                "verbose_name": "筋群",
+                "verbose_name_plural": "筋群",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ExerciseMuscle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_primary", models.BooleanField(default=True, verbose_name="主働筋")),
+                (
+                    "exercise",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="muscle_links",
+                        to="workouts.exercise",
+                    ),
+                ),
+                (
+                    "muscle_group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exercise_links",
+                        to="workouts.musclegroup",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "エクササイズ筋群",
+                "verbose_name_plural": "エクササイズ筋群",
+                "indexes": [
+                    models.Index(
+                        fields=["muscle_group", "is_primary", "exercise"],
+                        name="workouts_ex_muscle__930191_idx",
+                    )
+                ],
+                "unique_together": {("exercise", "muscle_group")},
+            },
+        ),
+        migrations.RunPython(backfill_exercise_muscles, migrations.RunPython.noop),
+    ]
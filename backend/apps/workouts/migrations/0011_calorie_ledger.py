@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:37
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+
+def backfill_calorie_ledger(apps, schema_editor):
+    """Fill per-exercise calories and their per-workout sums"""
+    Workout = apps.get_model("workouts", "Workout")
+    WorkoutExercise = apps.get_model("workouts", "WorkoutExercise")
+
+    sums = {}
+    changed = []
+    exercises = WorkoutExercise.objects.filter(completed=True).select_related(
+        "exercise"
+    )
+    for workout_exercise in exercises.iterator(chunk_size=2000):
+        calories_per_minute = workout_exercise.exercise.calories_per_minute
+        if not calories_per_minute:
+            continue
+        if workout_exercise.planned_duration_seconds:
+            minutes = Decimal(workout_exercise.planned_duration_seconds) / 60
+        else:
+            minutes = (
+                Decimal(
+                    workout_exercise.completed_sets
+                    * (workout_exercise.planned_reps or 10)
+                    * 3
+                )
+                / 60
+            )
+        calories = (Decimal(str(calories_per_minute)) * minutes).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        workout_exercise.calories_burned = calories
+        changed.append(workout_exercise)
+        sums[workout_exercise.workout_id] = (
+            sums.get(workout_exercise.workout_id, Decimal("0")) + calories
+        )
+
+    WorkoutExercise.objects.bulk_update(changed, ["calories_burned"], batch_size=1000)
+    for workout_id, total in sums.items():
+        Workout.objects.filter(pk=workout_id).update(exercise_calories_burned=total)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0010_musclegroup_exercisemuscle"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workout",
+            name="exercise_calories_burned",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Sum of WorkoutExercise.calories_burned (maintained by signals)",
+                max_digits=8,
+            ),
+        ),
+        migrations.AddField(
+            model_name="workoutexercise",
+            name="calories_burned",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Calories counted for this exercise (maintained by signals)",
+                max_digits=7,
+            ),
+        ),
+        migrations.RunPython(backfill_calorie_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workouts", "0011_calorie_ledger"),
+    ]
+
+    operations = [
+        # New index first, so date queries stay indexed while migrating
+        migrations.AddIndex(
+            model_name="workout",
+            index=models.Index(
+                fields=["user", "date", "id"], name="workouts_wo_user_id_5e0eac_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="workout",
+            name="workouts_wo_user_id_f1c995_idx",
+        ),
+    ]
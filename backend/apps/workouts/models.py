@@ -1,3 +1,6 @@
+import json
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -66,6 +69,7 @@ class Exercise(models.Model):
     video_url = models.URLField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True)
     image = models.ImageField(upload_to='exercises/', blank=True, null=True)
+    media_variants = GenericRelation('media.MediaVariant')
     
     # Metadata
     is_custom = models.BooleanField(default=False)
@@ -91,6 +95,102 @@ class Exercise(models.Model):
         return self.name
 
 
+class MuscleGroup(models.Model):
+    """Muscle group referenced by exercises"""
+    name = models.CharField(max_length=50, unique=True, verbose_name='筋群')
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = '筋群'
+        verbose_name_plural = '筋群'
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize_names(muscles):
+        """Clean a primary/secondary muscles value into a list of names"""
+        if isinstance(muscles, str):
+            # Form uploads may store the JSON text itself
+            try:
+                muscles = json.loads(muscles)
+            except ValueError:
+                muscles = [muscles]
+            if isinstance(muscles, str):
+                muscles = [muscles]
+        if not isinstance(muscles, (list, tuple)):
+            return []
+        names = []
+        for muscle in muscles:
+            if isinstance(muscle, str):
+                name = muscle.strip().lower()[:50]
+                if name and name not in names:
+                    names.append(name)
+        return names
+
+
+class ExerciseMuscle(models.Model):
+    """
+    Indexed exercise <-> muscle group relation
+    Mirrors Exercise.primary_muscles / secondary_muscles (kept in sync by signals)
+    """
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='muscle_links')
+    muscle_group = models.ForeignKey(MuscleGroup, on_delete=models.CASCADE, related_name='exercise_links')
+    is_primary = models.BooleanField(default=True, verbose_name='主働筋')
+
+    class Meta:
+        unique_together = ['exercise', 'muscle_group']
+        indexes = [
+            models.Index(fields=['muscle_group', 'is_primary', 'exercise']),
+        ]
+        verbose_name = 'エクササイズ筋群'
+        verbose_name_plural = 'エクササイズ筋群'
+
+    def __str__(self):
+        return f"{self.exercise_id} - {self.muscle_group_id}"
+
+    @classmethod
+    def sync(cls, exercise):
+        """Update the exercise's links to match its muscle lists"""
+        wanted = {
+            name: False for name in MuscleGroup.normalize_names(exercise.secondary_muscles)
+        }
+        # A muscle listed in both counts as primary
+        wanted.update({
+            name: True for name in MuscleGroup.normalize_names(exercise.primary_muscles)
+        })
+
+        current = {
+            link.muscle_group.name: link
+            for link in cls.objects.filter(exercise=exercise).select_related('muscle_group')
+        }
+
+        stale = [link.pk for name, link in current.items() if name not in wanted]
+        if stale:
+            cls.objects.filter(pk__in=stale).delete()
+
+        changed = []
+        for name, link in current.items():
+            if name in wanted and link.is_primary != wanted[name]:
+                link.is_primary = wanted[name]
+                changed.append(link)
+        if changed:
+            cls.objects.bulk_update(changed, ['is_primary'])
+
+        missing = [name for name in wanted if name not in current]
+        if missing:
+            MuscleGroup.objects.bulk_create(
+                [MuscleGroup(name=name) for name in missing], ignore_conflicts=True
+            )
+            groups = dict(
+                MuscleGroup.objects.filter(name__in=missing).values_list('name', 'id')
+            )
+            cls.objects.bulk_create([
+                cls(exercise=exercise, muscle_group_id=groups[name], is_primary=wanted[name])
+                for name in missing
+            ])
+
+
 class ExerciseMedia(models.Model):
     """Media files (images/videos) for exercises"""
     MEDIA_TYPES = [
@@ -108,6 +208,7 @@ class ExerciseMedia(models.Model):
         upload_to='exercises/media/',
         help_text="Image or video file"
     )
+    media_variants = GenericRelation('media.MediaVariant')
     url = models.URLField(blank=True, null=True, help_text="External URL (optional)")
     order = models.IntegerField(default=0, help_text="Display order")
     caption = models.CharField(max_length=200, blank=True)
@@ -120,6 +221,15 @@ class ExerciseMedia(models.Model):
     def __str__(self):
         return f"{self.exercise.name} - {self.media_type} #{self.order}"
 
+    @property
+    def status(self):
+        """'pending' until the background upload stores the file (see apps.media)"""
+        return 'ready' if self.file else 'pending'
+
+    def media_upload_failed(self, field_name):
+        """Drop the placeholder row when its upload could not be stored"""
+        self.delete()
+
 
 class WorkoutPlan(models.Model):
     """Pre-defined workout plans"""
@@ -266,6 +376,12 @@ class Workout(models.Model):
         default=0,
         validators=[MinValueValidator(0)]
     )
+    exercise_calories_burned = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of WorkoutExercise.calories_burned (maintained by signals)"
+    )
     
     notes = models.TextField(blank=True)
     completed = models.BooleanField(default=False)
@@ -288,13 +404,45 @@ class Workout(models.Model):
     class Meta:
         ordering = ['-date', '-created_at']
         indexes = [
-            models.Index(fields=['user', 'date']),
+            # Keyset pages on (date, id); also serves the date range filters
+            models.Index(fields=['user', 'date', 'id']),
             models.Index(fields=['user', 'completed']),
         ]
 
     def __str__(self):
         return f"{self.user.email} - {self.name} ({self.date})"
 
+    # Kept by WorkoutCalorieLedger with UPDATE statements (see services.py)
+    LEDGER_FIELDS = ('exercise_calories_burned', 'total_calories_burned')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.ledger_synced()
+        return instance
+
+    def ledger_synced(self):
+        """Remember the ledger values as the stored ones"""
+        self._stored_ledger = {
+            name: self.__dict__[name] for name in self.LEDGER_FIELDS if name in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        """Save, leaving out ledger fields the caller did not change"""
+        stored = getattr(self, '_stored_ledger', None)
+        if stored and not self._state.adding and kwargs.get('update_fields') is None:
+            # An instance loaded before a ledger update holds stale totals:
+            # writing them back would undo the update
+            unchanged = {name for name, value in stored.items() if getattr(self, name) == value}
+            if unchanged:
+                deferred = self.get_deferred_fields()
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in unchanged and field.attname not in deferred
+                ]
+        super().save(*args, **kwargs)
+        self.ledger_synced()
+
     def calculate_duration(self):
         """Calculate workout duration from start and end time"""
         if self.start_time and self.end_time:
@@ -347,6 +495,14 @@ class WorkoutExercise(models.Model):
     
     notes = models.TextField(blank=True)
     completed = models.BooleanField(default=False)
+    
+    # Ledger entry: this exercise's share of the workout calories
+    calories_burned = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        default=0,
+        help_text="Calories counted for this exercise (maintained by signals)"
+    )
 
     class Meta:
         ordering = ['workout', 'order']
@@ -354,6 +510,20 @@ class WorkoutExercise(models.Model):
     def __str__(self):
         return f"{self.exercise.name} in {self.workout.name}"
 
+    def calculate_calories(self, calories_per_minute):
+        """Estimate calories for a completed exercise"""
+        if not self.completed or not calories_per_minute:
+            return Decimal('0')
+        
+        # Estimate based on duration, or 3 seconds per rep
+        if self.planned_duration_seconds:
+            duration_minutes = Decimal(self.planned_duration_seconds) / 60
+        else:
+            duration_minutes = Decimal(self.completed_sets * (self.planned_reps or 10) * 3) / 60
+        
+        calories = Decimal(str(calories_per_minute)) * duration_minutes
+        return calories.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
 
 class WorkoutSchedule(models.Model):
     """User's workout schedule/calendar"""
@@ -1,9 +1,40 @@
 from rest_framework import serializers
 import json
+from apps.core.sparse import SparseFieldsetsMixin
+from apps.media.serializers import ImageSourceField, ImageVariantsField
 from .models import (
     Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
     Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
 )
+from .services import WorkoutCalorieLedger
+
+
+def request_lookup(context, name, load):
+    """
+    Resolve a per-user lookup once per request
+    
+    The result is stored on the request, so every (nested) serializer of a
+    page shares one query instead of running one per object.
+    """
+    request = context.get('request')
+    if not request or not request.user.is_authenticated:
+        return None
+    lookups = getattr(request, '_serializer_lookups', None)
+    if lookups is None:
+        lookups = request._serializer_lookups = {}
+    if name not in lookups:
+        lookups[name] = load(request.user)
+    return lookups[name]
+
+
+def favorite_exercise_ids(user):
+    return set(FavoriteExercise.objects.filter(user=user).values_list('exercise_id', flat=True))
+
+
+def scheduled_plan_ids(user):
+    return set(WorkoutSchedule.objects.filter(
+        user=user, is_active=True
+    ).values_list('workout_plan_id', flat=True))
 
 
 class JSONStringField(serializers.Field):
@@ -26,14 +57,28 @@ class JSONStringField(serializers.Field):
         return value if isinstance(value, list) else []
 
 
-class ExerciseMediaSerializer(serializers.ModelSerializer):
+class ExerciseMediaSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for ExerciseMedia model"""
     file = serializers.SerializerMethodField()
+    file_src = ImageSourceField('file')
+    file_variants = ImageVariantsField('file')
     
     class Meta:
         model = ExerciseMedia
-        fields = ['id', 'media_type', 'file', 'url', 'order', 'caption', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'media_type', 'file', 'file_src', 'file_variants', 'url', 'order', 'caption',
+            'status', 'created_at'
+        ]
+        read_only_fields = ['id', 'status', 'created_at']
+        field_prefetches = {
+            'file_src': ['media_variants'],
+            'file_variants': ['media_variants'],
+        }
+        field_sources = {
+            'file_src': ['file'],
+            'file_variants': ['file'],
+            'status': ['file'],
+        }
     
     def get_file(self, obj):
         """Return the file field value as-is if it's a URL, otherwise return the full URL"""
@@ -50,10 +95,12 @@ class ExerciseMediaSerializer(serializers.ModelSerializer):
         return None
 
 
-class ExerciseSerializer(serializers.ModelSerializer):
+class ExerciseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Exercise model"""
     is_favorited = serializers.SerializerMethodField()
     image = serializers.ImageField(required=False, allow_null=True)
+    image_src = ImageSourceField('image')
+    image_variants = ImageVariantsField('image')
     primary_muscles = JSONStringField(required=False)
     secondary_muscles = JSONStringField(required=False)
     media_files = ExerciseMediaSerializer(many=True, read_only=True)
@@ -64,19 +111,25 @@ class ExerciseSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'exercise_type', 'difficulty',
             'equipment', 'primary_muscles', 'secondary_muscles',
             'instructions', 'tips', 'calories_per_minute', 'met_value',
-            'video_url', 'image_url', 'image', 'media_files', 'is_custom', 'created_by',
+            'video_url', 'image_url', 'image', 'image_src', 'image_variants', 'media_files', 'is_custom', 'created_by',
             'is_favorited', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
+        expandable_fields = ['media_files']
+        field_prefetches = {
+            'image_src': ['media_variants'],
+            'image_variants': ['media_variants'],
+        }
+        field_sources = {
+            'image_src': ['image'],
+            'image_variants': ['image'],
+            # Favorites are looked up once per request
+            'is_favorited': [],
+        }
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return FavoriteExercise.objects.filter(
-                user=request.user,
-                exercise=obj
-            ).exists()
-        return False
+        favorites = request_lookup(self.context, 'favorite_exercise_ids', favorite_exercise_ids)
+        return favorites is not None and obj.pk in favorites
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -91,7 +144,7 @@ class ExerciseSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class WorkoutPlanExerciseSerializer(serializers.ModelSerializer):
+class WorkoutPlanExerciseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for exercises in a workout plan"""
     exercise = ExerciseSerializer(read_only=True)
     exercise_id = serializers.PrimaryKeyRelatedField(
@@ -106,9 +159,10 @@ class WorkoutPlanExerciseSerializer(serializers.ModelSerializer):
             'id', 'exercise', 'exercise_id', 'order', 'sets', 'reps',
             'duration_seconds', 'rest_seconds', 'weight_kg', 'notes'
         ]
+        expandable_fields = ['exercise']
 
 
-class WorkoutPlanDaySerializer(serializers.ModelSerializer):
+class WorkoutPlanDaySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for workout plan days"""
     exercises = WorkoutPlanExerciseSerializer(many=True, read_only=True)
     exercise_count = serializers.SerializerMethodField()
@@ -119,12 +173,16 @@ class WorkoutPlanDaySerializer(serializers.ModelSerializer):
             'id', 'day_number', 'name', 'description', 'rest_day',
             'exercises', 'exercise_count'
         ]
+        expandable_fields = ['exercises']
+        field_prefetches = {
+            'exercise_count': ['exercises'],
+        }
 
     def get_exercise_count(self, obj):
-        return obj.exercises.count()
+        return len(obj.exercises.all())
 
 
-class WorkoutPlanSerializer(serializers.ModelSerializer):
+class WorkoutPlanSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for WorkoutPlan model"""
     plan_days = WorkoutPlanDaySerializer(many=True, read_only=True)
     total_days = serializers.SerializerMethodField()
@@ -139,19 +197,21 @@ class WorkoutPlanSerializer(serializers.ModelSerializer):
             'is_scheduled', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
+        expandable_fields = ['plan_days']
+        field_prefetches = {
+            'total_days': ['plan_days'],
+        }
+        field_sources = {
+            # Scheduled plans are looked up once per request
+            'is_scheduled': [],
+        }
 
     def get_total_days(self, obj):
-        return obj.plan_days.count()
+        return len(obj.plan_days.all())
 
     def get_is_scheduled(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return WorkoutSchedule.objects.filter(
-                user=request.user,
-                workout_plan=obj,
-                is_active=True
-            ).exists()
-        return False
+        scheduled = request_lookup(self.context, 'scheduled_plan_ids', scheduled_plan_ids)
+        return scheduled is not None and obj.pk in scheduled
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -165,7 +225,7 @@ class WorkoutPlanDetailSerializer(WorkoutPlanSerializer):
     plan_days = WorkoutPlanDaySerializer(many=True, read_only=True)
 
 
-class WorkoutExerciseSerializer(serializers.ModelSerializer):
+class WorkoutExerciseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for exercises in a workout log"""
     exercise = ExerciseSerializer(read_only=True)
     exercise_id = serializers.PrimaryKeyRelatedField(
@@ -183,6 +243,10 @@ class WorkoutExerciseSerializer(serializers.ModelSerializer):
             'planned_weight_kg', 'completed_sets', 'actual_reps',
             'actual_weight_kg', 'notes', 'completed', 'completion_percentage'
         ]
+        expandable_fields = ['exercise']
+        field_sources = {
+            'completion_percentage': ['planned_sets', 'completed_sets'],
+        }
 
     def get_completion_percentage(self, obj):
         if obj.planned_sets > 0:
@@ -190,7 +254,7 @@ class WorkoutExerciseSerializer(serializers.ModelSerializer):
         return 0
 
 
-class WorkoutSerializer(serializers.ModelSerializer):
+class WorkoutSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for Workout model"""
     exercises = WorkoutExerciseSerializer(many=True, read_only=True)
     workout_plan_name = serializers.CharField(
@@ -212,18 +276,31 @@ class WorkoutSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        expandable_fields = ['exercises']
+        field_prefetches = {
+            'workout_plan_name': ['workout_plan'],
+            # Counted from the exercises (without their Exercise rows)
+            'exercise_count': ['exercises'],
+            'completion_percentage': ['exercises'],
+        }
+        field_sources = {
+            'completion_percentage': ['progress_percentage'],
+            'status': ['completed'],
+        }
 
     def get_exercise_count(self, obj):
-        return obj.exercises.count()
+        return len(obj.exercises.all())
 
     def get_completion_percentage(self, obj):
         # Return progress_percentage if it exists, otherwise calculate from exercises
         if hasattr(obj, 'progress_percentage') and obj.progress_percentage is not None:
             return obj.progress_percentage
         
-        total_exercises = obj.exercises.count()
+        # Counted from the prefetched exercises (no extra queries)
+        exercises = obj.exercises.all()
+        total_exercises = len(exercises)
         if total_exercises > 0:
-            completed_exercises = obj.exercises.filter(completed=True).count()
+            completed_exercises = sum(1 for exercise in exercises if exercise.completed)
             return (completed_exercises / total_exercises) * 100
         return 0
 
@@ -260,16 +337,17 @@ class WorkoutCreateSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         validated_data['user'] = request.user
         
-        workout = Workout.objects.create(**validated_data)
-        
-        # Create exercises
-        for exercise_data in exercises_data:
-            WorkoutExercise.objects.create(workout=workout, **exercise_data)
+        with WorkoutCalorieLedger.deferred():
+            workout = Workout.objects.create(**validated_data)
+            
+            # Create exercises
+            for exercise_data in exercises_data:
+                WorkoutExercise.objects.create(workout=workout, **exercise_data)
         
         return workout
 
 
-class WorkoutScheduleSerializer(serializers.ModelSerializer):
+class WorkoutScheduleSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for WorkoutSchedule model"""
     workout_plan = WorkoutPlanSerializer(read_only=True)
     workout_plan_id = serializers.PrimaryKeyRelatedField(
@@ -289,6 +367,15 @@ class WorkoutScheduleSerializer(serializers.ModelSerializer):
             'days_completed', 'total_days', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        expandable_fields = ['workout_plan']
+        field_prefetches = {
+            'total_days': ['workout_plan'],
+        }
+        field_sources = {
+            'progress_percentage': ['start_date', 'end_date'],
+            'days_completed': ['user', 'workout_plan', 'start_date', 'end_date'],
+            'total_days': ['workout_plan', 'start_date', 'end_date'],
+        }
 
     def get_progress_percentage(self, obj):
         from datetime import date
@@ -327,7 +414,7 @@ class WorkoutScheduleSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class FavoriteExerciseSerializer(serializers.ModelSerializer):
+class FavoriteExerciseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for FavoriteExercise model"""
     exercise = ExerciseSerializer(read_only=True)
     exercise_id = serializers.PrimaryKeyRelatedField(
@@ -340,6 +427,7 @@ class FavoriteExerciseSerializer(serializers.ModelSerializer):
         model = FavoriteExercise
         fields = ['id', 'exercise', 'exercise_id', 'created_at']
         read_only_fields = ['id', 'user', 'created_at']
+        expandable_fields = ['exercise']
 
     def create(self, validated_data):
         request = self.context.get('request')
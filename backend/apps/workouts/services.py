@@ -0,0 +1,239 @@
+"""
+Workout services for calorie accounting and batch exercise writes
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F
+from apps.core.versions import DataVersions
+from .models import Exercise, Workout, WorkoutExercise
+
+
+class WorkoutCalorieLedger:
+    """
+    Keep workout calorie totals in step with their exercises
+
+    Each WorkoutExercise stores its own calories (the ledger entry) and each
+    change applies only the difference to the workout, so a save costs O(1)
+    instead of re-summing every exercise. Inside `deferred()` changes are
+    collected and each touched workout is recalculated once on exit.
+    """
+
+    _state = threading.local()
+
+    @classmethod
+    def _pending(cls):
+        """Workout ids waiting for recalculation, or None outside deferred()"""
+        return getattr(cls._state, 'pending', None)
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        """Coalesce exercise changes into one recalculation per workout"""
+        if cls._pending() is not None:
+            # Nested: the outermost block recalculates
+            yield
+            return
+
+        cls._state.pending = set()
+        try:
+            yield
+            pending = cls._state.pending
+        finally:
+            cls._state.pending = None
+        cls.recalculate(pending)
+
+    @classmethod
+    def defer(cls, workout_id):
+        """Queue the workout if changes are being deferred"""
+        pending = cls._pending()
+        if pending is None:
+            return False
+        pending.add(workout_id)
+        return True
+
+    @staticmethod
+    def exercise_calories(workout_exercise):
+        """Calories for one exercise (loads the exercise only when completed)"""
+        if not workout_exercise.completed:
+            return Decimal('0')
+        if WorkoutExercise.exercise.is_cached(workout_exercise):
+            calories_per_minute = workout_exercise.exercise.calories_per_minute
+        else:
+            calories_per_minute = Exercise.objects.filter(
+                pk=workout_exercise.exercise_id
+            ).values_list('calories_per_minute', flat=True).first()
+        return workout_exercise.calculate_calories(calories_per_minute)
+
+    @staticmethod
+    def apply_delta(workout_id, delta, workout=None):
+        """Add a ledger difference to the workout in a single UPDATE"""
+        if not delta:
+            return
+        # Both right-hand sides read the old column, so the total becomes the new sum
+        Workout.objects.filter(pk=workout_id).update(
+            exercise_calories_burned=F('exercise_calories_burned') + delta,
+            total_calories_burned=F('exercise_calories_burned') + delta,
+        )
+        if workout is not None:
+            workout.exercise_calories_burned = Decimal(str(workout.exercise_calories_burned)) + delta
+            workout.total_calories_burned = workout.exercise_calories_burned
+            workout.ledger_synced()
+
+    @staticmethod
+    def recalculate(workout_ids):
+        """Rebuild the ledger and totals of the given workouts"""
+        if not workout_ids:
+            return
+
+        exercises = WorkoutExercise.objects.filter(
+            workout_id__in=workout_ids
+        ).select_related('exercise').only(
+            'id', 'workout_id', 'completed', 'completed_sets', 'planned_reps',
+            'planned_duration_seconds', 'calories_burned', 'exercise__calories_per_minute'
+        )
+
+        sums = {workout_id: Decimal('0') for workout_id in workout_ids}
+        changed = []
+        for workout_exercise in exercises:
+            calories = workout_exercise.calculate_calories(workout_exercise.exercise.calories_per_minute)
+            sums[workout_exercise.workout_id] += calories
+            if workout_exercise.calories_burned != calories:
+                workout_exercise.calories_burned = calories
+                changed.append(workout_exercise)
+        if changed:
+            WorkoutExercise.objects.bulk_update(changed, ['calories_burned'])
+
+        current = dict(
+            Workout.objects.filter(pk__in=workout_ids).values_list('id', 'exercise_calories_burned')
+        )
+        for workout_id, total in sums.items():
+            if workout_id in current and current[workout_id] != total:
+                Workout.objects.filter(pk=workout_id).update(
+                    exercise_calories_burned=total,
+                    total_calories_burned=total,
+                )
+
+        # Bulk writes send no signals: mark the owners' workouts as changed
+        changed_ids = {workout_exercise.workout_id for workout_exercise in changed}
+        changed_ids.update(
+            workout_id for workout_id, total in sums.items()
+            if workout_id in current and current[workout_id] != total
+        )
+        if changed_ids:
+            user_ids = Workout.objects.filter(pk__in=changed_ids).values_list('user_id', flat=True).order_by().distinct()
+            for user_id in user_ids:
+                DataVersions.bump('workouts', user_id)
+
+
+class WorkoutExerciseBulkService:
+    """Write a workout's exercise list as a diff against the stored rows"""
+    
+    # Values used when a new row does not specify them
+    DEFAULTS = {
+        'order': 1,
+        'planned_sets': 3,
+        'planned_reps': 10,
+        'planned_weight_kg': 0,
+    }
+    FIELDS = (
+        'order', 'planned_sets', 'planned_reps', 'planned_duration_seconds', 'planned_weight_kg',
+        'completed_sets', 'actual_reps', 'actual_weight_kg', 'notes', 'completed',
+    )
+    
+    @classmethod
+    def _clean(cls, exercise_data):
+        """Return (row id, exercise id, provided fields) in their stored Python types"""
+        meta = WorkoutExercise._meta
+        values = {}
+        for name in cls.FIELDS:
+            if name in exercise_data:
+                values[name] = meta.get_field(name).to_python(exercise_data[name])
+        row_id = exercise_data.get('id')
+        return (
+            meta.pk.to_python(row_id) if row_id not in (None, '') else None,
+            meta.get_field('exercise').to_python(exercise_data['exercise_id']),
+            values,
+        )
+    
+    @classmethod
+    def _match(cls, existing, cleaned):
+        """Pair each incoming exercise with a stored row (by id, then by exercise and order)"""
+        by_id = {row.pk: row for row in existing}
+        by_key = {}
+        for row in existing:
+            by_key.setdefault((row.exercise_id, row.order), []).append(row)
+        
+        claimed = set()
+        matches = []
+        for row_id, exercise_id, values in cleaned:
+            row = by_id.get(row_id)
+            if row is None or row.pk in claimed or row.exercise_id != exercise_id:
+                key = (exercise_id, values.get('order', cls.DEFAULTS['order']))
+                row = next((candidate for candidate in by_key.get(key, []) if candidate.pk not in claimed), None)
+            if row is not None:
+                claimed.add(row.pk)
+            matches.append(row)
+        return matches, [row for row in existing if row.pk not in claimed]
+    
+    @classmethod
+    @transaction.atomic
+    def sync(cls, workout, exercises_data):
+        """
+        Make the workout's exercises match the given list
+        
+        Args:
+            workout: saved Workout
+            exercises_data: list of dicts with exercise_id and optional id,
+                            order, planned_* and actual/completion fields
+        
+        Returns:
+            (created, updated, deleted) counts
+        """
+        cleaned = [cls._clean(exercise_data) for exercise_data in exercises_data]
+        exercise_ids = {exercise_id for _, exercise_id, _ in cleaned}
+        missing = exercise_ids - set(
+            Exercise.objects.filter(pk__in=exercise_ids).values_list('pk', flat=True)
+        )
+        if missing:
+            raise Exercise.DoesNotExist(
+                f"Exercise not found: {', '.join(str(i) for i in sorted(missing))}"
+            )
+        
+        existing = list(WorkoutExercise.objects.filter(workout=workout).select_for_update())
+        matches, stale = cls._match(existing, cleaned)
+        
+        to_create = []
+        to_update = []
+        update_fields = set()
+        for (_, exercise_id, values), row in zip(cleaned, matches):
+            if row is None:
+                to_create.append(WorkoutExercise(
+                    workout=workout,
+                    exercise_id=exercise_id,
+                    **{**cls.DEFAULTS, **values}
+                ))
+                continue
+            # Unchanged rows are not written
+            changed = [name for name, value in values.items() if getattr(row, name) != value]
+            if changed:
+                for name in changed:
+                    setattr(row, name, values[name])
+                update_fields.update(changed)
+                to_update.append(row)
+        
+        # Calorie signals are deferred; the workout is recalculated once
+        with WorkoutCalorieLedger.deferred():
+            if stale:
+                WorkoutExercise.objects.filter(pk__in=[row.pk for row in stale]).delete()
+            WorkoutExercise.objects.bulk_create(to_create)
+            if to_update:
+                WorkoutExercise.objects.bulk_update(to_update, sorted(update_fields))
+            if stale or to_create or to_update:
+                WorkoutCalorieLedger.defer(workout.pk)
+        
+        if stale or to_create or to_update:
+            # Bulk writes skip model signals; saving the workout invalidates cached reports
+            workout.save(update_fields=['updated_at'])
+        return len(to_create), len(to_update), len(stale)
@@ -1,6 +1,43 @@
-from django.db.models.signals import post_save, pre_save
+from decimal import Decimal
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Workout, WorkoutExercise
+from apps.users.models import User
+from .models import Exercise, ExerciseMuscle, Workout, WorkoutExercise
+from .services import WorkoutCalorieLedger
+from .tasks import recalculate_calories
+
+
+# Workouts per recalculation job
+RECALCULATE_CHUNK_SIZE = 500
+
+
+@receiver(post_save, sender=Exercise)
+def sync_exercise_muscles(sender, instance, **kwargs):
+    """Keep the indexed muscle group relation in sync with the muscle lists"""
+    ExerciseMuscle.sync(instance)
+
+
+@receiver(pre_save, sender=Exercise)
+def remember_calorie_rate(sender, instance, **kwargs):
+    """Load the stored calories per minute to detect a change"""
+    instance._stored_calories_per_minute = None
+    if instance.pk:
+        instance._stored_calories_per_minute = Exercise.objects.filter(
+            pk=instance.pk
+        ).values_list('calories_per_minute', flat=True).first()
+
+
+@receiver(post_save, sender=Exercise)
+def recalculate_on_calorie_rate(sender, instance, created=False, **kwargs):
+    """Rebuild the ledger of every workout using the exercise, on the job queue"""
+    if created or instance._stored_calories_per_minute == instance.calories_per_minute:
+        return
+    workout_ids = list(
+        WorkoutExercise.objects.filter(exercise=instance, completed=True)
+        .values_list('workout_id', flat=True).distinct().order_by('workout_id')
+    )
+    for start in range(0, len(workout_ids), RECALCULATE_CHUNK_SIZE):
+        recalculate_calories.enqueue(workout_ids=workout_ids[start:start + RECALCULATE_CHUNK_SIZE])
 
 
 @receiver(pre_save, sender=Workout)
@@ -10,29 +47,43 @@ def calculate_workout_duration(sender, instance, **kwargs):
         instance.calculate_duration()
 
 
+def _deleted_via(origin, model):
+    """Check whether a delete was started from the given model (instance or queryset)"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+@receiver(pre_save, sender=WorkoutExercise)
+def calculate_exercise_calories(sender, instance, **kwargs):
+    """Compute the exercise's new ledger entry and its difference"""
+    instance._calories_delta = Decimal('0')
+    if WorkoutCalorieLedger.defer(instance.workout_id):
+        return
+    
+    calories = WorkoutCalorieLedger.exercise_calories(instance)
+    instance._calories_delta = calories - Decimal(str(instance.calories_burned or 0))
+    instance.calories_burned = calories
+
+
 @receiver(post_save, sender=WorkoutExercise)
-def update_workout_calories(sender, instance, **kwargs):
-    """Update total calories burned when workout exercise is saved"""
-    workout = instance.workout
+def update_workout_calories(sender, instance, update_fields=None, **kwargs):
+    """Apply the exercise's calorie difference to the workout total"""
+    delta = getattr(instance, '_calories_delta', None)
+    if not delta:
+        return
+    
+    if update_fields is not None and 'calories_burned' not in update_fields:
+        WorkoutExercise.objects.filter(pk=instance.pk).update(calories_burned=instance.calories_burned)
     
-    # Calculate calories for this exercise
-    if instance.completed and instance.exercise.calories_per_minute:
-        # Estimate based on sets and reps or duration
-        if instance.planned_duration_seconds:
-            duration_minutes = instance.planned_duration_seconds / 60
-        else:
-            # Estimate 3 seconds per rep
-            duration_minutes = (instance.completed_sets * (instance.planned_reps or 10) * 3) / 60
-        
-        exercise_calories = float(instance.exercise.calories_per_minute) * duration_minutes
-        
-        # Update workout total
-        total_calories = sum(
-            float(ex.exercise.calories_per_minute or 0) * (
-                (ex.planned_duration_seconds or (ex.completed_sets * (ex.planned_reps or 10) * 3)) / 60
-            )
-            for ex in workout.exercises.filter(completed=True)
-        )
-        
-        workout.total_calories_burned = total_calories
-        workout.save(update_fields=['total_calories_burned'])
+    workout = instance.workout if WorkoutExercise.workout.is_cached(instance) else None
+    WorkoutCalorieLedger.apply_delta(instance.workout_id, delta, workout=workout)
+
+
+@receiver(post_delete, sender=WorkoutExercise)
+def remove_workout_calories(sender, instance, origin=None, **kwargs):
+    """Take a deleted exercise's calories off the workout total"""
+    # Workout and user deletes remove the total along with the exercises
+    if _deleted_via(origin, Workout) or _deleted_via(origin, User):
+        return
+    if WorkoutCalorieLedger.defer(instance.workout_id):
+        return
+    WorkoutCalorieLedger.apply_delta(instance.workout_id, -Decimal(str(instance.calories_burned or 0)))
@@ -0,0 +1,11 @@
+"""
+Background jobs for Workouts app
+"""
+from apps.jobs.queue import task
+from .services import WorkoutCalorieLedger
+
+
+@task('workouts.recalculate_calories', max_attempts=5)
+def recalculate_calories(workout_ids):
+    """Rebuild the calorie ledger of the given workouts"""
+    WorkoutCalorieLedger.recalculate(workout_ids)
@@ -2,11 +2,16 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg, Max
 from django.utils import timezone
 from datetime import datetime, timedelta
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.pagination import DateCursorPagination
+from apps.core.sparse import sparse_queryset
 from .models import (
-    Exercise, ExerciseMedia, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
+    Exercise, ExerciseMedia, MuscleGroup, WorkoutPlan, WorkoutPlanDay, WorkoutPlanExercise,
     Workout, WorkoutExercise, WorkoutSchedule, FavoriteExercise
 )
 from .serializers import (
@@ -15,6 +20,9 @@ from .serializers import (
     WorkoutScheduleSerializer, FavoriteExerciseSerializer,
     WorkoutStatsSerializer, WorkoutExerciseSerializer
 )
+from apps.media.serializers import MediaUploadSerializer
+from apps.media.uploads import MediaUploadPipeline
+from .services import WorkoutExerciseBulkService
 
 
 class ExerciseViewSet(viewsets.ModelViewSet):
@@ -77,29 +85,17 @@ class ExerciseViewSet(viewsets.ModelViewSet):
                 )
                 order += 1
         
-        # Then save uploaded files
-        for image in images:
-            ExerciseMedia.objects.create(
-                exercise=exercise,
-                media_type='image',
-                file=image,
-                order=order
-            )
-            order += 1
-        
-        for video in videos:
-            ExerciseMedia.objects.create(
-                exercise=exercise,
-                media_type='video',
-                file=video,
-                order=order
-            )
-            order += 1
+        # Then stage uploaded files (stored in the background)
+        uploads = self._stage_media(exercise, images, videos, order)
         
         # Refresh serializer data to include media files
         serializer = self.get_serializer(exercise)
         headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        return Response(
+            {**serializer.data, 'media_uploads': MediaUploadSerializer(uploads, many=True).data},
+            status=status.HTTP_201_CREATED,
+            headers=headers
+        )
     
     def update(self, request, *args, **kwargs):
         """Override update to handle multiple media files and URLs"""
@@ -155,28 +151,28 @@ class ExerciseViewSet(viewsets.ModelViewSet):
                     )
                     order += 1
             
-            # Then add uploaded files
-            for image in images:
-                ExerciseMedia.objects.create(
-                    exercise=exercise,
-                    media_type='image',
-                    file=image,
-                    order=order
-                )
-                order += 1
-            
-            for video in videos:
-                ExerciseMedia.objects.create(
+            # Then stage uploaded files (stored in the background)
+            uploads = self._stage_media(exercise, images, videos, order)
+        else:
+            uploads = []
+        
+        # Refresh serializer data to include media files
+        serializer = self.get_serializer(exercise)
+        return Response({**serializer.data, 'media_uploads': MediaUploadSerializer(uploads, many=True).data})
+    
+    def _stage_media(self, exercise, images, videos, order):
+        """Create pending media rows and queue their files for upload"""
+        uploads = []
+        for media_type, files in (('image', images), ('video', videos)):
+            for uploaded_file in files:
+                media = ExerciseMedia.objects.create(
                     exercise=exercise,
-                    media_type='video',
-                    file=video,
+                    media_type=media_type,
                     order=order
                 )
+                uploads.append(MediaUploadPipeline.stage(uploaded_file, media, 'file', user=self.request.user))
                 order += 1
-        
-        # Refresh serializer data to include media files
-        serializer = self.get_serializer(exercise)
-        return Response(serializer.data)
+        return uploads
 
     def get_queryset(self):
         # Filter to show:
@@ -204,17 +200,15 @@ class ExerciseViewSet(viewsets.ModelViewSet):
         # Filter by muscle group
         muscle = self.request.query_params.get('muscle')
         if muscle:
-            queryset = queryset.filter(
-                Q(primary_muscles__contains=[muscle]) |
-                Q(secondary_muscles__contains=[muscle])
-            )
+            # Indexed lookup on the normalized relation (one link per exercise and muscle)
+            queryset = queryset.filter(muscle_links__muscle_group__name=muscle.strip().lower())
         
         # Show only user's custom exercises or all public exercises
         show_custom_only = self.request.query_params.get('custom_only')
         if show_custom_only == 'true':
             queryset = queryset.filter(created_by=self.request.user, is_custom=True)
         
-        return queryset
+        return queryset.prefetch_related('media_variants', 'media_files__media_variants')
 
     def perform_create(self, serializer):
         """Save the exercise with the current user as creator and mark as custom"""
@@ -237,13 +231,14 @@ class ExerciseViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def muscle_groups(self, request):
-        """Get all muscle groups"""
-        muscles = [
-            'chest', 'back', 'shoulders', 'biceps', 'triceps',
-            'forearms', 'abs', 'obliques', 'quads', 'hamstrings',
-            'glutes', 'calves', 'traps', 'lats'
-        ]
-        return Response(muscles)
+        """Get muscle groups used by the exercises visible to the user"""
+        visible = Exercise.objects.filter(
+            Q(is_custom=False) | Q(is_custom=True, created_by=request.user)
+        )
+        muscles = MuscleGroup.objects.filter(
+            exercise_links__exercise__in=visible
+        ).distinct().order_by('name').values_list('name', flat=True)
+        return Response(list(muscles))
 
 
 class ExerciseMediaViewSet(viewsets.ModelViewSet):
@@ -252,7 +247,7 @@ class ExerciseMediaViewSet(viewsets.ModelViewSet):
     serializer_class = ExerciseMediaSerializer
     
     def get_queryset(self):
-        queryset = ExerciseMedia.objects.all()
+        queryset = ExerciseMedia.objects.prefetch_related('media_variants')
         
         # Filter by exercise if provided
         exercise_id = self.request.query_params.get('exercise')
@@ -272,20 +267,10 @@ class ExerciseMediaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Delete the file from storage only if it's not a URL
-        if instance.file:
-            file_str = str(instance.file)
-            # Only delete from filesystem if it's not a URL
-            if not (file_str.startswith('http://') or file_str.startswith('https://')):
-                try:
-                    instance.file.delete(save=False)
-                except Exception as e:
-                    # Log error but continue with database deletion
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(f"Failed to delete file {file_str}: {e}")
-        
+        # Delete the file from storage in the background (URLs are skipped)
+        file_name = instance.file.name
         self.perform_destroy(instance)
+        MediaUploadPipeline.delete_later(instance.file.storage, file_name)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -320,7 +305,10 @@ class WorkoutPlanViewSet(viewsets.ModelViewSet):
         if show_custom_only == 'true':
             queryset = queryset.filter(created_by=self.request.user, is_custom=True)
         
-        return queryset.prefetch_related('plan_days__exercises__exercise')
+        return queryset.prefetch_related(
+            'plan_days__exercises__exercise__media_variants',
+            'plan_days__exercises__exercise__media_files__media_variants'
+        )
     
     def perform_create(self, serializer):
         """Save the workout plan with the current user as creator and mark as custom"""
@@ -364,9 +352,11 @@ class WorkoutPlanViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class WorkoutViewSet(viewsets.ModelViewSet):
+class WorkoutViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Workout model"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('workouts', 'workout_catalog')
+    pagination_class = DateCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'notes']
     ordering_fields = ['date', 'duration_minutes', 'total_calories_burned', 'created_at']
@@ -398,7 +388,17 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         if workout_plan_id:
             queryset = queryset.filter(workout_plan_id=workout_plan_id)
         
-        return queryset.prefetch_related('exercises__exercise')
+        # ?fields= / ?expand= decide what is prefetched and loaded
+        return sparse_queryset(
+            queryset,
+            WorkoutSerializer,
+            self.request,
+            full=lambda queryset: queryset.select_related('workout_plan').prefetch_related(
+                'exercises__exercise__media_variants',
+                'exercises__exercise__media_files__media_variants'
+            ),
+            required=('date',)
+        )
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -418,7 +418,7 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
     
     def update(self, request, *args, **kwargs):
-        """Override update to handle exercises properly"""
+        """Update the workout and apply its exercise list as a diff"""
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
@@ -435,26 +435,30 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         # Update workout fields
         serializer = self.get_serializer(instance, data=workout_data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
         
-        # Update exercises if provided
-        if exercises_data is not None:
-            # Delete existing exercises
-            instance.exercises.all().delete()
-            
-            # Create new exercises
-            for exercise_data in exercises_data:
-                WorkoutExercise.objects.create(
-                    workout=instance,
-                    exercise_id=exercise_data.get('exercise_id'),
-                    order=exercise_data.get('order', 1),
-                    planned_sets=exercise_data.get('planned_sets', 3),
-                    planned_reps=exercise_data.get('planned_reps', 10),
-                    planned_weight_kg=exercise_data.get('planned_weight_kg', 0)
-                )
+        if exercises_data is not None and (
+            not isinstance(exercises_data, list)
+            or not all(isinstance(item, dict) and item.get('exercise_id') for item in exercises_data)
+        ):
+            return Response(
+                {'error': 'exercises must be a list of objects with exercise_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Refresh instance to get updated exercises
-        instance.refresh_from_db()
+        try:
+            with transaction.atomic():
+                self.perform_update(serializer)
+                
+                # Update exercises if provided (one bulk write per kind, one calorie recalculation)
+                if exercises_data is not None:
+                    WorkoutExerciseBulkService.sync(instance, exercises_data)
+        except Exercise.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Reload with the list prefetches for the response
+        instance = self.get_queryset().get(pk=instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -578,9 +582,10 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class WorkoutScheduleViewSet(viewsets.ModelViewSet):
+class WorkoutScheduleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for WorkoutSchedule model"""
     permission_classes = [IsAuthenticated]
+    conditional_domains = ('workouts', 'workout_catalog')
     serializer_class = WorkoutScheduleSerializer
     ordering = ['-start_date']
 
@@ -592,7 +597,10 @@ class WorkoutScheduleViewSet(viewsets.ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
         
-        return queryset.select_related('workout_plan')
+        return queryset.select_related('workout_plan').prefetch_related(
+            'workout_plan__plan_days__exercises__exercise__media_variants',
+            'workout_plan__plan_days__exercises__exercise__media_files__media_variants'
+        )
 
     @action(detail=False, methods=['get'], url_path='active')
     def active(self, request):
@@ -622,7 +630,9 @@ class FavoriteExerciseViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return FavoriteExercise.objects.filter(
             user=self.request.user
-        ).select_related('exercise')
+        ).select_related('exercise').prefetch_related(
+            'exercise__media_variants', 'exercise__media_files__media_variants'
+        )
 
     @action(detail=False, methods=['post'])
     def toggle(self, request):
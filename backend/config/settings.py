@@ -45,6 +45,9 @@ INSTALLED_APPS = [
     'apps.workouts',
     'apps.analytics',
     'apps.recommendations',
+    'apps.jobs',
+    'apps.media',
+    'apps.core',
 ]
 
 MIDDLEWARE = [
@@ -97,6 +100,32 @@ else:
         }
     }
 
+# Cache - local memory by default; set CACHE_BACKEND/CACHE_LOCATION for
+# file based (django.core.cache.backends.filebased.FileBasedCache) or shared caches.
+# Only derived data is cached: the versions that invalidate it are database rows
+# (apps.core.models.DataVersion), so per-process caches never serve stale entries
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='fitnutrition'),
+    }
+}
+
+# Seconds a cached analytics report is kept (reports are invalidated on writes anyway)
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Seconds a precomputed insight snapshot may be served (see precompute_insights);
+# snapshots are also ignored once the user's data changes or the day rolls over
+INSIGHT_SNAPSHOT_MAX_AGE = config('INSIGHT_SNAPSHOT_MAX_AGE', default=24 * 60 * 60, cast=int)
+
+# Seconds after a data change before its insight snapshots are recomputed on the
+# job queue (run_worker); further changes in that time join the same refresh
+INSIGHT_REFRESH_DELAY = config('INSIGHT_REFRESH_DELAY', default=60, cast=int)
+
+# Part of every ETag (see apps/core/conditional.py); a new value per deploy makes
+# clients refetch responses whose format changed. Render sets RENDER_GIT_COMMIT
+CONDITIONAL_GET_SALT = config('CONDITIONAL_GET_SALT', default=config('RENDER_GIT_COMMIT', default=''))
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -150,9 +179,27 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': config('CLOUDINARY_API_SECRET'),
 }
 
-# Use Cloudinary for media files
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Use Cloudinary for media files; USE_LOCAL_MEDIA_STORAGE=True stores them under
+# MEDIA_ROOT instead (development and tests)
+USE_LOCAL_MEDIA_STORAGE = config('USE_LOCAL_MEDIA_STORAGE', default=False, cast=bool)
+if USE_LOCAL_MEDIA_STORAGE:
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+else:
+    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 MEDIA_URL = '/media/'  # Cloudinary will override this
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Uploads are staged on local disk and pushed to storage by a thread pool
+# (see apps/media/uploads.py); 0 workers stores them inline
+MEDIA_STAGING_ROOT = config('MEDIA_STAGING_ROOT', default=str(BASE_DIR / 'media_staging'))
+MEDIA_UPLOAD_WORKERS = config('MEDIA_UPLOAD_WORKERS', default=4, cast=int)
+# Uploads waiting for a worker before new requests block
+MEDIA_UPLOAD_QUEUE_SIZE = config('MEDIA_UPLOAD_QUEUE_SIZE', default=32, cast=int)
+
+# Resized image variants (thumb / card / full, see apps/media/variants.py);
+# WEBP falls back to JPEG when Pillow was built without WebP support
+MEDIA_VARIANT_FORMAT = config('MEDIA_VARIANT_FORMAT', default='WEBP')
+MEDIA_VARIANT_QUALITY = config('MEDIA_VARIANT_QUALITY', default=80, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -171,6 +218,15 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'apps.core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DATE_FORMAT': '%Y-%m-%d',
 }
@@ -215,12 +271,20 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-modified-since',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Validators of conditional GET, readable by clients that revalidate themselves
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'last-modified',
+]
+
 # Groq API Configuration
 GROQ_API_KEY = config('GROQ_API_KEY', default='')
 
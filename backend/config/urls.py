@@ -19,6 +19,7 @@ urlpatterns = [
     path('api/workouts/', include('apps.workouts.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
     path('api/recommendations/', include('apps.recommendations.urls')),
+    path('api/media/', include('apps.media.urls')),
     
     # JWT Token refresh
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),